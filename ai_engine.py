@@ -1,6 +1,11 @@
-import google.generativeai as genai
+import asyncio
+import contextlib
 import json
+import threading
+import time
+import weakref
 import config
+import response_cache
 
 
 # ------------------------------
@@ -62,13 +67,31 @@ DO NOT add extra headings or commentary.
 """
 
 
+# -----------------------------------------
+#   LAZY SDK IMPORT
+# -----------------------------------------
+_GENAI = None
+
+
+def _genai():
+    """
+    google.generativeai, imported on first use: it takes longer to
+    import than the rest of the app's engines combined.
+    """
+    global _GENAI
+    if _GENAI is None:
+        import google.generativeai as genai
+        _GENAI = genai
+    return _GENAI
+
+
 # -----------------------------------------
 #   AUTO MODEL PICKER  (HIGHLY RELIABLE)
 # -----------------------------------------
 def _select_best_model():
     try:
         available = [
-            m.name for m in genai.list_models()
+            m.name for m in _genai().list_models()
             if "generateContent" in m.supported_generation_methods
         ]
     except Exception:
@@ -85,49 +108,501 @@ def _select_best_model():
     return available[0] if available else None
 
 
+def _is_model_not_found(error):
+    """True when Gemini rejected the call because the model is gone."""
+    if getattr(error, "code", None) == 404:
+        return True
+    message = str(error).lower()
+    return "not found" in message and "model" in message
+
 
 # -----------------------------------------
-#      MAIN HYBRID RESPONSE FUNCTION
+#   MODEL REGISTRY  (PROCESS-WIDE CACHE)
 # -----------------------------------------
-def get_hybrid_response(query, image=None, context_data=None):
+class ModelRegistry:
+    """
+    Resolves the Gemini model once per process and reuses it.
 
-    if not config.GEMINI_API_KEY:
-        return "⚠️ API Key Missing in config.py"
+    - genai.configure() only runs when the API key changes
+    - list_models() only runs on first use, after `ttl` seconds,
+      or after invalidate() (e.g. a "model not found" error)
+    - GenerativeModel instances are cached per (model, system prompt)
+    - `override` pins a model name and skips discovery entirely
+    """
+
+    def __init__(self, ttl=None, override=None):
+        self.ttl = ttl
+        self.override = override
+        self._lock = threading.Lock()
+        self._api_key = None
+        self._model_name = None
+        self._resolved_at = 0.0
+        self._models = {}
+
+    def _configure(self):
+        if self._api_key != config.GEMINI_API_KEY:
+            _genai().configure(api_key=config.GEMINI_API_KEY)
+            self._api_key = config.GEMINI_API_KEY
+            self._model_name = None
+            self._models.clear()
+
+    def _expired(self):
+        if self._model_name is None:
+            return True
+        if not self.ttl:
+            return False
+        return (time.monotonic() - self._resolved_at) > self.ttl
+
+    def model_name(self):
+        """Returns the cached model name, resolving it if needed."""
+        with self._lock:
+            self._configure()
+            if self.override:
+                return self.override
+            if self._expired():
+                self._model_name = _select_best_model()
+                self._resolved_at = time.monotonic()
+                self._models.clear()
+            return self._model_name
+
+    def get_model(self, system_prompt=None):
+        """Returns (model_name, GenerativeModel) or (None, None)."""
+        name = self.model_name()
+        if not name:
+            return None, None
+
+        key = (name, system_prompt)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = _genai().GenerativeModel(name, system_instruction=system_prompt)
+                self._models[key] = model
+        return name, model
+
+    def pin(self, model_name):
+        """Pins a model name (None restores automatic selection)."""
+        with self._lock:
+            self.override = model_name
+            self._models.clear()
+
+    def invalidate(self):
+        """Forces model discovery on the next request."""
+        with self._lock:
+            self._model_name = None
+            self._models.clear()
+
+
+MODEL_REGISTRY = ModelRegistry(
+    ttl=config.GEMINI_MODEL_TTL,
+    override=config.GEMINI_MODEL_OVERRIDE,
+)
+
+
+# -----------------------------------------
+#   RESPONSE CACHE  (MEMORY + DISK)
+# -----------------------------------------
+RESPONSE_CACHE = response_cache.ResponseCache(
+    max_bytes=config.RESPONSE_CACHE_MAX_BYTES,
+    max_entry_bytes=config.RESPONSE_CACHE_MAX_ENTRY_BYTES,
+    ttl=config.RESPONSE_CACHE_TTL,
+    disk_dir=config.RESPONSE_CACHE_DIR if config.RESPONSE_CACHE_DISK else None,
+    max_disk_bytes=config.RESPONSE_CACHE_MAX_DISK_BYTES,
+)
+
+
+# -----------------------------------------
+#   DUAL-VIEW SECTIONS
+# -----------------------------------------
+CLINICAL_HEADING = "### 👨‍⚕️ Clinical View"
+PATIENT_HEADING = "### 🏡 Patient View"
+
+_SECTION_HEADINGS = {
+    CLINICAL_HEADING: "clinical",
+    PATIENT_HEADING: "patient",
+}
+
+
+def _clean_markdown(text):
+    # Clean accidental markdown artifacts
+    if text.strip().startswith("```"):
+        text = text.strip().lstrip("```").rstrip("```")
+    return text
+
+
+def split_sections(text):
+    """
+    Splits a full response into (preamble, clinical, patient).
+    Missing sections come back as empty strings.
+    """
+    parser = SectionParser()
+    parts = {"preamble": "", "clinical": "", "patient": ""}
+    for section, chunk in parser.feed(text) + parser.finish():
+        parts[section] += chunk
+    return parts["preamble"], parts["clinical"], parts["patient"]
+
+
+class SectionParser:
+    """
+    Incremental parser that routes streamed text to its section.
+
+    feed() returns a list of (section, text) pieces, where section is
+    "preamble", "clinical" or "patient". Text that could still be the
+    start of a heading split across chunks is held back until the next
+    feed() or finish().
+    """
+
+    def __init__(self):
+        self.section = "preamble"
+        self._buffer = ""
+        self._started = False
+        self._max_heading = max(len(h) for h in _SECTION_HEADINGS)
+
+    def _held_back(self):
+        # Trailing whitespace / fence characters are kept for finish()
+        held = len(self._buffer) - len(self._buffer.rstrip().rstrip("`"))
+
+        # Longest buffer suffix that is a prefix of some heading
+        for size in range(min(len(self._buffer), self._max_heading - 1), held, -1):
+            tail = self._buffer[-size:]
+            if any(h.startswith(tail) for h in _SECTION_HEADINGS):
+                return size
+        return held
+
+    def feed(self, chunk):
+        if not self._started:
+            # Drop a leading code fence, possibly split across chunks
+            chunk = chunk.lstrip().lstrip("`").lstrip()
+            self._started = bool(chunk)
+
+        self._buffer += chunk
+        pieces = []
+
+        while True:
+            found = [
+                (self._buffer.find(h), h) for h in _SECTION_HEADINGS
+                if h in self._buffer
+            ]
+            if not found:
+                break
+            pos, heading = min(found)
+            if pos:
+                pieces.append((self.section, self._buffer[:pos]))
+            self.section = _SECTION_HEADINGS[heading]
+            self._buffer = self._buffer[pos + len(heading):]
+
+        keep = self._held_back()
+        emit = self._buffer[:len(self._buffer) - keep]
+        self._buffer = self._buffer[len(self._buffer) - keep:]
+        if emit:
+            pieces.append((self.section, emit))
+        return pieces
+
+    def finish(self):
+        rest = self._buffer.rstrip().rstrip("`")
+        self._buffer = ""
+        return [(self.section, rest)] if rest else []
+
+
+# -----------------------------------------
+#   PER-KEY RATE LIMITER  (TOKEN BUCKET)
+# -----------------------------------------
+class RateLimiter:
+    """
+    Token bucket per key (API key, user, session...).
+    rate_per_minute = 0 disables limiting.
+    """
+
+    def __init__(self, rate_per_minute=0, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst or max(1, rate_per_minute)
+        self._lock = threading.Lock()
+        self._buckets = {}
 
-    # Configure Gemini
-    genai.configure(api_key=config.GEMINI_API_KEY)
+    def _take(self, key):
+        # Returns 0 when a token was taken, else seconds to wait
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
 
-    # Select model automatically
-    model_name = _select_best_model()
-    if not model_name:
-        return "⚠️ No available models for your API key."
+    async def acquire(self, key):
+        if not self.rate:
+            return
+        while True:
+            wait = self._take(key)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
 
+
+# -----------------------------------------
+#   ASYNC CLIENT  (BOUNDED + COALESCED)
+# -----------------------------------------
+def _build_prompt(query, context_data=None):
     # Build dynamic prompt
-    full_prompt = query
-    if context_data:
-        full_prompt = (
-            f"Internal Medical Data: {json.dumps(context_data)}\n"
-            f"User Query: {query}"
-        )
+    if not context_data:
+        return query
+    return (
+        f"Internal Medical Data: {json.dumps(context_data)}\n"
+        f"User Query: {query}"
+    )
 
-    try:
-        model = genai.GenerativeModel(
-            model_name,
-            system_instruction=SYSTEM_PROMPT
-        )
 
-        if image:
-            response = model.generate_content([full_prompt, image])
-        else:
-            response = model.generate_content(full_prompt)
+class AsyncGeminiClient:
+    """
+    asyncio front-end for Gemini generate_content.
+
+    - at most `max_concurrency` upstream calls run at once (per event loop)
+    - each rate_key is throttled by a token bucket
+    - identical in-flight requests share one upstream call
+    - successful answers are stored in `cache` (a ResponseCache)
+
+    `model_provider` returns (model_name, model) and defaults to
+    MODEL_REGISTRY. Any object with generate_content_async() or
+    generate_content() works as the model, so a local fake can stand
+    in for Gemini.
+    """
+
+    def __init__(self, model_provider=None, max_concurrency=8,
+                 rate_per_minute=0, burst=None, cache=None, on_model_missing=None):
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.limiter = RateLimiter(rate_per_minute, burst)
+        self.stats = {"requests": 0, "upstream_calls": 0, "coalesced": 0, "cache_hits": 0}
 
-        final_text = response.text
+        if model_provider is None:
+            model_provider = lambda: MODEL_REGISTRY.get_model(SYSTEM_PROMPT)
+            if on_model_missing is None:
+                on_model_missing = _refresh_registry
+        self._model_provider = model_provider
+        self._on_model_missing = on_model_missing
 
-        # Clean accidental markdown artifacts
-        if final_text.strip().startswith("```"):
-            final_text = final_text.strip().lstrip("```").rstrip("```")
+        # Semaphores and in-flight maps are bound to one event loop
+        self._loop_state = weakref.WeakKeyDictionary()
 
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            state = (asyncio.Semaphore(self.max_concurrency), {})
+            self._loop_state[loop] = state
+        return state
+
+    async def acquire(self, rate_key="default"):
+        """
+        Takes a rate-limit token and a concurrency slot; pair with
+        release() on the same event loop.
+        """
+        semaphore, _ = self._state()
+        await self.limiter.acquire(rate_key)
+        await semaphore.acquire()
+        self.stats["upstream_calls"] += 1
+
+    def release(self):
+        semaphore, _ = self._state()
+        semaphore.release()
+
+    async def _call_upstream(self, model, contents, cache_key, rate_key, use_cache):
+        await self.acquire(rate_key)
+        try:
+            if hasattr(model, "generate_content_async"):
+                response = await model.generate_content_async(contents)
+            else:
+                response = await asyncio.to_thread(model.generate_content, contents)
+        finally:
+            self.release()
+
+        final_text = _clean_markdown(response.text)
+        if use_cache and self.cache is not None:
+            self.cache.set(cache_key, final_text)
         return final_text
 
-    except Exception as e:
-        return f"⚠️ Error using {model_name}: {str(e)}"
+    async def generate(self, query, image=None, context_data=None,
+                       use_cache=True, rate_key="default"):
+        """
+        Returns the response text (or a "⚠️ ..." error string).
+        """
+        self.stats["requests"] += 1
+        full_prompt = _build_prompt(query, context_data)
+        contents = [full_prompt, image] if image else full_prompt
+        model_name = None
+
+        # Second attempt only happens after a "model not found" refresh
+        for attempt in range(2):
+            try:
+                model_name, model = await asyncio.to_thread(self._model_provider)
+                if not model:
+                    return "⚠️ No available models for your API key."
+
+                cache_key = response_cache.make_key(
+                    query, context_data, image, model_name, SYSTEM_PROMPT
+                )
+                if use_cache and self.cache is not None:
+                    cached = self.cache.get(cache_key)
+                    if cached is not None:
+                        self.stats["cache_hits"] += 1
+                        return cached
+
+                _, inflight = self._state()
+                task = inflight.get(cache_key)
+                if task is None:
+                    task = asyncio.ensure_future(self._call_upstream(
+                        model, contents, cache_key, rate_key, use_cache
+                    ))
+                    inflight[cache_key] = task
+                    task.add_done_callback(lambda _t, k=cache_key: inflight.pop(k, None))
+                else:
+                    self.stats["coalesced"] += 1
+
+                # shield: one cancelled waiter must not cancel the shared call
+                return await asyncio.shield(task)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == 0 and _is_model_not_found(e) and self._on_model_missing:
+                    self._on_model_missing()
+                    continue
+                return f"⚠️ Error using {model_name}: {str(e)}"
+
+
+def _refresh_registry():
+    if not MODEL_REGISTRY.override:
+        MODEL_REGISTRY.invalidate()
+
+
+ASYNC_CLIENT = AsyncGeminiClient(
+    max_concurrency=config.GEMINI_MAX_CONCURRENCY,
+    rate_per_minute=config.GEMINI_RATE_PER_MINUTE,
+    cache=RESPONSE_CACHE,
+)
+
+
+# One shared event loop thread serves every Streamlit session, so the
+# concurrency and rate limits apply process-wide, to blocking and
+# streamed calls alike (see upstream_slot()); coalescing covers
+# blocking calls.
+_LOOP = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _background_loop():
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="gemini-async", daemon=True
+            ).start()
+            _LOOP = loop
+    return _LOOP
+
+
+@contextlib.contextmanager
+def upstream_slot(rate_key="default"):
+    """
+    Holds one of ASYNC_CLIENT's concurrency slots (and a rate-limit
+    token) from a plain thread, e.g. around a streamed Gemini call, so
+    streaming and non-streaming requests share the same limits.
+    """
+    loop = _background_loop()
+    client = ASYNC_CLIENT
+    asyncio.run_coroutine_threadsafe(client.acquire(rate_key), loop).result()
+    try:
+        yield
+    finally:
+        loop.call_soon_threadsafe(client.release)
+
+
+async def generate_content_async(query, image=None, context_data=None,
+                                 use_cache=True, rate_key="default"):
+    if not config.GEMINI_API_KEY:
+        return "⚠️ API Key Missing in config.py"
+    return await ASYNC_CLIENT.generate(query, image, context_data, use_cache, rate_key)
+
+
+# -----------------------------------------
+#      MAIN HYBRID RESPONSE FUNCTION
+# -----------------------------------------
+def get_hybrid_response(query, image=None, context_data=None, use_cache=True,
+                        rate_key="default"):
+    """
+    Blocking wrapper around generate_content_async(), run on the shared
+    background event loop.
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        generate_content_async(query, image, context_data, use_cache, rate_key),
+        _background_loop(),
+    )
+    return future.result()
+
+
+# -----------------------------------------
+#      STREAMING HYBRID RESPONSE
+# -----------------------------------------
+def stream_hybrid_response(query, image=None, context_data=None, use_cache=True,
+                           rate_key="default"):
+    """
+    Generator version of get_hybrid_response().
+
+    Yields (section, text) pieces as Gemini streams them, where section
+    is "preamble", "clinical" or "patient". Errors are yielded as
+    preamble text. Completed responses are stored in RESPONSE_CACHE.
+    The upstream call holds an ASYNC_CLIENT slot (see upstream_slot())
+    for as long as the stream is open; streams are not coalesced.
+    """
+    if not config.GEMINI_API_KEY:
+        yield "preamble", "⚠️ API Key Missing in config.py"
+        return
+
+    full_prompt = _build_prompt(query, context_data)
+    parser = SectionParser()
+    model_name = None
+
+    for attempt in range(2):
+        received = []
+        try:
+            model_name, model = MODEL_REGISTRY.get_model(SYSTEM_PROMPT)
+            if not model:
+                yield "preamble", "⚠️ No available models for your API key."
+                return
+
+            cache_key = None
+            if use_cache:
+                cache_key = response_cache.make_key(
+                    query, context_data, image, model_name, SYSTEM_PROMPT
+                )
+                cached = RESPONSE_CACHE.get(cache_key)
+                if cached is not None:
+                    yield from parser.feed(cached)
+                    yield from parser.finish()
+                    return
+
+            contents = [full_prompt, image] if image else full_prompt
+            with upstream_slot(rate_key):
+                for chunk in model.generate_content(contents, stream=True):
+                    text = chunk.text
+                    if not text:
+                        continue
+                    received.append(text)
+                    yield from parser.feed(text)
+
+            yield from parser.finish()
+
+            if cache_key:
+                RESPONSE_CACHE.set(cache_key, _clean_markdown("".join(received)))
+            return
+
+        except Exception as e:
+            if (attempt == 0 and not received and _is_model_not_found(e)
+                    and not MODEL_REGISTRY.override):
+                MODEL_REGISTRY.invalidate()
+                continue
+            yield from parser.finish()
+            yield "preamble", f"⚠️ Error using {model_name}: {str(e)}"
+            return
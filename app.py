@@ -14,6 +14,7 @@ st.set_page_config(
     page_icon="🏥",
     layout="wide"
 )
+config.ensure_directories()
 
 # Global style override (PROFESSIONAL, HIGH VISIBILITY)
 st.markdown("""
@@ -34,6 +35,48 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# ------------------------------------------------
+#   DUAL-VIEW STREAM RENDERER
+# ------------------------------------------------
+def render_dual_view(stream):
+    """
+    Renders (section, text) pieces from ai_engine.stream_hybrid_response
+    into the clinical / patient cards as they arrive.
+    Returns the full response text for chat history.
+    """
+    notice = st.empty()
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("<div class='card clinical-card'>", unsafe_allow_html=True)
+        clinical_box = st.empty()
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with col2:
+        st.markdown("<div class='card patient-card'>", unsafe_allow_html=True)
+        patient_box = st.empty()
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    parts = {"preamble": "", "clinical": "", "patient": ""}
+    boxes = {
+        "preamble": (notice, ""),
+        "clinical": (clinical_box, ai_engine.CLINICAL_HEADING + "\n"),
+        "patient": (patient_box, ai_engine.PATIENT_HEADING + "\n"),
+    }
+
+    for section, text in stream:
+        parts[section] += text
+        box, heading = boxes[section]
+        box.markdown(heading + parts[section])
+
+    full_text = parts["preamble"]
+    if parts["clinical"]:
+        full_text += ai_engine.CLINICAL_HEADING + parts["clinical"]
+    if parts["patient"]:
+        full_text += ai_engine.PATIENT_HEADING + parts["patient"]
+    return full_text
+
+
 # ------------------------------------------------
 #   SIDEBAR
 # ------------------------------------------------
@@ -77,32 +120,10 @@ if menu == "💬 Chat & Diagnosis":
             st.markdown(user_input)
 
         with st.chat_message("assistant"):
-            with st.spinner("Analyzing clinically..."):
-                response = ai_engine.get_hybrid_response(user_input)
-
-            # SPLIT INTO TWO CARD SECTIONS
             st.markdown("<div class='section-title'>🩺 Diagnosis Result</div>", unsafe_allow_html=True)
 
-            col1, col2 = st.columns(2)
-
-            if "### 👨‍⚕️ Clinical View" in response:
-                clinical = response.split("### 👨‍⚕️ Clinical View")[1].split("### 🏡 Patient View")[0]
-                patient = response.split("### 🏡 Patient View")[1]
-
-                with col1:
-                    st.markdown("<div class='card clinical-card'>", unsafe_allow_html=True)
-                    st.markdown("### 👨‍⚕️ Clinical View")
-                    st.markdown(clinical)
-                    st.markdown("</div>", unsafe_allow_html=True)
-
-                with col2:
-                    st.markdown("<div class='card patient-card'>", unsafe_allow_html=True)
-                    st.markdown("### 🏡 Patient View")
-                    st.markdown(patient)
-                    st.markdown("</div>", unsafe_allow_html=True)
-
-            else:
-                st.write(response)
+            # Cards fill in as tokens stream from Gemini
+            response = render_dual_view(ai_engine.stream_hybrid_response(user_input))
 
         st.session_state.chat_history.append({"role": "assistant", "text": response})
 
@@ -118,30 +139,16 @@ elif menu == "💊 Drug Monograph":
 
     if st.button("Search"):
 
+        # Brands / aliases share the canonical drug's context and cache entry
+        drug = medical_data.resolve_drug(drug)
         internal_data = medical_data.get_drug_data(drug)
 
-        with st.spinner("Generating monograph..."):
-            output = ai_engine.get_hybrid_response(
+        render_dual_view(
+            ai_engine.stream_hybrid_response(
                 f"Generate dual-view monograph for {drug}",
                 context_data=internal_data
             )
-
-        col1, col2 = st.columns(2)
-
-        clinical = output.split("### 👨‍⚕️ Clinical View")[1].split("### 🏡 Patient View")[0]
-        patient = output.split("### 🏡 Patient View")[1]
-
-        with col1:
-            st.markdown("<div class='card clinical-card'>", unsafe_allow_html=True)
-            st.markdown("### 👨‍⚕️ Clinical View")
-            st.markdown(clinical)
-            st.markdown("</div>", unsafe_allow_html=True)
-
-        with col2:
-            st.markdown("<div class='card patient-card'>", unsafe_allow_html=True)
-            st.markdown("### 🏡 Patient View")
-            st.markdown(patient)
-            st.markdown("</div>", unsafe_allow_html=True)
+        )
 
 
 # ========================================================
@@ -190,25 +197,9 @@ elif menu == "📸 Image Diagnosis":
 
         if st.button("Analyze Image"):
 
-            with st.spinner("Analyzing medically..."):
-                result = ai_engine.get_hybrid_response(
+            render_dual_view(
+                ai_engine.stream_hybrid_response(
                     "Analyze this medical image and give findings.",
                     image=img
                 )
-
-            col1, col2 = st.columns(2)
-
-            clinical = result.split("### 👨‍⚕️ Clinical View")[1].split("### 🏡 Patient View")[0]
-            patient = result.split("### 🏡 Patient View")[1]
-
-            with col1:
-                st.markdown("<div class='card clinical-card'>", unsafe_allow_html=True)
-                st.markdown("### 👨‍⚕️ Clinical View")
-                st.markdown(clinical)
-                st.markdown("</div>", unsafe_allow_html=True)
-
-            with col2:
-                st.markdown("<div class='card patient-card'>", unsafe_allow_html=True)
-                st.markdown("### 🏡 Patient View")
-                st.markdown(patient)
-                st.markdown("</div>", unsafe_allow_html=True)
+            )
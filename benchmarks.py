@@ -0,0 +1,306 @@
+"""
+benchmarks.py
+-------------
+Micro-benchmarks for GEN.AI Medical Assistant engines.
+
+Each benchmark builds synthetic data, so no API key or external files
+are needed.
+
+Usage:
+    python benchmarks.py disease --diseases 10000
+    python benchmarks.py calculators --rows 1000000
+    python benchmarks.py labfeed --records 200000 --patients 500
+    python benchmarks.py imports          # exits 1 if over budget
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+
+# ---------------------------------------------------------------------
+# HELPERS
+# ---------------------------------------------------------------------
+def _latency_stats(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    pick = lambda pct: ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+    return {
+        "mean_us": round(sum(ordered) / len(ordered) * 1e6, 1),
+        "p50_us": round(pick(50) * 1e6, 1),
+        "p99_us": round(pick(99) * 1e6, 1),
+    }
+
+
+def _time_each(func: Callable, inputs: List) -> List[float]:
+    timings = []
+    for item in inputs:
+        started = time.perf_counter()
+        func(item)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _peak_memory(func: Callable):
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+# ---------------------------------------------------------------------
+# DISEASE ENGINE: match vs naive Bayes scoring
+# ---------------------------------------------------------------------
+def bench_disease(n_diseases: int = 10000, n_symptoms: int = 3000,
+                  n_queries: int = 2000, top_n: int = 5, seed: int = 0) -> Dict:
+    """
+    Compares diagnose(method="match") and diagnose(method="bayes") on a
+    synthetic knowledge base with Zipf-like symptom frequencies.
+    """
+    from disease_kb import DiseaseIndex, DiseaseRecord
+
+    rng = random.Random(seed)
+    vocab = [f"symptom {i}" for i in range(n_symptoms)]
+    weights = [1 / (i + 1) for i in range(n_symptoms)]
+
+    records = [
+        DiseaseRecord(f"disease {d}", rng.choices(vocab, weights, k=rng.randint(3, 15)))
+        for d in range(n_diseases)
+    ]
+    index, build_peak = _peak_memory(lambda: DiseaseIndex.from_records(records))
+    index.set_priors({f"disease {d}": rng.random() + 0.01 for d in range(n_diseases)})
+    indptr, indices = index.incidence()
+
+    model, bayes_peak = _peak_memory(index.bayes_model)
+
+    # Both scorers are timed on the same pre-resolved ids (lookup excluded)
+    queries = [index.lookup(rng.choices(vocab, weights, k=rng.randint(1, 6)))
+               for _ in range(n_queries)]
+
+    match_times = _time_each(lambda q: index.top_ids(q, top_n), queries)
+    bayes_times = _time_each(lambda q: model.score(q, top_n), queries)
+
+    return {
+        "diseases": n_diseases,
+        "symptoms": len(index.symptoms),
+        "links": int(len(indices)),
+        "index_bytes": int(indptr.nbytes + indices.nbytes),
+        "index_build_peak_bytes": build_peak,
+        "match": _latency_stats(match_times),
+        "bayes": {
+            **_latency_stats(bayes_times),
+            "model_bytes": model.nbytes(),
+            "model_build_peak_bytes": bayes_peak,
+        },
+    }
+
+
+# ---------------------------------------------------------------------
+# CALCULATORS: scalar loop vs vectorized
+# ---------------------------------------------------------------------
+def bench_calculators(n_rows: int = 1_000_000, seed: int = 0) -> Dict:
+    """
+    Times calculators.py in a Python loop against calculators_vec.py on
+    a synthetic cohort and counts rows where the two disagree.
+    """
+    import numpy as np
+
+    import calculators
+    import calculators_vec
+
+    rng = np.random.default_rng(seed)
+    cohort = {
+        "weight": rng.uniform(30, 150, n_rows),
+        "height": rng.uniform(120, 200, n_rows),
+        "age": rng.integers(18, 95, n_rows).astype(float),
+        "scr": rng.uniform(0.3, 6.0, n_rows),
+        "sex": rng.choice(["Female", "Male"], n_rows),
+    }
+    rows = list(zip(*(cohort[k].tolist() for k in ("weight", "height", "age", "scr", "sex"))))
+
+    cases = {
+        "bmi": (lambda w, h, a, s, g: calculators.calc_bmi(w, h)[0],
+                lambda: calculators_vec.calc_bmi(cohort["weight"], cohort["height"])[0]),
+        "egfr": (lambda w, h, a, s, g: calculators.calc_egfr(s, a, g),
+                 lambda: calculators_vec.calc_egfr(cohort["scr"], cohort["age"], cohort["sex"])[0]),
+        "crcl": (lambda w, h, a, s, g: calculators.calc_crcl(w, a, s, g),
+                 lambda: calculators_vec.calc_crcl(cohort["weight"], cohort["age"],
+                                                   cohort["scr"], cohort["sex"])[0]),
+        "bsa": (lambda w, h, a, s, g: calculators.calc_bsa(w, h),
+                lambda: calculators_vec.calc_bsa(cohort["weight"], cohort["height"])[0]),
+    }
+
+    report = {"rows": n_rows}
+    for name, (scalar, vector) in cases.items():
+        started = time.perf_counter()
+        expected = [scalar(*row) for row in rows]
+        scalar_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        got = vector()
+        vector_s = time.perf_counter() - started
+
+        report[name] = {
+            "scalar_s": round(scalar_s, 3),
+            "vector_s": round(vector_s, 4),
+            "speedup": round(scalar_s / vector_s, 1) if vector_s else None,
+            "mismatches": int(np.count_nonzero(np.abs(got - np.array(expected)) > 1e-9)),
+        }
+    return report
+
+
+# ---------------------------------------------------------------------
+# LAB FEED: streaming ingestion throughput and latency
+# ---------------------------------------------------------------------
+def bench_labfeed(n_records: int = 200_000, n_patients: int = 500,
+                  batch_size: int = 5000, fmt: str = "csv", seed: int = 0) -> Dict:
+    """
+    Feeds synthetic CSV / HL7 lines through lab_feed into a temporary
+    lab store and reports records/s and end-to-end latency.
+    """
+    import lab_feed
+    import lab_store
+
+    rng = random.Random(seed)
+    analytes = [("Hb", 13.5, 1.5, "g/dL"), ("WBC", 7.5, 2.5, "10^9/L"),
+                ("K", 4.2, 0.6, "mmol/L"), ("Na", 140, 4, "mmol/L"),
+                ("Glucose", 6.0, 2.0, "mmol/L")]
+
+    def lines():
+        for i in range(n_records):
+            patient = f"P{rng.randrange(n_patients):05d}"
+            name, mean, sd, unit = rng.choice(analytes)
+            minute = i // 10
+            stamp = f"2025{1 + minute // 44640 % 12:02d}{1 + minute // 1440 % 28:02d}" \
+                    f"{minute // 60 % 24:02d}{minute % 60:02d}00"
+            value = round(rng.gauss(mean, sd), 2)
+            if fmt == "hl7":
+                yield f"PID|1||{patient}\n"
+                yield f"OBX|1|NM|^{name}||{value}|{unit}|||||F|||{stamp}\n"
+            else:
+                yield f"{patient},{stamp[:8]}T{stamp[8:]},{name},{value},{unit}\n"
+
+    with tempfile.TemporaryDirectory() as root:
+        ingestor = lab_feed.LabFeedIngestor(lab_store.LabStore(root))
+        report = ingestor.run(lines(), fmt, batch_size)
+    report.update(format=fmt, patients=n_patients, batch_size=batch_size,
+                  tracked_series=len(ingestor.rolling))
+    return report
+
+
+# ---------------------------------------------------------------------
+# IMPORT TIME: cold start budget per module
+# ---------------------------------------------------------------------
+# Cumulative cold import time (ms) allowed per module
+IMPORT_BUDGET_MS: Dict[str, float] = {
+    "config": 15,
+    "calculators": 15,
+    "medical_data": 30,
+    "drug_interactions": 30,
+    "disease_engine": 150,
+    "calculators_vec": 150,
+    "ai_engine": 60,
+    "monograph_batch": 80,
+    "dose_rules": 40,
+}
+
+# Must not be pulled in by importing any module above
+HEAVY_MODULES = ("streamlit", "google.generativeai", "plotly", "pandas")
+
+
+def _cold_import(module: str, cwd: str) -> Dict:
+    """
+    Imports `module` in a fresh interpreter without an API key and
+    returns its cumulative import time plus any heavy modules loaded.
+    """
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    env["PYTHONPATH"] = os.path.dirname(os.path.abspath(__file__))
+    probe = (f"import json, sys, {module}; "
+             f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        return {"error": proc.stderr.strip().splitlines()[-1]}
+
+    # -X importtime lines: "import time: self [us] | cumulative | name"
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1])
+    return {"ms": cumulative / 1000, "heavy": json.loads(proc.stdout)}
+
+
+def bench_imports(budgets: Optional[Dict[str, float]] = None, repeat: int = 3) -> Dict:
+    budgets = budgets or IMPORT_BUDGET_MS
+    results, ok = {}, True
+    for module, budget in budgets.items():
+        with tempfile.TemporaryDirectory() as cwd:
+            runs = [_cold_import(module, cwd) for _ in range(repeat)]
+            created = sorted(os.listdir(cwd))
+
+        failed = next((r for r in runs if "error" in r), None)
+        if failed:
+            results[module] = {**failed, "ok": False}
+            ok = False
+            continue
+
+        best = min(r["ms"] for r in runs)
+        passed = best <= budget and not runs[0]["heavy"] and not created
+        ok &= passed
+        results[module] = {"ms": round(best, 1), "budget_ms": budget, "heavy_imports": runs[0]["heavy"],
+                           "created_files": created, "ok": passed}
+    return {"modules": results, "ok": ok}
+
+
+# ---------------------------------------------------------------------
+# COMMAND LINE
+# ---------------------------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="GEN.AI engine benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    disease = sub.add_parser("disease", help="match vs naive Bayes diagnosis scoring")
+    disease.add_argument("--diseases", type=int, default=10000)
+    disease.add_argument("--symptoms", type=int, default=3000)
+    disease.add_argument("--queries", type=int, default=2000)
+
+    calcs = sub.add_parser("calculators", help="scalar vs vectorized clinical calculators")
+    calcs.add_argument("--rows", type=int, default=1_000_000)
+
+    feed = sub.add_parser("labfeed", help="streaming lab feed ingestion")
+    feed.add_argument("--records", type=int, default=200_000)
+    feed.add_argument("--patients", type=int, default=500)
+    feed.add_argument("--batch-size", type=int, default=5000)
+    feed.add_argument("--format", choices=["csv", "hl7"], default="csv")
+
+    imports = sub.add_parser("imports", help="cold import time against IMPORT_BUDGET_MS")
+    imports.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args(argv)
+
+    if args.bench == "disease":
+        report = bench_disease(args.diseases, args.symptoms, args.queries)
+    elif args.bench == "calculators":
+        report = bench_calculators(args.rows)
+    elif args.bench == "labfeed":
+        report = bench_labfeed(args.records, args.patients, args.batch_size, args.format)
+    elif args.bench == "imports":
+        report = bench_imports(repeat=args.repeat)
+
+    print(json.dumps(report, indent=2))
+    if report.get("ok") is False:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
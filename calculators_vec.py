@@ -0,0 +1,237 @@
+"""
+calculators_vec.py
+------------------
+Vectorized (NumPy) counterparts of calculators.py for cohort data.
+
+Every function takes scalars, lists, NumPy arrays or pandas columns
+(broadcast against each other) and returns (values, valid):
+
+- values: float array, NaN where the row is invalid
+- valid:  bool array, False where the scalar function would have hit
+          an exception and returned 0 (missing / non-numeric input,
+          division by zero, negative base of a fractional power)
+
+Results match calculators.py exactly, including Python's round() on
+decimal ties and the sex test (only the label "Female" is female); sex
+branches are applied with masks instead of per-row ifs. The one
+extension is that a bool array is also accepted as the sex argument.
+"""
+
+import numpy as np
+
+
+BMI_CUTOFFS = np.array([18.5, 25.0, 30.0])
+BMI_LABELS = np.array(["Underweight 🔵", "Normal 🟢", "Overweight 🟠", "Obese 🔴", "Error"],
+                      dtype=object)
+
+
+# ---------------------------------------------------------------------
+# HELPERS
+# ---------------------------------------------------------------------
+def as_float(values) -> np.ndarray:
+    """
+    Converts input to a float array; non-numeric entries become NaN.
+    """
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        import pandas as pd
+        return pd.to_numeric(pd.Series(np.ravel(values)), errors="coerce").to_numpy(float)
+
+
+def female_mask(sex) -> np.ndarray:
+    """
+    Bool mask of female rows. Accepts booleans, or labels compared as
+    the scalar functions do: exactly "Female" is female, anything else
+    (including "F" or "female") counts as male.
+    """
+    sex = np.asarray(sex)
+    if sex.dtype == bool:
+        return sex
+    return sex.astype(str) == "Female"
+
+
+def round_like_python(values: np.ndarray, decimals: int) -> np.ndarray:
+    """
+    Element-wise round(value, decimals).
+
+    np.round scales by 10**decimals first, so values whose scaled form
+    lands on .5 can round the other way (round(2.675, 2) is 2.67,
+    np.round gives 2.68). Away from a tie both agree, so only the rare
+    near-tie rows go through Python's round().
+    """
+    rounded = np.round(values, decimals)
+    with np.errstate(invalid="ignore", over="ignore"):
+        scaled = values * 10.0 ** decimals
+        gap = np.abs(scaled - np.floor(scaled) - 0.5)
+        near_tie = gap <= 1e-9 * np.maximum(np.abs(scaled), 1.0)
+    if near_tie.any():
+        rounded[near_tie] = [round(float(v), decimals) for v in values[near_tie]]
+    return rounded
+
+
+def _finish(values: np.ndarray, valid: np.ndarray, decimals=None):
+    valid = valid & np.isfinite(values)
+    values = np.where(valid, values, np.nan)
+    if decimals is not None:
+        values = round_like_python(values, decimals)
+    return values, valid
+
+
+def _finite(*arrays) -> np.ndarray:
+    valid = np.ones(np.broadcast(*arrays).shape, dtype=bool)
+    for arr in arrays:
+        valid &= np.isfinite(arr)
+    return valid
+
+
+# ---------------------------------------------------------------------
+# BMI
+# ---------------------------------------------------------------------
+def calc_bmi(weight, height):
+    """
+    Returns (bmi, category, valid); category is "Error" where invalid.
+    """
+    weight, height = as_float(weight), as_float(height)
+    valid = _finite(weight, height) & (height > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bmi = weight / ((height / 100) ** 2)
+
+    valid &= np.isfinite(bmi)
+    # Category from the unrounded value, as in the scalar version
+    category = BMI_LABELS[np.where(valid, np.searchsorted(BMI_CUTOFFS, bmi, side="right"), 4)]
+    bmi, valid = _finish(bmi, valid, 2)
+    return bmi, category, valid
+
+
+# ---------------------------------------------------------------------
+# eGFR – CKD-EPI 2021
+# ---------------------------------------------------------------------
+def egfr_ratio(scr, female):
+    """
+    scr / k, shared by eGFR and anything else that needs it.
+    """
+    return as_float(scr) / np.where(female, 0.7, 0.9)
+
+
+def calc_egfr(scr, age, gender, ratio=None):
+    """
+    `ratio` may be passed in when scr / k is already computed.
+    """
+    scr, age = as_float(scr), as_float(age)
+    female = female_mask(gender)
+    if ratio is None:
+        ratio = egfr_ratio(scr, female)
+
+    a = np.where(female, -0.329, -0.411)
+    f = np.where(female, 1.018, 1.0)
+    valid = _finite(scr, age) & (scr > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        gfr = (142 * np.minimum(ratio, 1) ** a * np.maximum(ratio, 1) ** -1.200
+               * 0.9938 ** age * f)
+    return _finish(gfr, valid, 1)
+
+
+# ---------------------------------------------------------------------
+# Creatinine Clearance – Cockcroft-Gault
+# ---------------------------------------------------------------------
+def calc_crcl(weight, age, scr, gender):
+    weight, age, scr = as_float(weight), as_float(age), as_float(scr)
+    valid = _finite(weight, age, scr) & (scr != 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crcl = ((140 - age) * weight) / (72 * scr)
+    crcl = np.where(female_mask(gender), crcl * 0.85, crcl)
+    return _finish(crcl, valid, 1)
+
+
+# ---------------------------------------------------------------------
+# Body Surface Area – DuBois
+# ---------------------------------------------------------------------
+def calc_bsa(weight, height):
+    weight, height = as_float(weight), as_float(height)
+    # Negative bases give complex numbers in the scalar version
+    valid = _finite(weight, height) & (weight >= 0) & (height >= 0)
+
+    with np.errstate(invalid="ignore"):
+        bsa = 0.007184 * weight ** 0.425 * height ** 0.725
+    return _finish(bsa, valid, 2)
+
+
+# ---------------------------------------------------------------------
+# Dosing
+# ---------------------------------------------------------------------
+def calc_weight_dose(weight, mg_per_kg):
+    weight, mg_per_kg = as_float(weight), as_float(mg_per_kg)
+    return _finish(weight * mg_per_kg, _finite(weight, mg_per_kg), 2)
+
+
+def calc_bsa_dose(bsa, mg_per_m2):
+    bsa, mg_per_m2 = as_float(bsa), as_float(mg_per_m2)
+    return _finish(bsa * mg_per_m2, _finite(bsa, mg_per_m2), 2)
+
+
+def calc_adjusted_weight(actual, ideal):
+    actual, ideal = as_float(actual), as_float(ideal)
+    return _finish(ideal + 0.4 * (actual - ideal), _finite(actual, ideal), 2)
+
+
+def calc_iv_drip(volume_ml, time_min, drop_factor=20):
+    volume_ml, time_min, drop_factor = as_float(volume_ml), as_float(time_min), as_float(drop_factor)
+    valid = _finite(volume_ml, time_min, drop_factor) & (time_min != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = (volume_ml * drop_factor) / time_min
+    return _finish(rate, valid, 1)
+
+
+# ---------------------------------------------------------------------
+# Electrolytes
+# ---------------------------------------------------------------------
+def calc_anion_gap(na, cl, hco3):
+    na, cl, hco3 = as_float(na), as_float(cl), as_float(hco3)
+    return _finish(na - (cl + hco3), _finite(na, cl, hco3))
+
+
+def calc_corrected_calcium(total_ca, albumin):
+    total_ca, albumin = as_float(total_ca), as_float(albumin)
+    return _finish(total_ca + 0.8 * (4 - albumin), _finite(total_ca, albumin), 2)
+
+
+# ---------------------------------------------------------------------
+# Pediatric Dosing
+# ---------------------------------------------------------------------
+def calc_clarks_rule(weight_kg, adult_dose):
+    weight_kg, adult_dose = as_float(weight_kg), as_float(adult_dose)
+    return _finish((weight_kg / 70) * adult_dose, _finite(weight_kg, adult_dose), 2)
+
+
+def calc_youngs_rule(age, adult_dose):
+    age, adult_dose = as_float(age), as_float(adult_dose)
+    valid = _finite(age, adult_dose) & (age != -12)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dose = (age / (age + 12)) * adult_dose
+    return _finish(dose, valid, 2)
+
+
+def calc_frieds_rule(age_months, adult_dose):
+    age_months, adult_dose = as_float(age_months), as_float(adult_dose)
+    return _finish((age_months / 150) * adult_dose, _finite(age_months, adult_dose), 2)
+
+
+# ---------------------------------------------------------------------
+# Insulin Sensitivity Factor / A–a Gradient
+# ---------------------------------------------------------------------
+def calc_isf(tdd):
+    tdd = as_float(tdd)
+    valid = np.isfinite(tdd) & (tdd != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        isf = 1800 / tdd
+    return _finish(isf, valid, 1)
+
+
+def calc_aagradient(fiO2, paO2, paCO2):
+    fiO2, paO2, paCO2 = as_float(fiO2), as_float(paO2), as_float(paCO2)
+    aa = (fiO2 * 713) - (paCO2 / 0.8) - paO2
+    return _finish(aa, _finite(fiO2, paO2, paCO2), 1)
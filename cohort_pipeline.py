@@ -0,0 +1,332 @@
+"""
+cohort_pipeline.py
+------------------
+Runs a large patient CSV through several clinical calculators in one pass.
+
+Features:
+- Streams the input in fixed-size chunks (bounded memory)
+- Any subset of calculators: bmi, egfr, crcl, bsa, bsa_dose, anion_gap,
+  corrected_ca
+- Intermediates shared between calculators (sex mask, scr / k, BSA) are
+  computed once per chunk
+- Enriched output written incrementally as CSV or Parquet (pyarrow)
+- Optional process pool; output order matches input order
+- Invalid rows get NaN results plus a "<calc>_valid" flag column
+- Input columns pass through unchanged as text; each numeric input is
+  also written parsed as "<column>_num" (NaN if unparseable)
+
+Usage:
+    python cohort_pipeline.py patients.csv enriched.parquet --calcs bmi,egfr,bsa
+    python cohort_pipeline.py patients.csv enriched.csv --column scr=creatinine --workers 4
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import calculators_vec as cv
+from run_stats import report
+
+
+# Logical input name -> default CSV column
+DEFAULT_COLUMNS: Dict[str, str] = {
+    "weight": "weight",      # kg
+    "height": "height",      # cm
+    "age": "age",            # years
+    "sex": "sex",            # "Female" / "Male" / "F" / "M"
+    "scr": "scr",            # mg/dL
+    "na": "na",
+    "cl": "cl",
+    "hco3": "hco3",
+    "albumin": "albumin",    # g/dL
+    "ca": "ca",              # mg/dL
+    "mg_per_m2": "mg_per_m2",
+}
+
+
+# Sex labels read as female (case-insensitive, surrounding spaces
+# ignored); calculators_vec itself only accepts exactly "Female"
+FEMALE_LABELS = ("female", "f")
+
+
+def female_rows(values) -> np.ndarray:
+    """
+    Bool mask of rows whose sex label is in FEMALE_LABELS.
+    """
+    values = np.asarray(values)
+    # Normalize the few distinct labels, not every row
+    labels, codes = np.unique(values.astype(str), return_inverse=True)
+    labels = np.char.lower(np.char.strip(labels))
+    return np.isin(labels, FEMALE_LABELS)[codes.reshape(values.shape)]
+
+
+# ---------------------------------------------------------------------
+# PER-CHUNK CONTEXT (shared intermediates)
+# ---------------------------------------------------------------------
+class ChunkContext:
+    """
+    Column access for one chunk, with each intermediate computed once.
+    """
+
+    def __init__(self, frame: pd.DataFrame, columns: Dict[str, str]):
+        self.frame = frame
+        self.columns = columns
+        self._memo: Dict[str, object] = {}
+
+    def col(self, name: str) -> np.ndarray:
+        key = "col:" + name
+        if key not in self._memo:
+            self._memo[key] = cv.as_float(self.frame[self.columns[name]])
+        return self._memo[key]
+
+    def shared(self, name: str, build: Callable[[], object]):
+        if name not in self._memo:
+            self._memo[name] = build()
+        return self._memo[name]
+
+    @property
+    def female(self) -> np.ndarray:
+        return self.shared("female", lambda: female_rows(
+            self.frame[self.columns["sex"]].fillna("").to_numpy()))
+
+    @property
+    def egfr_ratio(self) -> np.ndarray:
+        return self.shared("egfr_ratio", lambda: cv.egfr_ratio(self.col("scr"), self.female))
+
+    @property
+    def bsa(self):
+        return self.shared("bsa", lambda: cv.calc_bsa(self.col("weight"), self.col("height")))
+
+
+# ---------------------------------------------------------------------
+# CALCULATOR REGISTRY
+# ---------------------------------------------------------------------
+def _bmi(ctx: ChunkContext) -> Dict[str, np.ndarray]:
+    bmi, category, valid = cv.calc_bmi(ctx.col("weight"), ctx.col("height"))
+    return {"bmi": bmi, "bmi_category": category, "bmi_valid": valid}
+
+
+def _egfr(ctx: ChunkContext) -> Dict[str, np.ndarray]:
+    egfr, valid = cv.calc_egfr(ctx.col("scr"), ctx.col("age"), ctx.female, ratio=ctx.egfr_ratio)
+    return {"egfr": egfr, "egfr_valid": valid}
+
+
+def _crcl(ctx: ChunkContext) -> Dict[str, np.ndarray]:
+    crcl, valid = cv.calc_crcl(ctx.col("weight"), ctx.col("age"), ctx.col("scr"), ctx.female)
+    return {"crcl": crcl, "crcl_valid": valid}
+
+
+def _bsa(ctx: ChunkContext) -> Dict[str, np.ndarray]:
+    bsa, valid = ctx.bsa
+    return {"bsa": bsa, "bsa_valid": valid}
+
+
+def _bsa_dose(ctx: ChunkContext) -> Dict[str, np.ndarray]:
+    bsa, bsa_valid = ctx.bsa
+    dose, valid = cv.calc_bsa_dose(bsa, ctx.col("mg_per_m2"))
+    return {"bsa_dose": dose, "bsa_dose_valid": valid & bsa_valid}
+
+
+def _anion_gap(ctx: ChunkContext) -> Dict[str, np.ndarray]:
+    gap, valid = cv.calc_anion_gap(ctx.col("na"), ctx.col("cl"), ctx.col("hco3"))
+    return {"anion_gap": gap, "anion_gap_valid": valid}
+
+
+def _corrected_ca(ctx: ChunkContext) -> Dict[str, np.ndarray]:
+    ca, valid = cv.calc_corrected_calcium(ctx.col("ca"), ctx.col("albumin"))
+    return {"corrected_ca": ca, "corrected_ca_valid": valid}
+
+
+# name: (required inputs, function)
+CALCULATORS: Dict[str, tuple] = {
+    "bmi": (["weight", "height"], _bmi),
+    "egfr": (["scr", "age", "sex"], _egfr),
+    "crcl": (["weight", "age", "scr", "sex"], _crcl),
+    "bsa": (["weight", "height"], _bsa),
+    "bsa_dose": (["weight", "height", "mg_per_m2"], _bsa_dose),
+    "anion_gap": (["na", "cl", "hco3"], _anion_gap),
+    "corrected_ca": (["ca", "albumin"], _corrected_ca),
+}
+
+
+def enrich_chunk(frame: pd.DataFrame, calcs: List[str],
+                 columns: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Returns the chunk with the selected calculator columns appended.
+    """
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    ctx = ChunkContext(frame, columns)
+    outputs: Dict[str, np.ndarray] = {}
+    for name in calcs:
+        outputs.update(CALCULATORS[name][1](ctx))
+
+    # Parsed numeric inputs go next to the raw text, which is kept so a
+    # bad value can still be traced in the output
+    inputs = sorted({i for name in calcs for i in CALCULATORS[name][0] if i != "sex"})
+    parsed = {f"{columns[i]}_num": ctx.col(i) for i in inputs}
+    return frame.assign(**parsed, **outputs)
+
+
+def _enrich_task(args) -> pd.DataFrame:
+    return enrich_chunk(*args)
+
+
+# ---------------------------------------------------------------------
+# OUTPUT
+# ---------------------------------------------------------------------
+class _ChunkWriter:
+    """
+    Appends enriched chunks to a .csv or .parquet file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._parquet = path.endswith(".parquet")
+        self._writer = None
+        self._header = True
+        if self._parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow); "
+                                   "use a .csv output instead.")
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if not self._parquet:
+            frame.to_csv(self.path, mode="w" if self._header else "a",
+                         header=self._header, index=False)
+            self._header = False
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            # A column with no values in the first chunk has no type yet;
+            # input columns are text, so fix it as string for later chunks
+            schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type)
+                                else field for field in table.schema],
+                               metadata=table.schema.metadata)
+            table = table.cast(schema)
+            self._writer = pq.ParquetWriter(self.path, schema)
+        else:
+            table = pa.Table.from_pandas(frame, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+# ---------------------------------------------------------------------
+# PIPELINE
+# ---------------------------------------------------------------------
+def _check_columns(input_path: str, calcs: List[str], columns: Dict[str, str]) -> None:
+    header = set(pd.read_csv(input_path, nrows=0).columns)
+    for name in calcs:
+        if name not in CALCULATORS:
+            raise ValueError(f"Unknown calculator '{name}'. Choose from: {', '.join(CALCULATORS)}")
+        missing = [columns[i] for i in CALCULATORS[name][0] if columns[i] not in header]
+        if missing:
+            raise ValueError(f"'{name}' needs column(s) {missing} (map with --column)")
+
+
+def run_pipeline(input_path: str, output_path: str, calcs: List[str],
+                 columns: Optional[Dict[str, str]] = None, chunk_size: int = 100_000,
+                 workers: int = 1, max_pending: Optional[int] = None,
+                 progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Streams `input_path` through the selected calculators into
+    `output_path` (.csv or .parquet).
+
+    Parameters:
+        calcs (list[str]): Calculator names (keys of CALCULATORS)
+        columns (dict): Logical input -> CSV column overrides
+        chunk_size (int): Rows per chunk
+        workers (int): Worker processes (1 = run in this process)
+        max_pending (int): Chunks in flight (default 2 per worker)
+        progress (callable): Called with a stats dict after each chunk
+
+    Returns:
+        dict: rows, invalid counts per calculator, elapsed_s, rows_per_s,
+              peak_memory_mb
+    """
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    _check_columns(input_path, calcs, columns)
+
+    # Every input column is read as text so its dtype cannot change
+    # between chunks; calculators parse the numeric ones themselves
+    chunks: Iterator[pd.DataFrame] = pd.read_csv(input_path, chunksize=chunk_size, dtype=str)
+    writer = _ChunkWriter(output_path)
+    stats: Dict = {"rows": 0, "invalid": {name: 0 for name in calcs}}
+    started = time.perf_counter()
+
+    def record(frame: pd.DataFrame) -> None:
+        writer.write(frame)
+        stats["rows"] += len(frame)
+        for name in calcs:
+            stats["invalid"][name] += int((~frame[f"{name}_valid"]).sum())
+        if progress:
+            progress(report(stats, started, "rows"))
+
+    try:
+        if workers <= 1:
+            for chunk in chunks:
+                record(enrich_chunk(chunk, calcs, columns))
+        else:
+            pending = deque()
+            limit = max_pending or workers * 2
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for chunk in chunks:
+                    if len(pending) >= limit:
+                        record(pending.popleft().result())
+                    pending.append(pool.submit(_enrich_task, (chunk, calcs, columns)))
+                while pending:
+                    record(pending.popleft().result())
+    finally:
+        writer.close()
+
+    return report(stats, started, "rows")
+
+
+# ---------------------------------------------------------------------
+# COMMAND LINE
+# ---------------------------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Cohort calculator pipeline")
+    parser.add_argument("input", help="Patient CSV")
+    parser.add_argument("output", help="Enriched .csv or .parquet")
+    parser.add_argument("--calcs", default="bmi,egfr,crcl,bsa,anion_gap,corrected_ca",
+                        help=f"Comma-separated subset of: {', '.join(CALCULATORS)}")
+    parser.add_argument("--column", action="append", default=[], metavar="INPUT=CSV_COLUMN",
+                        help="Map a calculator input to a CSV column, e.g. scr=creatinine")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    columns = dict(item.split("=", 1) for item in args.column)
+    calcs = [c.strip() for c in args.calcs.split(",") if c.strip()]
+
+    def show(stats):
+        print(f"\r{stats['rows']} rows, {stats['rows_per_s']} rows/s, "
+              f"peak {stats['peak_memory_mb']} MB", end="", file=sys.stderr)
+
+    try:
+        report = run_pipeline(args.input, args.output, calcs, columns,
+                              args.chunk_size, args.workers, progress=show)
+    except ValueError as e:
+        parser.error(str(e))
+    print(file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,11 @@ Handles:
 - Directory initialization
 - Theme settings
 
+Importing this module has no side effects: settings read from secrets
+or the environment are resolved on first use (see Settings), nothing is
+created on disk until ensure_directories() is called, and streamlit is
+never imported here, so batch tools and workers start fast.
+
 Streamlit Cloud:
     --> prefers st.secrets for keys
 Local development:
@@ -16,7 +21,9 @@ Local development:
 """
 
 import os
-import streamlit as st
+import sys
+from functools import cached_property
+from typing import Optional
 
 
 # ---------------------------------------------------------------------
@@ -29,30 +36,40 @@ THEME_COLOR: str = "#008080"
 # ---------------------------------------------------------------------
 # API KEYS (Secure Loading)
 # ---------------------------------------------------------------------
-def load_gemini_key() -> str:
+def load_gemini_key(required: bool = True) -> str:
     """
     Loads Gemini API Key from Streamlit Secrets (preferred)
     or from local environment variables.
 
+    Streamlit secrets are only consulted when streamlit is already
+    loaded (i.e. inside the app), so other processes never import it.
+
+    Parameters:
+        required: raise if no key is found (otherwise return "")
+
     Returns:
         str: Gemini API Key
 
     Raises:
-        RuntimeError: If no key is found.
+        RuntimeError: If no key is found and `required` is set.
     """
     key = None
 
     # Try Streamlit Secrets (Cloud deployment)
-    try:
-        key = st.secrets.get("GEMINI_API_KEY", None)
-    except Exception:
-        key = None
+    st = sys.modules.get("streamlit")
+    if st is not None:
+        try:
+            key = st.secrets.get("GEMINI_API_KEY", None)
+        except Exception:
+            key = None
 
     # Try Environment Variable (Local development)
     if not key:
         key = os.getenv("GEMINI_API_KEY")
 
     if not key:
+        if not required:
+            return ""
         raise RuntimeError(
             "❌ Gemini API Key missing. "
             "Add GEMINI_API_KEY in Streamlit secrets or environment variables."
@@ -61,8 +78,85 @@ def load_gemini_key() -> str:
     return key
 
 
-# Load the key once globally
-GEMINI_API_KEY = load_gemini_key()
+# ---------------------------------------------------------------------
+# LAZILY RESOLVED SETTINGS
+# ---------------------------------------------------------------------
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+class Settings:
+    """
+    Settings read from secrets / the environment on first access and
+    cached afterwards; reload() forgets the cached values.
+
+    The same names are available as module attributes
+    (config.GEMINI_API_KEY is settings.GEMINI_API_KEY).
+    """
+
+    # ----------------------------- API key ---------------------------
+    @cached_property
+    def GEMINI_API_KEY(self) -> str:
+        # "" when missing: callers check it before calling Gemini
+        return load_gemini_key(required=False)
+
+    # ----------------------- Gemini model selection ------------------
+    @cached_property
+    def GEMINI_MODEL_OVERRIDE(self) -> Optional[str]:
+        # Pin a model (e.g. "models/gemini-1.5-flash") to skip list_models() discovery
+        return os.getenv("GEMINI_MODEL_OVERRIDE") or None
+
+    @cached_property
+    def GEMINI_MODEL_TTL(self) -> int:
+        # Seconds before the auto-selected model is re-discovered (0 = never)
+        return _env_int("GEMINI_MODEL_TTL", 3600)
+
+    @cached_property
+    def GEMINI_MAX_CONCURRENCY(self) -> int:
+        # Upstream calls allowed in flight at once across all sessions
+        return _env_int("GEMINI_MAX_CONCURRENCY", 8)
+
+    @cached_property
+    def GEMINI_RATE_PER_MINUTE(self) -> int:
+        # Requests per minute per rate key (0 = unlimited)
+        return _env_int("GEMINI_RATE_PER_MINUTE", 0)
+
+    # --------------------------- response cache ----------------------
+    @cached_property
+    def RESPONSE_CACHE_TTL(self) -> int:
+        return _env_int("RESPONSE_CACHE_TTL", 24 * 3600)
+
+    @cached_property
+    def RESPONSE_CACHE_MAX_BYTES(self) -> int:
+        return _env_int("RESPONSE_CACHE_MAX_BYTES", 8 * 1024 * 1024)
+
+    @cached_property
+    def RESPONSE_CACHE_MAX_ENTRY_BYTES(self) -> int:
+        return _env_int("RESPONSE_CACHE_MAX_ENTRY_BYTES", 256 * 1024)
+
+    @cached_property
+    def RESPONSE_CACHE_MAX_DISK_BYTES(self) -> int:
+        # Total size of the disk tier (0 = unlimited)
+        return _env_int("RESPONSE_CACHE_MAX_DISK_BYTES", 64 * 1024 * 1024)
+
+    @cached_property
+    def RESPONSE_CACHE_DISK(self) -> bool:
+        # Set RESPONSE_CACHE_DISK=0 to keep the cache in memory only
+        return os.getenv("RESPONSE_CACHE_DISK", "1") != "0"
+
+    def reload(self) -> None:
+        """Drops cached values so the next access re-reads them."""
+        self.__dict__.clear()
+
+
+settings = Settings()
+
+
+def __getattr__(name: str):
+    # Module-level access to lazy settings (PEP 562)
+    if isinstance(getattr(Settings, name, None), cached_property):
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ---------------------------------------------------------------------
@@ -71,11 +165,16 @@ GEMINI_API_KEY = load_gemini_key()
 BASE_DIR = "data"
 TEMP_DIR = os.path.join(BASE_DIR, "temp")
 USER_DATA_DIR = os.path.join(BASE_DIR, "user_records")
+RESPONSE_CACHE_DIR = os.path.join(TEMP_DIR, "response_cache")
 
-# Create directories if missing
-for path in [BASE_DIR, TEMP_DIR, USER_DATA_DIR]:
-    if not os.path.exists(path):
-        os.makedirs(path)
+
+def ensure_directories() -> None:
+    """
+    Creates the storage directories if missing. Called by the app at
+    startup; modules that write files create their own folders.
+    """
+    for path in [BASE_DIR, TEMP_DIR, USER_DATA_DIR]:
+        os.makedirs(path, exist_ok=True)
 
 
 # ---------------------------------------------------------------------
@@ -8,9 +8,18 @@ Features:
 - Output: Possible diagnoses with probability scores
 - Rule-based scoring (can integrate ML/AI later)
 - Expandable database for diseases
+- Compiled inverted index (symptom -> diseases) for fast lookup
+- Loadable knowledge base (CSV / JSONL / memory-mapped snapshot)
+- Optional naive Bayes scoring (symptom specificity + disease priors)
 """
 
-from typing import List, Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+import disease_kb
+from disease_kb import DiseaseIndex, expand_postings, percent_scores
 
 
 # ---------------------------------------------------------------------
@@ -27,6 +36,60 @@ DISEASE_DB: Dict[str, List[str]] = {
     "Pneumonia": ["fever", "cough", "shortness of breath", "chest pain", "fatigue", "chills"]
 }
 
+# Relative prevalence used as priors by method="bayes" (simplified example)
+DISEASE_PREVALENCE: Dict[str, float] = {
+    "Common Cold": 0.30,
+    "Influenza": 0.10,
+    "COVID-19": 0.05,
+    "Urinary Tract Infection": 0.08,
+    "Diabetes Mellitus": 0.10,
+    "Hypertension": 0.30,
+    "Pneumonia": 0.02
+}
+
+
+# ---------------------------------------------------------------------
+# COMPILED SYMPTOM INDEX
+# ---------------------------------------------------------------------
+_INDEX: Optional[DiseaseIndex] = None
+
+
+def get_index() -> DiseaseIndex:
+    """
+    Returns the compiled index for DISEASE_DB, building it on first use.
+    """
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = DiseaseIndex.from_mapping(DISEASE_DB)
+        _INDEX.set_priors(DISEASE_PREVALENCE)
+    return _INDEX
+
+
+def rebuild_index() -> DiseaseIndex:
+    """
+    Recompiles the index after DISEASE_DB was edited directly.
+    """
+    global _INDEX
+    _INDEX = None
+    return get_index()
+
+
+def load_knowledge_base(path: str, mmap: bool = True) -> DiseaseIndex:
+    """
+    Replaces the built-in DISEASE_DB with an external knowledge base.
+
+    Parameters:
+        path (str): Snapshot directory (see disease_kb.py) or a
+                    CSV / JSONL source file
+        mmap (bool): Memory-map snapshot arrays instead of reading them
+
+    Returns:
+        DiseaseIndex: The newly active index
+    """
+    global _INDEX
+    _INDEX = disease_kb.load(path, mmap=mmap)
+    return _INDEX
+
 
 # ---------------------------------------------------------------------
 # SCORING FUNCTION
@@ -34,25 +97,35 @@ DISEASE_DB: Dict[str, List[str]] = {
 def calculate_probability(symptoms: List[str], disease_symptoms: List[str]) -> float:
     """
     Returns probability score (0-100%) based on symptom match.
+
+    Symptoms are normalized and resolved (synonyms, typos) exactly as
+    diagnose() does, so both agree for the same disease.
     """
-    if not disease_symptoms:
+    index = get_index()
+    known = set(index.normalizer.normalize_all(disease_symptoms or []))
+    if not known:
         return 0.0
 
-    matches = sum(1 for s in symptoms if s.lower().strip() in [d.lower() for d in disease_symptoms])
-    probability = (matches / len(disease_symptoms)) * 100
+    present = set(index.normalizer.normalize_all(symptoms or []))
+    present.update(index.symptoms[sid] for sid in index.lookup(symptoms or []))
+    probability = (len(present & known) / len(known)) * 100
     return round(probability, 1)
 
 
 # ---------------------------------------------------------------------
 # DIAGNOSIS FUNCTION
 # ---------------------------------------------------------------------
-def diagnose(symptoms: List[str], top_n: int = 3) -> List[Tuple[str, float]]:
+def diagnose(symptoms: List[str], top_n: int = 3,
+             method: str = "match") -> List[Tuple[str, float]]:
     """
     Returns a list of possible diagnoses with probability scores.
     
     Parameters:
         symptoms (list[str]): List of input symptoms
         top_n (int): Number of top probable diseases to return
+        method (str): "match" = % of the disease's symptoms present
+                      "bayes" = naive Bayes posterior % using symptom
+                                specificity and disease prevalence
     
     Returns:
         list of tuples: [(disease_name, probability%), ...]
@@ -60,17 +133,102 @@ def diagnose(symptoms: List[str], top_n: int = 3) -> List[Tuple[str, float]]:
     if not symptoms:
         return []
 
-    disease_probs = []
-    for disease, disease_symptoms in DISEASE_DB.items():
-        prob = calculate_probability(symptoms, disease_symptoms)
-        if prob > 0:
-            disease_probs.append((disease, prob))
+    index = get_index()
+    if method == "bayes":
+        return index.bayes_model().score(index.lookup(symptoms), top_n)
+    if method != "match":
+        raise ValueError(f"Unknown scoring method: {method}")
+
+    return index.top(symptoms, top_n)
+
+
+# ---------------------------------------------------------------------
+# BATCH DIAGNOSIS
+# ---------------------------------------------------------------------
+def _score_batch(index: DiseaseIndex, batch: List[List[str]],
+                 top_n: int) -> List[List[Tuple[str, float]]]:
+    results: List[List[Tuple[str, float]]] = [[] for _ in batch]
+    if top_n <= 0:
+        return results
+
+    # Encode patients as a sparse patient x symptom matrix (COO)
+    rows: List[int] = []
+    cols: List[int] = []
+    for i, symptoms in enumerate(batch):
+        sids = index.lookup(symptoms or [])
+        rows.extend([i] * len(sids))
+        cols.extend(sids)
+    if not cols:
+        return results
+
+    indptr, indices = index.incidence()
+    n_diseases = len(index.names)
+    pat, dis = expand_postings(indptr, indices,
+                                np.asarray(rows, dtype=np.int64),
+                                np.asarray(cols, dtype=np.int64))
+    if not len(pat):
+        return results
+
+    # Match counts for every (patient, disease) pair in one pass
+    pairs, hits = np.unique(pat * n_diseases + dis, return_counts=True)
+    pat, dis = pairs // n_diseases, pairs % n_diseases
+    totals = np.asarray(index.counts, dtype=np.int64)[dis]
+
+    # Same rounding as diagnose(), so scores are bit-identical
+    probs = percent_scores(hits, totals)
+
+    # Per patient: probability desc, then insertion order
+    order = np.lexsort((dis, -probs, pat))
+    pat, dis, probs = pat[order], dis[order], probs[order]
+    first = np.searchsorted(pat, pat, side="left")
+    keep = (np.arange(len(pat)) - first) < top_n
+
+    names = index.names
+    for i, did, prob in zip(pat[keep].tolist(), dis[keep].tolist(), probs[keep].tolist()):
+        results[i].append((names[did], prob))
+    return results
+
+
+_WORKER_INDEX: Optional[DiseaseIndex] = None
+
+
+def _init_batch_worker(index: DiseaseIndex) -> None:
+    # Runs once per pool process so the index is not pickled per chunk
+    global _WORKER_INDEX
+    _WORKER_INDEX = index
+
+
+def _score_batch_in_worker(batch: List[List[str]], top_n: int) -> List[List[Tuple[str, float]]]:
+    return _score_batch(_WORKER_INDEX, batch, top_n)
+
+
+def diagnose_batch(symptom_lists: List[List[str]], top_n: int = 3,
+                   chunk_size: int = 10000, workers: int = 1) -> List[List[Tuple[str, float]]]:
+    """
+    Scores many patients at once. Results match diagnose() row by row.
+
+    Parameters:
+        symptom_lists (list[list[str]]): One symptom list per patient
+        top_n (int): Number of top probable diseases per patient
+        chunk_size (int): Patients scored per matrix operation
+        workers (int): Processes for very large batches (1 = in-process)
+
+    Returns:
+        list: One [(disease_name, probability%), ...] list per patient
+    """
+    index = get_index()
+    index.incidence()
+    chunks = [symptom_lists[i:i + chunk_size]
+              for i in range(0, len(symptom_lists), chunk_size)]
 
-    # Sort by probability descending
-    disease_probs.sort(key=lambda x: x[1], reverse=True)
+    if workers <= 1 or len(chunks) <= 1:
+        scored = [_score_batch(index, chunk, top_n) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(index,)) as pool:
+            scored = list(pool.map(_score_batch_in_worker, chunks, [top_n] * len(chunks)))
 
-    # Return top_n results
-    return disease_probs[:top_n]
+    return [row for chunk in scored for row in chunk]
 
 
 # ---------------------------------------------------------------------
@@ -81,6 +239,8 @@ def add_disease(name: str, symptoms: List[str]) -> None:
     Adds a new disease to the internal database.
     """
     DISEASE_DB[name] = symptoms
+    if _INDEX is not None:
+        _INDEX.add(name, symptoms)
 
 
 # ---------------------------------------------------------------------
@@ -88,6 +248,6 @@ def add_disease(name: str, symptoms: List[str]) -> None:
 # ---------------------------------------------------------------------
 def list_all_diseases() -> List[str]:
     """
-    Returns list of all diseases in the internal database.
+    Returns list of all diseases in the active knowledge base.
     """
-    return list(DISEASE_DB.keys())
+    return list(get_index().names)
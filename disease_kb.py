@@ -0,0 +1,668 @@
+"""
+disease_kb.py
+-------------
+Compact disease knowledge base for the GEN.AI diagnosis engine.
+
+Features:
+- Streams disease–symptom links from CSV / JSONL ontology files
+- Interned symptom ids and array-backed CSR postings (symptom -> diseases)
+- Binary snapshot (.npy arrays + UTF-8 string blobs) that is memory-mapped
+  at startup instead of parsed
+- Incremental add() on top of a loaded snapshot via a small delta overlay
+- Optional naive Bayes scoring model over the incidence matrix
+- Symptoms stored as canonical keys (see symptom_normalizer.py), with
+  typo-tolerant lookup for unknown query terms
+
+Usage:
+    python disease_kb.py ontology.csv data/disease_kb
+"""
+
+import csv
+import json
+import os
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from symptom_normalizer import DEFAULT_NORMALIZER, SymptomNormalizer, TrigramIndex
+
+
+SNAPSHOT_VERSION = 1
+
+
+# ---------------------------------------------------------------------
+# RECORDS
+# ---------------------------------------------------------------------
+class DiseaseRecord:
+    """
+    One disease and its symptoms as read from a source file.
+    """
+    __slots__ = ("name", "symptoms")
+
+    def __init__(self, name: str, symptoms: List[str]):
+        self.name = name
+        self.symptoms = symptoms
+
+
+# ---------------------------------------------------------------------
+# STRING TABLE
+# ---------------------------------------------------------------------
+class StringTable:
+    """
+    Read-mostly list of strings stored as one UTF-8 blob plus offsets.
+    Strings are decoded on access; append() keeps new strings in a list.
+    """
+    __slots__ = ("_blob", "_offsets", "_base", "_extra")
+
+    def __init__(self, blob=b"", offsets=None):
+        self._blob = blob
+        self._offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        self._base = len(self._offsets) - 1
+        self._extra: List[str] = []
+
+    @classmethod
+    def from_list(cls, strings: List[str]) -> "StringTable":
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(b"".join(encoded), offsets)
+
+    def __len__(self) -> int:
+        return self._base + len(self._extra)
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if i >= self._base:
+            return self._extra[i - self._base]
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, value: str) -> None:
+        self._extra.append(value)
+
+    def save(self, path: str, prefix: str) -> None:
+        table = StringTable.from_list(list(self))
+        with open(os.path.join(path, f"{prefix}.bin"), "wb") as fh:
+            fh.write(bytes(table._blob))
+        np.save(os.path.join(path, f"{prefix}_offsets.npy"), table._offsets)
+
+    @classmethod
+    def load(cls, path: str, prefix: str, mmap: bool = True) -> "StringTable":
+        offsets = np.load(os.path.join(path, f"{prefix}_offsets.npy"),
+                          mmap_mode="r" if mmap else None)
+        blob_path = os.path.join(path, f"{prefix}.bin")
+        if mmap and os.path.getsize(blob_path):
+            blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            with open(blob_path, "rb") as fh:
+                blob = fh.read()
+        return cls(blob, offsets)
+
+
+# ---------------------------------------------------------------------
+# COMPILED SYMPTOM INDEX
+# ---------------------------------------------------------------------
+class DiseaseIndex:
+    """
+    Inverted index over disease -> symptom links.
+
+    - symptom id -> posting list of disease ids (CSR arrays, may be mmapped)
+    - disease id -> number of unique symptoms (score denominator)
+    - add() writes to a small delta overlay that queries read alongside
+      the CSR arrays; it is folded back once it holds COMPACT_AFTER
+      pending links, or when incidence() needs the full matrix
+
+    A query only touches the postings of its own symptoms, so its cost
+    does not grow with the number of diseases.
+    """
+
+    COMPACT_AFTER = 4096
+
+    def __init__(self, names: StringTable, symptoms: StringTable,
+                 indptr: np.ndarray, indices: np.ndarray, counts: np.ndarray,
+                 normalizer: Optional[SymptomNormalizer] = None,
+                 min_similarity: float = 0.6):
+        self.normalizer = normalizer or DEFAULT_NORMALIZER
+        self.min_similarity = min_similarity
+        self._trigrams: Optional[TrigramIndex] = None
+        self.names = names
+        self.symptoms = symptoms
+        self.symptom_ids: Dict[str, int] = {s: i for i, s in enumerate(symptoms)}
+        self._indptr = indptr
+        self._indices = indices
+        self._counts = counts
+        self._disease_ids: Optional[Dict[str, int]] = None
+        self.priors: Dict[str, float] = {}
+        self._reset_delta()
+
+    def _reset_delta(self) -> None:
+        self._n_base_symptoms = len(self._indptr) - 1
+        self._n_base_diseases = len(self._counts)
+        self._delta: Dict[int, List[int]] = {}
+        self._delta_symptoms: Dict[int, List[int]] = {}
+        self._delta_links = 0
+        self._masked: Set[int] = set()
+        self._count_overrides: Dict[int, int] = {}
+        self._extra_counts: List[int] = []
+        self._counts_cache: Optional[np.ndarray] = None
+        self._bayes: Optional["BayesModel"] = None
+
+    # -------------------------------------------------------------
+    # construction
+    # -------------------------------------------------------------
+    @classmethod
+    def from_records(cls, records: Iterable[DiseaseRecord],
+                     normalizer: Optional[SymptomNormalizer] = None) -> "DiseaseIndex":
+        """
+        Compiles records into CSR form. Repeated disease names are merged
+        and symptoms are stored as canonical keys.
+        """
+        normalizer = normalizer or DEFAULT_NORMALIZER
+        names: List[str] = []
+        disease_ids: Dict[str, int] = {}
+        symptom_ids: Dict[str, int] = {}
+        # Link columns stay as packed machine ints, not Python lists
+        sym_col = array("q")
+        dis_col = array("q")
+
+        for record in records:
+            did = disease_ids.get(record.name)
+            if did is None:
+                did = disease_ids[record.name] = len(names)
+                names.append(record.name)
+            for symptom in record.symptoms:
+                symptom = normalizer.canonical(symptom)
+                if not symptom:
+                    continue
+                sid = symptom_ids.get(symptom)
+                if sid is None:
+                    sid = symptom_ids[symptom] = len(symptom_ids)
+                sym_col.append(sid)
+                dis_col.append(did)
+
+        sym = np.frombuffer(sym_col, dtype=np.int64) if sym_col else np.empty(0, np.int64)
+        dis = np.frombuffer(dis_col, dtype=np.int64) if dis_col else np.empty(0, np.int64)
+        indptr, indices, counts = _compile_csr(sym, dis, len(symptom_ids), len(names))
+        return cls(StringTable.from_list(names), StringTable.from_list(list(symptom_ids)),
+                   indptr, indices, counts, normalizer)
+
+    @classmethod
+    def from_mapping(cls, db: Dict[str, List[str]],
+                     normalizer: Optional[SymptomNormalizer] = None) -> "DiseaseIndex":
+        return cls.from_records((DiseaseRecord(name, list(symptoms))
+                                 for name, symptoms in db.items()), normalizer)
+
+    # -------------------------------------------------------------
+    # incremental updates
+    # -------------------------------------------------------------
+    def _disease_id(self, name: str) -> Optional[int]:
+        # Only built when add() is used, so loading stays cheap
+        if self._disease_ids is None:
+            self._disease_ids = {n: i for i, n in enumerate(self.names)}
+        return self._disease_ids.get(name)
+
+    def _symptom_id(self, symptom: str) -> int:
+        sid = self.symptom_ids.get(symptom)
+        if sid is None:
+            sid = len(self.symptoms)
+            self.symptom_ids[symptom] = sid
+            self.symptoms.append(symptom)
+            if self._trigrams is not None:
+                self._trigrams.add(symptom)
+        return sid
+
+    def add(self, name: str, symptoms: List[str]) -> None:
+        """
+        Adds or replaces one disease, updating only its own postings.
+        """
+        sids = [self._symptom_id(key) for key in self.normalizer.normalize_all(symptoms)]
+
+        did = self._disease_id(name)
+        if did is None:
+            did = len(self.names)
+            self._disease_ids[name] = did
+            self.names.append(name)
+            self._extra_counts.append(0)
+        else:
+            for sid in self._delta_symptoms.get(did, []):
+                self._delta[sid].remove(did)
+                self._delta_links -= 1
+            if did < self._n_base_diseases:
+                self._masked.add(did)
+
+        for sid in sids:
+            self._delta.setdefault(sid, []).append(did)
+        self._delta_symptoms[did] = sids
+        self._delta_links += len(sids)
+
+        if did < self._n_base_diseases:
+            self._count_overrides[did] = len(sids)
+        else:
+            self._extra_counts[did - self._n_base_diseases] = len(sids)
+        self._counts_cache = None
+        self._bayes = None
+
+        if self._delta_links + len(self._masked) >= self.COMPACT_AFTER:
+            self._compact()
+
+    # -------------------------------------------------------------
+    # queries
+    # -------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def count(self, did: int) -> int:
+        if did >= self._n_base_diseases:
+            return self._extra_counts[did - self._n_base_diseases]
+        if did in self._count_overrides:
+            return self._count_overrides[did]
+        return int(self._counts[did])
+
+    @property
+    def counts(self) -> np.ndarray:
+        """
+        Unique symptom count per disease id.
+        """
+        if self._counts_cache is None:
+            counts = np.concatenate([
+                np.asarray(self._counts, dtype=np.int64),
+                np.asarray(self._extra_counts, dtype=np.int64),
+            ])
+            for did, value in self._count_overrides.items():
+                counts[did] = value
+            self._counts_cache = counts
+        return self._counts_cache
+
+    def resolve(self, key: str) -> Optional[int]:
+        """
+        Returns the symptom id for a canonical key, falling back to the
+        closest vocabulary term by trigram similarity.
+        """
+        sid = self.symptom_ids.get(key)
+        if sid is not None or not self.min_similarity:
+            return sid
+
+        if self._trigrams is None:
+            self._trigrams = TrigramIndex(self.symptoms)
+        match = self._trigrams.best_match(key, self.min_similarity)
+        return self.symptom_ids[match] if match is not None else None
+
+    def lookup(self, symptoms: List[str]) -> List[int]:
+        """
+        Returns unique canonical ids of the known symptoms in a query.
+        Normalization runs once per query term.
+        """
+        found = (self.resolve(key) for key in self.normalizer.normalize_all(symptoms))
+        return list(dict.fromkeys(sid for sid in found if sid is not None))
+
+    def postings(self, sid: int) -> List[int]:
+        """
+        Returns the disease ids linked to one symptom id.
+        """
+        diseases: List[int] = []
+        if sid < self._n_base_symptoms:
+            diseases = self._indices[self._indptr[sid]:self._indptr[sid + 1]].tolist()
+            if self._masked:
+                diseases = [did for did in diseases if did not in self._masked]
+        return diseases + self._delta.get(sid, [])
+
+    def match_counts(self, symptom_ids: List[int]) -> Dict[int, int]:
+        """
+        Returns {disease id: number of matched symptoms}.
+        """
+        counts: Dict[int, int] = {}
+        for sid in symptom_ids:
+            for did in self.postings(sid):
+                counts[did] = counts.get(did, 0) + 1
+        return counts
+
+    def top(self, symptoms: List[str], top_n: int = 3) -> List[Tuple[str, float]]:
+        """
+        Returns the top_n (disease, probability%) pairs. Ties keep
+        insertion order, as the original full sort did.
+        """
+        return self.top_ids(self.lookup(symptoms), top_n)
+
+    def top_ids(self, symptom_ids: List[int], top_n: int = 3) -> List[Tuple[str, float]]:
+        """
+        top() for already resolved symptom ids, scored over the CSR
+        arrays plus the delta overlay with a partial selection.
+        """
+        if not symptom_ids or top_n <= 0:
+            return []
+        matched = self._matched_diseases(symptom_ids)
+        if not len(matched):
+            return []
+
+        dids, hits = np.unique(matched, return_counts=True)
+        probs = percent_scores(hits, self.counts[dids])
+
+        # Partial selection, keeping every tie at the cut-off
+        if len(dids) > top_n:
+            kth = probs[np.argpartition(-probs, top_n - 1)[:top_n]].min()
+            keep = probs >= kth
+            dids, probs = dids[keep], probs[keep]
+        order = np.lexsort((dids, -probs))[:top_n]
+        return [(self.names[int(dids[i])], float(probs[i])) for i in order]
+
+    def _matched_diseases(self, symptom_ids: List[int]) -> np.ndarray:
+        # One disease id per matched posting; base rows skip replaced
+        # diseases and symptoms added since the last compaction have none
+        sids = np.asarray(symptom_ids, dtype=np.int64)
+        positions, _ = posting_positions(self._indptr, sids[sids < self._n_base_symptoms])
+        matched = np.asarray(self._indices[positions], dtype=np.int64)
+        if self._masked:
+            matched = matched[~np.isin(matched, np.fromiter(self._masked, dtype=np.int64))]
+
+        extra = [did for sid in symptom_ids for did in self._delta.get(sid, ())]
+        if extra:
+            matched = np.concatenate([matched, np.asarray(extra, dtype=np.int64)])
+        return matched
+
+    def incidence(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the symptom x disease incidence matrix as CSR arrays
+        (indptr, indices): diseases of symptom i are
+        indices[indptr[i]:indptr[i + 1]]. Pending add() calls are
+        folded into the arrays first.
+        """
+        if self._delta or self._masked or len(self.symptoms) > self._n_base_symptoms \
+                or len(self.names) > self._n_base_diseases:
+            self._compact()
+        return self._indptr, self._indices
+
+    def bayes_model(self) -> "BayesModel":
+        """
+        Returns the naive Bayes model for the current links and priors,
+        building it on first use after a change.
+        """
+        if self._bayes is None:
+            self._bayes = BayesModel(self, self.priors)
+        return self._bayes
+
+    def set_priors(self, priors: Dict[str, float]) -> None:
+        """
+        Sets relative disease prevalence used by the Bayes model.
+        """
+        self.priors = dict(priors)
+        self._bayes = None
+
+    def _compact(self) -> None:
+        lengths = np.diff(self._indptr)
+        sym = np.repeat(np.arange(self._n_base_symptoms, dtype=np.int64), lengths)
+        dis = np.asarray(self._indices, dtype=np.int64)
+        if self._masked:
+            keep = ~np.isin(dis, np.fromiter(self._masked, dtype=np.int64))
+            sym, dis = sym[keep], dis[keep]
+
+        extra_sym = [sid for sid, dids in self._delta.items() for _ in dids]
+        extra_dis = [did for dids in self._delta.values() for did in dids]
+        sym = np.concatenate([sym, np.asarray(extra_sym, dtype=np.int64)])
+        dis = np.concatenate([dis, np.asarray(extra_dis, dtype=np.int64)])
+
+        counts = self.counts
+        self._indptr, self._indices, _ = _compile_csr(sym, dis, len(self.symptoms), len(self.names))
+        self._counts = counts
+        self._reset_delta()
+
+    # -------------------------------------------------------------
+    # snapshot
+    # -------------------------------------------------------------
+    def save(self, path: str) -> None:
+        """
+        Writes a binary snapshot directory loadable with load().
+        """
+        indptr, indices = self.incidence()
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "indptr.npy"), np.asarray(indptr))
+        np.save(os.path.join(path, "indices.npy"), np.asarray(indices))
+        np.save(os.path.join(path, "counts.npy"), np.asarray(self.counts, dtype=np.int32))
+        self.names.save(path, "names")
+        self.symptoms.save(path, "symptoms")
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as fh:
+            json.dump({
+                "version": SNAPSHOT_VERSION,
+                "diseases": len(self.names),
+                "symptoms": len(self.symptoms),
+                "links": int(len(indices)),
+            }, fh)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True,
+             normalizer: Optional[SymptomNormalizer] = None) -> "DiseaseIndex":
+        """
+        Opens a snapshot. With mmap=True the arrays are memory-mapped,
+        so only the symptom vocabulary is decoded at startup.
+        """
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if meta.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported disease snapshot version: {meta.get('version')}")
+
+        mode = "r" if mmap else None
+        return cls(
+            StringTable.load(path, "names", mmap),
+            StringTable.load(path, "symptoms", mmap),
+            np.load(os.path.join(path, "indptr.npy"), mmap_mode=mode),
+            np.load(os.path.join(path, "indices.npy"), mmap_mode=mode),
+            np.load(os.path.join(path, "counts.npy"), mmap_mode=mode),
+            normalizer,
+        )
+
+
+# ---------------------------------------------------------------------
+# CSR HELPERS
+# ---------------------------------------------------------------------
+def posting_positions(indptr: np.ndarray, sids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (positions, lengths): the flattened CSR positions of every
+    posting of the given symptom ids, without a Python loop.
+    """
+    starts = indptr[sids]
+    lengths = indptr[sids + 1] - starts
+    total = int(lengths.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets, lengths
+
+
+def percent_scores(hits: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """
+    round(hits / totals * 100, 1) element-wise. Python round() runs once
+    per distinct (hits, total) pair, so scores are bit-identical to the
+    scalar formula.
+    """
+    scale = int(totals.max()) + 1 if len(totals) else 1
+    keys, inverse = np.unique(hits.astype(np.int64) * scale + totals, return_inverse=True)
+    rounded = np.array([round(int(k // scale) / int(k % scale) * 100, 1) for k in keys])
+    return rounded[inverse.reshape(-1)]
+
+
+def expand_postings(indptr: np.ndarray, indices: np.ndarray,
+                    rows: np.ndarray, sids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sparse (patient x symptom) @ (symptom x disease) for 0/1 matrices:
+    returns the (patient, disease) pair of every matched posting.
+    """
+    positions, lengths = posting_positions(indptr, sids)
+    return np.repeat(rows, lengths), indices[positions].astype(np.int64)
+
+
+# ---------------------------------------------------------------------
+# NAIVE BAYES SCORING
+# ---------------------------------------------------------------------
+class BayesModel:
+    """
+    Log-likelihood naive Bayes over the symptom x disease incidence.
+
+    P(s | d) = theta when s is linked to d, otherwise a background rate
+    proportional to how many diseases list s. Only the symptoms that are
+    present are scored. The per-link log-likelihood ratio is therefore
+    highest for specific symptoms ("loss of smell") and lowest for common
+    ones ("fatigue"). It is stored in a dense array aligned with the CSR
+    indices, so scoring a query is a sparse row-sum plus log priors.
+
+    Parameters:
+        index (DiseaseIndex): Compiled index
+        priors (dict): Relative prevalence by disease name; diseases
+                       without a value get the mean of the given ones
+        theta (float): P(symptom | disease) for linked symptoms
+        leak (float): Background rate scale for unlinked symptoms
+        symptom_weights (dict): Optional multiplier per symptom
+    """
+    __slots__ = ("indptr", "indices", "link_llr", "log_prior", "names")
+
+    def __init__(self, index: "DiseaseIndex", priors: Optional[Dict[str, float]] = None,
+                 theta: float = 0.9, leak: float = 0.05,
+                 symptom_weights: Optional[Dict[str, float]] = None):
+        self.indptr, self.indices = index.incidence()
+        self.names = index.names
+        n_diseases = len(index)
+        df = np.diff(self.indptr).astype(np.float64)
+
+        background = np.clip(leak * df / max(n_diseases, 1), 1e-6, None)
+        llr = np.log(theta) - np.log(background)
+        for symptom, weight in (symptom_weights or {}).items():
+            sid = index.symptom_ids.get(index.normalizer.canonical(symptom))
+            if sid is not None:
+                llr[sid] *= weight
+        self.link_llr = np.repeat(llr, np.diff(self.indptr)).astype(np.float32)
+
+        prior = np.full(n_diseases, np.nan)
+        for name, value in (priors or {}).items():
+            did = index._disease_id(name)
+            if did is not None and value > 0:
+                prior[did] = value
+        known = prior[~np.isnan(prior)]
+        prior[np.isnan(prior)] = known.mean() if len(known) else 1.0
+        self.log_prior = np.log(prior / prior.sum())
+
+    def score(self, symptom_ids: List[int], top_n: int = 3) -> List[Tuple[str, float]]:
+        """
+        Returns the top_n (disease, posterior%) among matched diseases.
+        """
+        if not symptom_ids or top_n <= 0:
+            return []
+
+        positions, _ = posting_positions(self.indptr, np.asarray(symptom_ids, dtype=np.int64))
+        if not len(positions):
+            return []
+        dis = self.indices[positions]
+        llr = self.link_llr[positions]
+
+        # Sparse row-sum over the query's symptom rows
+        touched, inverse = np.unique(dis, return_inverse=True)
+        log_prior = self.log_prior[touched]
+        joint = log_prior + np.bincount(inverse, weights=llr)
+
+        # Evidence over ALL diseases: untouched ones keep their prior
+        # (priors sum to 1), touched ones swap prior for joint
+        shift = max(float(joint.max()), 0.0)
+        evidence = np.exp(-shift) + np.sum(np.exp(joint - shift) - np.exp(log_prior - shift))
+        posterior = np.exp(joint - shift - np.log(evidence))
+
+        # Partial selection, keeping every tie at the cut-off
+        if len(touched) > top_n:
+            kth = np.partition(posterior, len(posterior) - top_n)[len(posterior) - top_n]
+            keep = posterior >= kth
+            touched, posterior = touched[keep], posterior[keep]
+        order = np.lexsort((touched, -posterior))[:top_n]
+        return [(self.names[int(touched[i])], round(float(posterior[i]) * 100, 1))
+                for i in order]
+
+    def nbytes(self) -> int:
+        return int(self.link_llr.nbytes + self.log_prior.nbytes)
+
+
+def _compile_csr(sym: np.ndarray, dis: np.ndarray, n_symptoms: int,
+                 n_diseases: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Builds symptom -> disease CSR arrays plus per-disease counts from
+    (symptom, disease) link columns, dropping duplicate links.
+    """
+    if len(sym):
+        keys = np.unique(sym * max(n_diseases, 1) + dis)
+        sym, dis = keys // max(n_diseases, 1), keys % max(n_diseases, 1)
+
+    indptr = np.zeros(n_symptoms + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sym, minlength=n_symptoms), out=indptr[1:])
+    indices = dis.astype(np.int32)
+    counts = np.bincount(dis, minlength=n_diseases).astype(np.int32)
+    return indptr, indices, counts
+
+
+# ---------------------------------------------------------------------
+# SOURCE FILE LOADERS
+# ---------------------------------------------------------------------
+def _split_symptoms(value) -> List[str]:
+    if isinstance(value, list):
+        return value
+    return [s for s in str(value or "").replace("|", ";").split(";") if s.strip()]
+
+
+def iter_csv(path: str) -> Iterator[DiseaseRecord]:
+    """
+    Reads a CSV with either a "disease,symptom" link per row or a
+    "disease,symptoms" row with ";"-separated symptoms.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        for row in csv.DictReader(fh):
+            name = (row.get("disease") or row.get("name") or "").strip()
+            if not name:
+                continue
+            if "symptom" in row:
+                yield DiseaseRecord(name, [row["symptom"]])
+            else:
+                yield DiseaseRecord(name, _split_symptoms(row.get("symptoms")))
+
+
+def iter_jsonl(path: str) -> Iterator[DiseaseRecord]:
+    """
+    Reads JSONL lines shaped like {"name": ..., "symptoms": [...]} or
+    {"disease": ..., "symptom": ...}.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            name = (row.get("name") or row.get("disease") or "").strip()
+            if not name:
+                continue
+            if "symptom" in row:
+                yield DiseaseRecord(name, [row["symptom"]])
+            else:
+                yield DiseaseRecord(name, _split_symptoms(row.get("symptoms")))
+
+
+def load_source(path: str) -> DiseaseIndex:
+    """
+    Builds an index from a .csv or .jsonl file.
+    """
+    if path.endswith(".jsonl") or path.endswith(".json"):
+        return DiseaseIndex.from_records(iter_jsonl(path))
+    return DiseaseIndex.from_records(iter_csv(path))
+
+
+def load(path: str, mmap: bool = True) -> DiseaseIndex:
+    """
+    Opens a snapshot directory, or compiles a CSV / JSONL source file.
+    """
+    if os.path.isdir(path):
+        return DiseaseIndex.load(path, mmap=mmap)
+    return load_source(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python disease_kb.py <source.csv|source.jsonl> <snapshot_dir>")
+        sys.exit(1)
+
+    index = load_source(sys.argv[1])
+    index.save(sys.argv[2])
+    print(f"Saved {len(index)} diseases / {len(index.symptoms)} symptoms to {sys.argv[2]}")
@@ -0,0 +1,317 @@
+"""
+dose_rules.py
+-------------
+Renal / hepatic dose checks for GEN.AI Medical Assistant.
+
+Features:
+- Structured threshold rules per drug (eGFR, CrCl, hepatic impairment)
+- Rules compiled once per drug from an explicit table plus the free-text
+  warnings in medical_data ("Reduce dose if eGFR < 30", "Stop if eGFR < 30");
+  only single-clause sentences become rules, anything else is unresolved
+- dose_check(patient, drugs) evaluates locally with the calculators
+- Only drugs the rules cannot settle are sent to ai_engine
+"""
+
+import math
+import operator
+import re
+from typing import Callable, Dict, List, Optional
+
+import calculators
+import medical_data
+from drug_aliases import resolve_drug
+
+
+# ---------------------------------------------------------------------
+# RULE TABLE
+# ---------------------------------------------------------------------
+# Explicit rules, merged with what is parsed from the drug's warnings.
+# param: "egfr" | "crcl" (mL/min) or "hepatic" (0 none .. 3 severe)
+DOSE_RULES: Dict[str, List[Dict]] = {
+    "metformin": [
+        {"param": "egfr", "op": "<", "value": 45, "action": "reduce",
+         "text": "eGFR 30–44: review dose, max 1 g/day."},
+    ],
+}
+
+# Most severe first
+ACTIONS = ["stop", "avoid", "reduce", "monitor"]
+
+HEPATIC_LEVELS = {"none": 0, "mild": 1, "moderate": 2, "severe": 3}
+
+_OPS: Dict[str, Callable[[float, float], bool]] = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+
+# A sentence becomes a rule only if it is exactly one clause of one of
+# these shapes; negations, ranges ("eGFR 30-59", "moderate to severe")
+# and sentences with several clauses are left unparsed
+_VERB = r"(?P<verb>reduce dose|reduce|stop|avoid|contraindicated|withhold|monitor)"
+_RENAL_RULE = re.compile(
+    _VERB + r"\s+(?:if|when|with|at)\s+(?P<param>egfr|crcl|creatinine clearance)"
+    r"\s*(?P<op><=|>=|<|>)\s*(?P<value>\d+(?:\.\d+)?)"
+    r"(?:\s*ml/min(?:/1\.73\s*m2)?)?\s*\.?",
+    re.IGNORECASE)
+_HEPATIC_RULE = re.compile(
+    _VERB + r"\s+in\s+(?P<level>mild|moderate|severe)\s+hepatic impairment\s*\.?",
+    re.IGNORECASE)
+# Mentions that make a warning renal / hepatic even if no rule was parsed
+_ORGAN_TERMS = re.compile(r"egfr|crcl|renal|kidney|creatinine|hepatic|liver", re.IGNORECASE)
+
+_VERB_ACTION = {
+    "reduce dose": "reduce", "reduce": "reduce", "stop": "stop", "withhold": "stop",
+    "avoid": "avoid", "contraindicated": "avoid", "monitor": "monitor",
+}
+
+
+# ---------------------------------------------------------------------
+# COMPILED RULES
+# ---------------------------------------------------------------------
+class DoseRule:
+    """
+    One threshold, e.g. egfr < 30 -> stop.
+    """
+
+    __slots__ = ("param", "op", "value", "action", "text", "_test")
+
+    def __init__(self, param: str, op: str, value: float, action: str, text: str):
+        self.param = param
+        self.op = op
+        self.value = float(value)
+        self.action = action
+        self.text = text
+        self._test = _OPS[op]
+
+    def applies(self, measures: Dict[str, Optional[float]]) -> Optional[bool]:
+        """
+        True / False, or None when the measure is unknown.
+        """
+        measured = measures.get(self.param)
+        if measured is None:
+            return None
+        return self._test(measured, self.value)
+
+    def as_dict(self) -> Dict:
+        return {"param": self.param, "op": self.op, "value": self.value,
+                "action": self.action, "text": self.text}
+
+
+def _sentences(text: str) -> List[str]:
+    return [s.strip() for s in re.split(r"(?<=\.)\s+", text or "") if s.strip()]
+
+
+def _parse_sentence(sentence: str) -> Optional[DoseRule]:
+    match = _RENAL_RULE.fullmatch(sentence)
+    if match:
+        param = "egfr" if match["param"].lower() == "egfr" else "crcl"
+        return DoseRule(param, match["op"], match["value"],
+                        _VERB_ACTION[match["verb"].lower()], sentence)
+    match = _HEPATIC_RULE.fullmatch(sentence)
+    if match:
+        return DoseRule("hepatic", ">=", HEPATIC_LEVELS[match["level"].lower()],
+                        _VERB_ACTION[match["verb"].lower()], sentence)
+    return None
+
+
+def parse_warnings(text: str) -> List[DoseRule]:
+    """
+    Extracts renal / hepatic rules from a free-text warnings field, at
+    most one per sentence.
+    """
+    rules = (_parse_sentence(sentence) for sentence in _sentences(text))
+    return [rule for rule in rules if rule is not None]
+
+
+def unparsed_sentences(text: str) -> List[str]:
+    """
+    Renal / hepatic sentences of a warnings field that yield no rule.
+    """
+    return [sentence for sentence in _sentences(text)
+            if _ORGAN_TERMS.search(sentence) and _parse_sentence(sentence) is None]
+
+
+class DrugRules:
+    """
+    Compiled rules of one drug.
+    """
+
+    __slots__ = ("drug", "known", "rules", "unparsed")
+
+    def __init__(self, drug: str, known: bool, rules: List[DoseRule], unparsed: List[str]):
+        self.drug = drug
+        self.known = known          # drug is in the formulary
+        self.rules = rules
+        self.unparsed = unparsed    # organ-related sentences with no rule extracted
+
+
+_COMPILED: Dict[str, DrugRules] = {}
+
+
+def get_drug_rules(drug: str) -> DrugRules:
+    """
+    Returns the compiled rules of a drug, compiling them on first use.
+    """
+    name = resolve_drug(drug)
+    compiled = _COMPILED.get(name)
+    if compiled is None:
+        compiled = _COMPILED[name] = _compile(name)
+    return compiled
+
+
+def _compile(name: str) -> DrugRules:
+    data = medical_data.get_drug_data(name)
+    warnings = str((data or {}).get("warnings", ""))
+    rules = parse_warnings(warnings)
+    rules += [DoseRule(r["param"], r["op"], r["value"], r["action"], r["text"])
+              for r in DOSE_RULES.get(name, [])]
+    return DrugRules(name, data is not None or name in DOSE_RULES, rules,
+                     unparsed_sentences(warnings))
+
+
+def clear_compiled_rules() -> None:
+    """
+    Drops compiled rules (call after editing DOSE_RULES or the formulary).
+    """
+    _COMPILED.clear()
+
+
+def add_dose_rule(drug: str, param: str, op: str, value: float, action: str, text: str) -> None:
+    """
+    Adds an explicit rule for a drug.
+    """
+    name = resolve_drug(drug)
+    DOSE_RULES.setdefault(name, []).append(
+        {"param": param, "op": op, "value": value, "action": action, "text": text})
+    _COMPILED.pop(name, None)
+
+
+# ---------------------------------------------------------------------
+# PATIENT MEASURES
+# ---------------------------------------------------------------------
+def _positive(value) -> Optional[float]:
+    # Unparseable, non-finite or <= 0 values count as missing
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) and number > 0 else None
+
+
+def patient_measures(patient: Dict) -> Dict[str, Optional[float]]:
+    """
+    eGFR, CrCl and hepatic level for a patient dict.
+
+    Keys used: egfr / crcl (if already known), scr (mg/dL), age,
+    sex or gender ("Female" / "Male"), weight (kg), hepatic
+    ("none" / "mild" / "moderate" / "severe"). Numeric strings are
+    accepted; values that do not parse to a positive number are
+    treated as missing, so the rules they feed stay unresolved.
+    """
+    sex = patient.get("sex") or patient.get("gender")
+    gender = "Female" if str(sex).strip().lower() in ("female", "f") else "Male"
+    scr, age, weight = (_positive(patient.get(k)) for k in ("scr", "age", "weight"))
+    have_scr = scr is not None and age is not None and sex is not None
+
+    egfr = _positive(patient.get("egfr"))
+    if egfr is None and have_scr:
+        egfr = _positive(calculators.calc_egfr(scr, age, gender))
+
+    crcl = _positive(patient.get("crcl"))
+    if crcl is None and have_scr and weight is not None:
+        crcl = _positive(calculators.calc_crcl(weight, age, scr, gender))
+
+    hepatic = patient.get("hepatic")
+    if isinstance(hepatic, str):
+        hepatic = HEPATIC_LEVELS.get(hepatic.strip().lower())
+
+    return {"egfr": egfr, "crcl": crcl, "hepatic": hepatic}
+
+
+# ---------------------------------------------------------------------
+# DOSE CHECK
+# ---------------------------------------------------------------------
+def check_drug(drug: str, measures: Dict[str, Optional[float]]) -> Dict:
+    """
+    Evaluates one drug. status is "ok", one of ACTIONS, or "unresolved".
+
+    A drug is unresolved while any of its rules cannot be evaluated
+    (missing measure, unstructured renal / hepatic sentence) and could
+    be more severe than what already triggered; "triggered" still lists
+    the rules that fired.
+    """
+    compiled = get_drug_rules(drug)
+    result = {"drug": compiled.drug, "status": "ok", "triggered": [], "reason": ""}
+
+    if not compiled.known:
+        result.update(status="unresolved", reason="Drug not in local formulary")
+        return result
+
+    missing = []
+    pending = []  # actions of rules that could not be evaluated
+    for rule in compiled.rules:
+        hit = rule.applies(measures)
+        if hit is None:
+            missing.append(rule.param)
+            pending.append(rule.action)
+        elif hit:
+            result["triggered"].append(rule.as_dict())
+    if compiled.unparsed:
+        pending.append(ACTIONS[0])  # unknown action: assume the worst
+
+    fired = min((r["action"] for r in result["triggered"]), key=ACTIONS.index, default=None)
+    worst_pending = min(pending, key=ACTIONS.index, default=None)
+    if worst_pending is None or (fired and ACTIONS.index(fired) <= ACTIONS.index(worst_pending)):
+        result["status"] = fired or "ok"
+        return result
+
+    reasons = []
+    if compiled.unparsed:
+        reasons.append("Renal / hepatic warning is not structured: " + " ".join(compiled.unparsed))
+    if missing:
+        reasons.append(f"Missing patient data: {', '.join(sorted(set(missing)))}")
+    result.update(status="unresolved", reason="; ".join(reasons))
+    return result
+
+
+def dose_check(patient: Dict, drugs: List[str]) -> Dict:
+    """
+    Checks renal / hepatic dosing of drugs for one patient.
+
+    Parameters:
+        patient (dict): See patient_measures()
+        drugs (list[str]): Drug names, brands or aliases
+
+    Returns:
+        dict: measures, results (one dict per drug) and the names of
+              drugs that could not be settled locally
+    """
+    measures = patient_measures(patient)
+    results = [check_drug(d, measures)
+               for d in dict.fromkeys(resolve_drug(d) for d in drugs if d)]
+    return {
+        "measures": measures,
+        "results": results,
+        "unresolved": [r["drug"] for r in results if r["status"] == "unresolved"],
+    }
+
+
+def dose_check_with_ai(patient: Dict, drugs: List[str]) -> Dict:
+    """
+    dose_check(), then one ai_engine call covering only the unresolved
+    drugs (no call when everything was settled locally).
+    """
+    report = dose_check(patient, drugs)
+    report["ai_response"] = None
+    if not report["unresolved"]:
+        return report
+
+    import ai_engine
+
+    query = ("Renal / hepatic dose adjustment for: " + ", ".join(report["unresolved"])
+             + ". Patient measures: " + ", ".join(
+                 f"{k}={v}" for k, v in report["measures"].items() if v is not None))
+    context = {r["drug"]: {"reason": r["reason"],
+                           "monograph": medical_data.get_drug_data(r["drug"])}
+               for r in report["results"] if r["status"] == "unresolved"}
+    report["ai_response"] = ai_engine.get_hybrid_response(query, context_data=context)
+    return report
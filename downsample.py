@@ -0,0 +1,92 @@
+"""
+downsample.py
+-------------
+Shape-preserving downsampling of long time series for charts.
+
+Methods:
+- "minmax": keeps the min and max of every bucket (fully vectorized;
+  spikes always survive)
+- "lttb":   Largest-Triangle-Three-Buckets (one vectorized area
+  computation per bucket; best visual fidelity)
+
+Both keep the first and last point and return indices into the input,
+so any column can be sliced with the result. Input must be sorted by x.
+"""
+
+import numpy as np
+
+
+METHODS = ("lttb", "minmax")
+
+
+def _as_numeric(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def minmax_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Indices of the min and max point of n_out // 2 equal-count buckets.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 4:
+        return np.arange(n)
+
+    inner = y[1:-1]
+    size = -(-len(inner) // ((n_out - 2) // 2))  # ceil
+    rows = -(-len(inner) // size)
+    pad = rows * size - len(inner)
+
+    # One bucket per row; padding can never win argmin / argmax
+    lows = np.concatenate((inner, np.full(pad, np.inf))).reshape(rows, size)
+    highs = np.concatenate((inner, np.full(pad, -np.inf))).reshape(rows, size)
+    offsets = 1 + np.arange(rows) * size
+
+    keep = np.concatenate(([0], offsets + lows.argmin(axis=1),
+                           offsets + highs.argmax(axis=1), [n - 1]))
+    return np.unique(keep)
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets point selection.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    x = _as_numeric(x)
+    x = x - x[0]  # keeps areas well conditioned for epoch timestamps
+
+    # Bucket edges over the inner points (first / last are always kept)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point)
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample_indices(x, y, n_out: int, method: str = "lttb") -> np.ndarray:
+    """
+    Indices of at most ~n_out points that preserve the series' shape.
+    """
+    if method == "minmax":
+        return minmax_indices(x, y, n_out)
+    if method == "lttb":
+        return lttb_indices(x, y, n_out)
+    raise ValueError(f"Unknown downsampling method '{method}'. Choose from: {', '.join(METHODS)}")
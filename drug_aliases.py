@@ -0,0 +1,105 @@
+"""
+drug_aliases.py
+---------------
+Shared drug name resolution for GEN.AI Medical Assistant.
+
+Features:
+- Alias table (brand names, INN / USAN / BAN variants, common misspellings)
+- One precomputed alias -> canonical dict, so resolution is O(1)
+- LRU cache of recent resolutions
+- Unknown names pass through as their normalized key
+
+Used by medical_data, drug_interactions and the monograph pages, so
+"Panadol", "acetaminophen" and "paracetamol" all hit the same entries.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+
+# ---------------------------------------------------------------------
+# ALIAS TABLE
+# ---------------------------------------------------------------------
+# canonical name: [aliases]
+ALIASES: Dict[str, List[str]] = {
+    "paracetamol": ["acetaminophen", "apap", "panadol", "calpol", "tylenol",
+                    "paracetamole", "paracetemol", "paracetomol"],
+    "amoxicillin": ["amoxycillin", "amoxil", "amoxicilin", "amoxicillin trihydrate"],
+    "metformin": ["glucophage", "metformin hydrochloride", "metformine", "metphormin"],
+    "warfarin": ["coumadin", "marevan", "warfarin sodium"],
+    "aspirin": ["acetylsalicylic acid", "asa", "disprin"],
+    "ibuprofen": ["brufen", "nurofen", "advil", "motrin", "ibuprofin"],
+    "naproxen": ["naprosyn"],
+    "diclofenac": ["voltarol", "voltaren", "diclofenac sodium"],
+    "lisinopril": ["zestril", "prinivil"],
+    "ramipril": ["tritace", "altace"],
+    "spironolactone": ["aldactone", "spironolacton"],
+    "amiloride": ["midamor"],
+    "simvastatin": ["zocor"],
+    "clarithromycin": ["klaricid", "biaxin"],
+    "erythromycin": ["erythrocin", "erythromycine"],
+    "digoxin": ["lanoxin"],
+    "furosemide": ["frusemide", "lasix"],
+    "co-amoxiclav": ["augmentin", "amoxicillin-clavulanate", "amoxicillin clavulanate"],
+    "contrast dye": ["iodinated contrast", "contrast media", "contrast medium"],
+}
+
+
+# ---------------------------------------------------------------------
+# TEXT HELPERS
+# ---------------------------------------------------------------------
+_MARKS = re.compile(r"[®™©]")
+_SPACES = re.compile(r"\s+")
+
+
+def alias_key(name: str) -> str:
+    """
+    Lower-cases, drops trademark marks and collapses whitespace.
+    """
+    return _SPACES.sub(" ", _MARKS.sub("", name.lower())).strip()
+
+
+# ---------------------------------------------------------------------
+# ALIAS INDEX
+# ---------------------------------------------------------------------
+class AliasIndex:
+    """
+    alias key -> canonical drug name.
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, List[str]]] = None,
+                 cache_size: int = 4096):
+        self._table: Dict[str, str] = {}
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+        for canonical, names in (ALIASES if aliases is None else aliases).items():
+            self.add(canonical, names)
+
+    def add(self, canonical: str, aliases: Iterable[str]) -> None:
+        """
+        Registers aliases for a canonical name.
+        """
+        target = alias_key(canonical)
+        self._table[target] = target
+        for alias in aliases:
+            self._table[alias_key(alias)] = target
+        self.resolve.cache_clear()
+
+    def _resolve(self, name: str) -> str:
+        key = alias_key(name)
+        return self._table.get(key, key)
+
+    def aliases_of(self, canonical: str) -> List[str]:
+        target = alias_key(canonical)
+        return [alias for alias, name in self._table.items()
+                if name == target and alias != target]
+
+
+ALIAS_INDEX = AliasIndex()
+
+
+def resolve_drug(name: str) -> str:
+    """
+    Returns the canonical name for a drug name, brand or alias.
+    """
+    return ALIAS_INDEX.resolve(name) if name else ""
@@ -8,9 +8,17 @@ Features:
 - Output: Interactions with severity and clinical notes
 - Internal database for common interactions
 - Expandable for large BNF / RxNorm API integration
+- Symmetric adjacency index so checks scale with real interactions, not n²
+- Stateful MedicationProfile with incremental add / remove and change events
+- Class- and ingredient-level rules expanded into a precomputed closure
+- Brand names and aliases resolved to canonical drugs (drug_aliases)
 """
 
-from typing import List, Dict, Tuple
+import re
+from typing import Callable, List, Dict, Optional, Set, Tuple
+
+import medical_data
+from drug_aliases import resolve_drug
 
 # ---------------------------------------------------------------------
 # INTERNAL DRUG INTERACTION DATABASE
@@ -44,9 +52,242 @@ INTERACTION_DB: Dict[Tuple[str, str], Dict[str, str]] = {
 }
 
 
+# ---------------------------------------------------------------------
+# DRUG CLASSES, INGREDIENTS AND CLASS-LEVEL INTERACTIONS
+# ---------------------------------------------------------------------
+# Drug -> classes (merged with the "class" field of the active formulary)
+DRUG_CLASSES: Dict[str, List[str]] = {
+    "aspirin": ["antiplatelet"],
+    "ibuprofen": ["nsaid"],
+    "naproxen": ["nsaid"],
+    "diclofenac": ["nsaid"],
+    "lisinopril": ["ace inhibitor"],
+    "ramipril": ["ace inhibitor"],
+    "spironolactone": ["potassium-sparing diuretic"],
+    "amiloride": ["potassium-sparing diuretic"],
+    "clarithromycin": ["cyp3a4 inhibitor macrolide"],
+    "erythromycin": ["cyp3a4 inhibitor macrolide"],
+}
+
+# Combination product -> ingredients
+INGREDIENTS: Dict[str, List[str]] = {
+    "co-amoxiclav": ["amoxicillin", "clavulanic acid"],
+    "co-codamol": ["codeine", "paracetamol"],
+    "co-amilofruse": ["amiloride", "furosemide"],
+}
+
+# Either side may be a drug or "class:<name>"
+CLASS_INTERACTION_DB: Dict[Tuple[str, str], Dict[str, str]] = {
+    ("warfarin", "class:nsaid"): {
+        "severity": "Severe 🔴",
+        "note": "NSAIDs add antiplatelet effect and GI erosion to anticoagulation: major bleeding risk."
+    },
+    ("aspirin", "class:nsaid"): {
+        "severity": "Moderate ⚠️",
+        "note": "NSAIDs may reduce cardioprotective effect of aspirin and add GI bleeding risk."
+    },
+    ("class:ace inhibitor", "class:potassium-sparing diuretic"): {
+        "severity": "Severe 🔴",
+        "note": "Combined risk of hyperkalemia and hypotension."
+    },
+    ("simvastatin", "class:cyp3a4 inhibitor macrolide"): {
+        "severity": "Severe 🔴",
+        "note": "Increased risk of rhabdomyolysis due to CYP3A4 inhibition."
+    },
+}
+
+
+# ---------------------------------------------------------------------
+# ADJACENCY INDEX
+# ---------------------------------------------------------------------
+def pair_key(drug1: str, drug2: str) -> Tuple[str, str]:
+    """
+    Order-independent key for a drug pair.
+    """
+    return (drug1, drug2) if drug1 <= drug2 else (drug2, drug1)
+
+
+class InteractionIndex:
+    """
+    Symmetric adjacency view of INTERACTION_DB.
+
+    - drug -> {interacting drug: payload}
+    - payload keeps the pair as declared (drug1, drug2), severity, note
+    - one canonical key per pair, so no forward / reverse double lookup
+    """
+
+    def __init__(self, db: Optional[Dict[Tuple[str, str], Dict[str, str]]] = None):
+        self.neighbours: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self.pairs: Dict[Tuple[str, str], Dict[str, str]] = {}
+        for (drug1, drug2), entry in (db or {}).items():
+            self.add(drug1, drug2, entry["severity"], entry["note"])
+
+    def add(self, drug1: str, drug2: str, severity: str, note: str,
+            via: Optional[str] = None) -> None:
+        """
+        Adds or replaces one interaction, touching only its two drugs.
+        Derived entries (`via` = the class / ingredient rule) never
+        replace an existing pair.
+        """
+        key = pair_key(drug1, drug2)
+        if via and key in self.pairs:
+            return
+
+        payload = {"drug1": drug1, "drug2": drug2, "severity": severity, "note": note}
+        if via:
+            payload["via"] = via
+        self.pairs[key] = payload
+        self.neighbours.setdefault(drug1, {})[drug2] = payload
+        self.neighbours.setdefault(drug2, {})[drug1] = payload
+
+    def get(self, drug1: str, drug2: str) -> Optional[Dict[str, str]]:
+        return self.pairs.get(pair_key(drug1, drug2))
+
+    def find(self, drugs: List[str]) -> List[Dict[str, str]]:
+        """
+        Returns interactions among already-normalized, unique drugs,
+        ordered by the position of each pair in the list.
+        """
+        position = {drug: i for i, drug in enumerate(drugs)}
+        found = []
+
+        for i, drug in enumerate(drugs):
+            adjacent = self.neighbours.get(drug)
+            if not adjacent:
+                continue
+
+            # Walk whichever side is smaller
+            if len(adjacent) < len(position):
+                hits = (other for other in adjacent if other in position)
+            else:
+                hits = (other for other in position if other in adjacent)
+
+            for other in hits:
+                j = position[other]
+                if j > i:
+                    found.append((i, j, adjacent[other]))
+
+        found.sort(key=lambda x: (x[0], x[1]))
+        return [dict(payload) for _, _, payload in found]
+
+
+_INDEX: Optional[InteractionIndex] = None
+_EXPANSION: Optional["TermExpansion"] = None
+_INDEX_VERSION = None
+
+
+def _class_names(text: str) -> List[str]:
+    # "Antibiotic (Penicillin)" -> ["antibiotic (penicillin)", "antibiotic", "penicillin"]
+    text = text.lower().strip()
+    parts = [p.strip() for p in re.split(r"[()&,/]", text) if p.strip()]
+    return list(dict.fromkeys([text] + parts))
+
+
+class TermExpansion:
+    """
+    Precomputed closure from rule terms to concrete drug names.
+
+    - "class:<name>" -> every drug in that class
+    - a drug         -> itself plus every combination product containing it
+    """
+
+    def __init__(self, drug_classes: Dict[str, List[str]],
+                 ingredients: Dict[str, List[str]], bnf_data):
+        self.class_members: Dict[str, Set[str]] = {}
+        for drug, classes in drug_classes.items():
+            for cls in classes:
+                self.class_members.setdefault(cls.lower().strip(), set()).add(drug)
+        for drug, info in bnf_data.items():
+            for cls in _class_names(str(info.get("class", ""))):
+                self.class_members.setdefault(cls, set()).add(drug)
+
+        self.products_of: Dict[str, Set[str]] = {}
+        for product, parts in ingredients.items():
+            for part in parts:
+                self.products_of.setdefault(part.lower().strip(), set()).add(product)
+
+    def expand(self, term: str) -> Set[str]:
+        term = term.lower().strip()
+        if term.startswith("class:"):
+            base = self.class_members.get(term[len("class:"):].strip(), set())
+        else:
+            base = {term}
+
+        drugs = set(base)
+        for drug in base:
+            drugs |= self.products_of.get(drug, set())
+        return drugs
+
+
+def _formulary_version():
+    backend = medical_data.get_formulary_backend()
+    return id(backend), backend.version, len(backend)
+
+
+def _get_expansion() -> TermExpansion:
+    global _EXPANSION
+    if _EXPANSION is None:
+        # Any backend works: DictBackend, SqliteBackend, JsonlBackend
+        _EXPANSION = TermExpansion(DRUG_CLASSES, INGREDIENTS,
+                                   medical_data.get_formulary_backend())
+    return _EXPANSION
+
+
+def _add_expanded(index: InteractionIndex, term1: str, term2: str,
+                  entry: Dict[str, str]) -> None:
+    expansion = _get_expansion()
+    via = f"{term1} + {term2}"
+    for drug1 in sorted(expansion.expand(term1)):
+        for drug2 in sorted(expansion.expand(term2)):
+            if drug1 != drug2 and (drug1, drug2) != (term1, term2):
+                index.add(drug1, drug2, entry["severity"], entry["note"], via=via)
+
+
+def get_interaction_index() -> InteractionIndex:
+    """
+    Returns the compiled index, building it on first use.
+
+    Exact pairs from INTERACTION_DB are added first and always win;
+    then exact pairs are expanded to combination products, and class
+    rules from CLASS_INTERACTION_DB are expanded to member drugs.
+    """
+    global _INDEX, _INDEX_VERSION, _EXPANSION
+    if _INDEX is not None and _INDEX_VERSION != _formulary_version():
+        # Drug classes come from the formulary: recompile when it changes
+        _INDEX = _EXPANSION = None
+    if _INDEX is None:
+        _INDEX_VERSION = _formulary_version()
+        index = InteractionIndex(INTERACTION_DB)
+        for (term1, term2), entry in INTERACTION_DB.items():
+            _add_expanded(index, term1, term2, entry)
+        for (term1, term2), entry in CLASS_INTERACTION_DB.items():
+            _add_expanded(index, term1, term2, entry)
+        _INDEX = index
+    return _INDEX
+
+
+def rebuild_interaction_index() -> InteractionIndex:
+    """
+    Recompiles the index (and the class / ingredient closure) after the
+    tables above were edited directly.
+    """
+    global _INDEX, _EXPANSION
+    _INDEX = None
+    _EXPANSION = None
+    return get_interaction_index()
+
+
 # ---------------------------------------------------------------------
 # INTERACTION CHECK FUNCTION
 # ---------------------------------------------------------------------
+def normalize_drugs(drug_list: List[str]) -> List[str]:
+    """
+    Resolves drug names to canonical names and de-duplicates them,
+    keeping order.
+    """
+    return list(dict.fromkeys(resolve_drug(d) for d in drug_list if d and d.strip()))
+
+
 def check_interactions(drug_list: List[str]) -> List[Dict[str, str]]:
     """
     Checks a list of drugs for known interactions.
@@ -58,32 +299,116 @@ def check_interactions(drug_list: List[str]) -> List[Dict[str, str]]:
         list of dict: Each dict contains:
             drug1, drug2, severity, note
     """
-    interactions_found = []
-    drugs = [d.lower().strip() for d in drug_list]
+    return get_interaction_index().find(normalize_drugs(drug_list))
+
 
-    for i in range(len(drugs)):
-        for j in range(i + 1, len(drugs)):
-            pair = (drugs[i], drugs[j])
-            reverse_pair = (drugs[j], drugs[i])
+# ---------------------------------------------------------------------
+# INCREMENTAL MEDICATION PROFILE
+# ---------------------------------------------------------------------
+class MedicationProfile:
+    """
+    A patient's current drug list with its interactions kept up to date.
 
-            if pair in INTERACTION_DB:
-                entry = INTERACTION_DB[pair]
-                interactions_found.append({
-                    "drug1": drugs[i],
-                    "drug2": drugs[j],
-                    "severity": entry["severity"],
-                    "note": entry["note"]
-                })
-            elif reverse_pair in INTERACTION_DB:
-                entry = INTERACTION_DB[reverse_pair]
-                interactions_found.append({
-                    "drug1": drugs[j],
-                    "drug2": drugs[i],
-                    "severity": entry["severity"],
-                    "note": entry["note"]
-                })
+    add() / remove() only check the changed drug against the index and
+    return change events, each an interaction dict plus:
+        event: "new" or "resolved"
+        trigger: the drug that was added or stopped
 
-    return interactions_found
+    Listeners registered with subscribe() receive the same events.
+    """
+
+    def __init__(self, drugs: Optional[List[str]] = None,
+                 index: Optional[InteractionIndex] = None):
+        self._index = index
+        self._drugs: Dict[str, None] = {}
+        self._interactions: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._listeners: List[Callable[[List[Dict[str, str]]], None]] = []
+        for drug in drugs or []:
+            self.add(drug)
+
+    @property
+    def index(self) -> InteractionIndex:
+        return self._index or get_interaction_index()
+
+    @property
+    def drugs(self) -> List[str]:
+        return list(self._drugs)
+
+    @property
+    def interactions(self) -> List[Dict[str, str]]:
+        """
+        Current interactions, in the same order check_interactions() uses.
+        """
+        position = {drug: i for i, drug in enumerate(self._drugs)}
+        ordered = sorted(
+            self._interactions.values(),
+            key=lambda p: sorted((position[p["drug1"]], position[p["drug2"]]))
+        )
+        return [dict(payload) for payload in ordered]
+
+    def subscribe(self, callback: Callable[[List[Dict[str, str]]], None]) -> None:
+        """
+        Registers a callback that receives each non-empty list of events.
+        """
+        self._listeners.append(callback)
+
+    def _emit(self, events: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        if events:
+            for callback in self._listeners:
+                callback(events)
+        return events
+
+    def add(self, drug: str) -> List[Dict[str, str]]:
+        """
+        Starts a drug. Returns the interactions it introduces.
+        """
+        drug = resolve_drug(drug)
+        if not drug or drug in self._drugs:
+            return []
+
+        self._drugs[drug] = None
+        events = []
+        for other, payload in self.index.neighbours.get(drug, {}).items():
+            if other in self._drugs and other != drug:
+                self._interactions[pair_key(drug, other)] = payload
+                events.append({**payload, "event": "new", "trigger": drug})
+        return self._emit(events)
+
+    def remove(self, drug: str) -> List[Dict[str, str]]:
+        """
+        Stops a drug. Returns the interactions that are now resolved.
+        """
+        drug = resolve_drug(drug)
+        if drug not in self._drugs:
+            return []
+
+        del self._drugs[drug]
+        events = []
+        for other in self.index.neighbours.get(drug, {}):
+            payload = self._interactions.pop(pair_key(drug, other), None)
+            if payload is not None:
+                events.append({**payload, "event": "resolved", "trigger": drug})
+        return self._emit(events)
+
+    def recheck(self) -> List[Dict[str, str]]:
+        """
+        Full re-check, e.g. after add_interaction(). Returns the
+        difference from the previously known interactions as events.
+        """
+        current = {
+            pair_key(p["drug1"], p["drug2"]): p
+            for p in self.index.find(list(self._drugs))
+        }
+        events = [
+            {**payload, "event": "resolved", "trigger": ""}
+            for key, payload in self._interactions.items() if key not in current
+        ] + [
+            {**payload, "event": "new", "trigger": ""}
+            for key, payload in current.items()
+            if self._interactions.get(key) != payload
+        ]
+        self._interactions = current
+        return self._emit(events)
 
 
 # ---------------------------------------------------------------------
@@ -93,10 +418,43 @@ def add_interaction(drug1: str, drug2: str, severity: str, note: str) -> None:
     """
     Adds a new drug-drug interaction to the database.
     """
-    INTERACTION_DB[(drug1.lower().strip(), drug2.lower().strip())] = {
+    drug1, drug2 = resolve_drug(drug1), resolve_drug(drug2)
+    INTERACTION_DB[(drug1, drug2)] = {
         "severity": severity,
         "note": note
     }
+    if _INDEX is not None:
+        _INDEX.add(drug1, drug2, severity, note)
+        _add_expanded(_INDEX, drug1, drug2, INTERACTION_DB[(drug1, drug2)])
+
+
+# ---------------------------------------------------------------------
+# UTILITY FUNCTIONS FOR CLASSES AND INGREDIENTS
+# ---------------------------------------------------------------------
+def add_class_interaction(term1: str, term2: str, severity: str, note: str) -> None:
+    """
+    Adds a class- or drug-level rule, e.g. ("warfarin", "class:nsaid").
+    """
+    key = (term1.lower().strip(), term2.lower().strip())
+    CLASS_INTERACTION_DB[key] = {"severity": severity, "note": note}
+    if _INDEX is not None:
+        _add_expanded(_INDEX, key[0], key[1], CLASS_INTERACTION_DB[key])
+
+
+def add_drug_class(drug: str, drug_class: str) -> None:
+    """
+    Assigns a drug to a class. Invalidates the precomputed closure.
+    """
+    DRUG_CLASSES.setdefault(drug.lower().strip(), []).append(drug_class.lower().strip())
+    rebuild_interaction_index()
+
+
+def add_ingredients(product: str, ingredients: List[str]) -> None:
+    """
+    Registers a combination product. Invalidates the precomputed closure.
+    """
+    INGREDIENTS[product.lower().strip()] = [i.lower().strip() for i in ingredients]
+    rebuild_interaction_index()
 
 
 # ---------------------------------------------------------------------
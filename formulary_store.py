@@ -0,0 +1,299 @@
+"""
+formulary_store.py
+------------------
+Pluggable formulary backends for medical_data.
+
+Backends:
+- DictBackend:   the in-module BNF_DATA dict (default)
+- SqliteBackend: one row per drug, looked up by primary key
+- JsonlBackend:  one JSON object per line, read through mmap using a
+                 byte-offset index stored next to the file
+
+Disk backends parse only the monographs that are requested and keep a
+bounded LRU of decoded records, so start-up time and resident memory do
+not grow with formulary size.
+
+Usage:
+    python formulary_store.py formulary.json formulary.db
+    python formulary_store.py formulary.json formulary.jsonl
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+Record = Dict
+
+
+# ---------------------------------------------------------------------
+# IN-MEMORY BACKEND
+# ---------------------------------------------------------------------
+class DictBackend:
+    """
+    Wraps a {name: record} dict. Edits to the dict are seen immediately.
+
+    `version` changes on every put() / remove() and whenever a name is
+    added, removed or renamed, or a record is replaced, directly in the
+    dict, so derived indexes rebuild. Fields changed inside an existing
+    record are not detected: replace the record or use put().
+    """
+
+    def __init__(self, data: Dict[str, Record]):
+        self.data = data
+        self._writes = 0
+
+    @property
+    def version(self) -> Tuple[int, int, int]:
+        # Linear in the number of names; large formularies belong in a
+        # disk backend, whose version is constant
+        return (self._writes, hash(tuple(self.data)),
+                hash(tuple(map(id, self.data.values()))))
+
+    def get(self, name: str) -> Optional[Record]:
+        return self.data.get(name)
+
+    def items(self) -> Iterator[Tuple[str, Record]]:
+        return iter(list(self.data.items()))
+
+    def put(self, name: str, record: Record) -> None:
+        self.data[name] = record
+        self._writes += 1
+
+    def remove(self, name: str) -> None:
+        if self.data.pop(name, None) is not None:
+            self._writes += 1
+
+    def names(self) -> List[str]:
+        return list(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.data
+
+
+# ---------------------------------------------------------------------
+# DISK BACKENDS
+# ---------------------------------------------------------------------
+class _DiskBackend(ABC):
+    """
+    Read-only store with an LRU of decoded records.
+    """
+
+    # Read-only: contents never change while open
+    version = 0
+
+    def __init__(self, cache_size: int = 512):
+        self.get = lru_cache(maxsize=cache_size)(self._load)
+
+    @abstractmethod
+    def _load(self, name: str) -> Optional[Record]:
+        """Decodes one record (None if absent)."""
+
+    @abstractmethod
+    def names(self) -> List[str]:
+        """All drug names in the store."""
+
+    def items(self) -> Iterator[Tuple[str, Record]]:
+        # Full scans bypass the LRU so they do not evict hot records
+        for name in self.names():
+            record = self._load(name)
+            if record is not None:
+                yield name, record
+
+    def cache_info(self):
+        return self.get.cache_info()
+
+
+class SqliteBackend(_DiskBackend):
+    """
+    Formulary in a SQLite file: drugs(name TEXT PRIMARY KEY, record TEXT).
+    """
+
+    def __init__(self, path: str, cache_size: int = 512):
+        super().__init__(cache_size)
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True,
+                                     check_same_thread=False)
+        self._lock = threading.Lock()
+        self._count: Optional[int] = None
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _load(self, name: str) -> Optional[Record]:
+        rows = self._query("SELECT record FROM drugs WHERE name = ?", (name,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def names(self) -> List[str]:
+        return [row[0] for row in self._query("SELECT name FROM drugs ORDER BY name")]
+
+    def items(self) -> Iterator[Tuple[str, Record]]:
+        for name, record in self._query("SELECT name, record FROM drugs ORDER BY name"):
+            yield name, json.loads(record)
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = self._query("SELECT COUNT(*) FROM drugs")[0][0]
+        return self._count
+
+    def __contains__(self, name: str) -> bool:
+        return bool(self._query("SELECT 1 FROM drugs WHERE name = ?", (name,)))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class JsonlBackend(_DiskBackend):
+    """
+    Formulary as JSONL ({"name": ..., <record fields>} per line).
+
+    The byte offset of every line is kept in "<path>.idx" and rebuilt
+    when the data file changes; records are sliced out of an mmap.
+    """
+
+    def __init__(self, path: str, cache_size: int = 512):
+        super().__init__(cache_size)
+        self.path = path
+        self._fh = open(path, "rb")
+        size = os.fstat(self._fh.fileno()).st_size
+        self._map = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._offsets = self._load_offsets()
+
+    def _load_offsets(self) -> Dict[str, Tuple[int, int]]:
+        stat = os.stat(self.path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        index_path = self.path + ".idx"
+
+        try:
+            with open(index_path, "r", encoding="utf-8") as fh:
+                saved = json.load(fh)
+            if saved.get("stamp") == stamp:
+                return {name: tuple(span) for name, span in saved["offsets"].items()}
+        except (OSError, ValueError, KeyError):
+            pass
+
+        offsets = dict(self._scan())
+        try:
+            with open(index_path, "w", encoding="utf-8") as fh:
+                json.dump({"stamp": stamp, "offsets": offsets}, fh)
+        except OSError:
+            pass  # read-only location: keep the index in memory only
+        return offsets
+
+    def _scan(self) -> Iterator[Tuple[str, Tuple[int, int]]]:
+        start = 0
+        while start < len(self._map):
+            end = self._map.find(b"\n", start)
+            end = len(self._map) if end < 0 else end
+            line = self._map[start:end].strip()
+            if line:
+                yield json.loads(line)["name"].lower().strip(), (start, end)
+            start = end + 1
+
+    def _load(self, name: str) -> Optional[Record]:
+        span = self._offsets.get(name)
+        if span is None:
+            return None
+        record = json.loads(self._map[span[0]:span[1]])
+        record.pop("name", None)
+        return record
+
+    def names(self) -> List[str]:
+        return list(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._offsets
+
+    def close(self) -> None:
+        if self._map:
+            self._map.close()
+        self._fh.close()
+
+
+def open_backend(path: str, cache_size: int = 512):
+    """
+    Opens a formulary file, choosing the backend by extension
+    (.db / .sqlite / .sqlite3 -> SQLite, anything else -> JSONL).
+    """
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        return SqliteBackend(path, cache_size)
+    return JsonlBackend(path, cache_size)
+
+
+# ---------------------------------------------------------------------
+# BUILDING STORES
+# ---------------------------------------------------------------------
+def iter_source(path: str) -> Iterator[Tuple[str, Record]]:
+    """
+    Yields (name, record) from a {name: record} JSON file or a JSONL
+    file with a "name" field per line.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        if path.endswith(".jsonl"):
+            for line in fh:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.pop("name"), record
+        else:
+            yield from json.load(fh).items()
+
+
+def write_sqlite(records: Iterable[Tuple[str, Record]], path: str) -> int:
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE drugs (name TEXT PRIMARY KEY, record TEXT NOT NULL)")
+        conn.executemany(
+            "INSERT OR REPLACE INTO drugs VALUES (?, ?)",
+            ((name.lower().strip(), json.dumps(rec, ensure_ascii=False))
+             for name, rec in records),
+        )
+        conn.commit()
+        return conn.execute("SELECT COUNT(*) FROM drugs").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def write_jsonl(records: Iterable[Tuple[str, Record]], path: str) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as out:
+        for name, rec in records:
+            out.write(json.dumps({"name": name.lower().strip(), **rec},
+                                 ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+# ---------------------------------------------------------------------
+# COMMAND LINE
+# ---------------------------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build an on-disk formulary store")
+    parser.add_argument("source", help="{name: record} JSON or JSONL with a name field")
+    parser.add_argument("output", help="Target .db / .sqlite or .jsonl")
+    args = parser.parse_args(argv)
+
+    records = iter_source(args.source)
+    if args.output.endswith((".db", ".sqlite", ".sqlite3")):
+        count = write_sqlite(records, args.output)
+    else:
+        count = write_jsonl(records, args.output)
+    print(f"Wrote {count} drugs to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+interaction_screening.py
+------------------------
+Population-scale drug–drug interaction screening for GEN.AI Medical Assistant.
+
+Features:
+- Streams patient medication lists from CSV / JSONL in fixed-size chunks
+- Screens chunks in a process pool; the interaction index is inherited
+  by forked workers (or sent once per worker), never pickled per task
+- Bounded number of chunks in flight, so memory does not grow with input
+- Findings streamed to a JSONL or CSV output file
+- Progress with rows/sec and peak memory
+
+Input formats:
+    CSV:   patient_id,drugs          (drugs separated by ";")
+    CSV:   patient_id,drug           (one row per drug, rows grouped by patient)
+    JSONL: {"patient_id": "...", "drugs": ["...", "..."]}
+
+Usage:
+    python interaction_screening.py prescriptions.csv findings.jsonl --workers 4
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import drug_interactions
+from run_stats import report
+
+
+Patient = Tuple[str, List[str]]
+
+FINDING_FIELDS = ["patient_id", "drug1", "drug2", "severity", "note", "via"]
+
+
+# ---------------------------------------------------------------------
+# INPUT READERS
+# ---------------------------------------------------------------------
+def _split_drugs(value: str) -> List[str]:
+    return [d for d in (value or "").replace("|", ";").split(";") if d.strip()]
+
+
+def iter_csv(path: str) -> Iterator[Patient]:
+    """
+    Yields (patient_id, drugs) from either CSV layout.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        reader = csv.DictReader(fh)
+        if "drugs" in (reader.fieldnames or []):
+            for row in reader:
+                yield row["patient_id"], _split_drugs(row["drugs"])
+            return
+
+        # Long format: consecutive rows of one patient form one list
+        current, drugs = None, []
+        for row in reader:
+            if row["patient_id"] != current:
+                if current is not None:
+                    yield current, drugs
+                current, drugs = row["patient_id"], []
+            drugs.append(row["drug"])
+        if current is not None:
+            yield current, drugs
+
+
+def iter_jsonl(path: str) -> Iterator[Patient]:
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                row = json.loads(line)
+                yield str(row["patient_id"]), list(row.get("drugs") or [])
+
+
+def iter_patients(path: str) -> Iterator[Patient]:
+    if path.endswith(".jsonl") or path.endswith(".json"):
+        return iter_jsonl(path)
+    return iter_csv(path)
+
+
+def iter_chunks(patients: Iterator[Patient], chunk_size: int) -> Iterator[List[Patient]]:
+    chunk: List[Patient] = []
+    for patient in patients:
+        chunk.append(patient)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ---------------------------------------------------------------------
+# SCREENING (runs in worker processes)
+# ---------------------------------------------------------------------
+_WORKER_INDEX: Optional[drug_interactions.InteractionIndex] = None
+
+
+def _init_worker(index: Optional[drug_interactions.InteractionIndex]) -> None:
+    # With fork the index is already inherited and None is passed
+    global _WORKER_INDEX
+    if index is not None:
+        _WORKER_INDEX = index
+
+
+def screen_chunk(chunk: List[Patient],
+                 index: Optional[drug_interactions.InteractionIndex] = None
+                 ) -> Tuple[int, List[Dict[str, str]]]:
+    """
+    Returns (patients screened, findings) for one chunk. Without an
+    explicit index, pool workers use the one they were started with.
+    """
+    index = index or _WORKER_INDEX or drug_interactions.get_interaction_index()
+    findings = []
+    for patient_id, drugs in chunk:
+        for hit in index.find(drug_interactions.normalize_drugs(drugs)):
+            findings.append({"patient_id": patient_id, **hit})
+    return len(chunk), findings
+
+
+# ---------------------------------------------------------------------
+# OUTPUT
+# ---------------------------------------------------------------------
+class _FindingWriter:
+    def __init__(self, path: str):
+        self._fh = open(path, "w", encoding="utf-8", newline="")
+        self._csv = None
+        if path.endswith(".csv"):
+            self._csv = csv.DictWriter(self._fh, fieldnames=FINDING_FIELDS,
+                                       extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, findings: List[Dict[str, str]]) -> None:
+        if self._csv:
+            self._csv.writerows(findings)
+        else:
+            self._fh.writelines(json.dumps(f, ensure_ascii=False) + "\n" for f in findings)
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+# ---------------------------------------------------------------------
+# BATCH SCREENER
+# ---------------------------------------------------------------------
+def screen_file(input_path: str, output_path: str, workers: int = 1,
+                chunk_size: int = 5000, max_pending: Optional[int] = None,
+                progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Screens every patient in `input_path` and streams findings to
+    `output_path` (.jsonl or .csv).
+
+    Parameters:
+        workers (int): Worker processes (1 = screen in this process)
+        chunk_size (int): Patients per task
+        max_pending (int): Chunks in flight (default 2 per worker);
+                           bounds memory regardless of input size
+        progress (callable): Called with a stats dict after each chunk
+
+    Returns:
+        dict: patients, findings, elapsed_s, rows_per_s, peak_memory_mb
+    """
+    index = drug_interactions.get_interaction_index()
+    chunks = iter_chunks(iter_patients(input_path), chunk_size)
+    writer = _FindingWriter(output_path)
+    stats = {"patients": 0, "findings": 0}
+    started = time.perf_counter()
+
+    def record(result: Tuple[int, List[Dict[str, str]]]) -> None:
+        count, findings = result
+        writer.write(findings)
+        stats["patients"] += count
+        stats["findings"] += len(findings)
+        if progress:
+            progress(report(stats, started, "patients"))
+
+    try:
+        if workers <= 1:
+            for chunk in chunks:
+                record(screen_chunk(chunk, index))
+        else:
+            _screen_in_pool(chunks, index, workers, max_pending or workers * 2, record)
+    finally:
+        writer.close()
+
+    return report(stats, started, "patients")
+
+
+def _screen_in_pool(chunks: Iterator[List[Patient]],
+                    index: drug_interactions.InteractionIndex, workers: int,
+                    limit: int, record: Callable) -> None:
+    global _WORKER_INDEX
+    # fork: workers inherit the index read-only (copy-on-write). The
+    # parent's global is restored afterwards so a later run in this
+    # process never screens against this run's index.
+    forked = "fork" in multiprocessing.get_all_start_methods()
+    if forked:
+        previous, _WORKER_INDEX = _WORKER_INDEX, index
+        context, initargs = multiprocessing.get_context("fork"), (None,)
+    else:
+        context, initargs = multiprocessing.get_context(), (index,)
+
+    try:
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=initargs) as pool:
+            for chunk in chunks:
+                if len(pending) >= limit:
+                    record(pending.popleft().result())
+                pending.append(pool.submit(screen_chunk, chunk))
+            while pending:
+                record(pending.popleft().result())
+    finally:
+        if forked:
+            _WORKER_INDEX = previous
+
+
+# ---------------------------------------------------------------------
+# COMMAND LINE
+# ---------------------------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Population interaction screening")
+    parser.add_argument("input", help="Prescriptions CSV / JSONL")
+    parser.add_argument("output", help="Findings .jsonl or .csv")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    def show(stats):
+        print(f"\r{stats['patients']} patients, {stats['findings']} findings, "
+              f"{stats['rows_per_s']} rows/s, peak {stats['peak_memory_mb']} MB",
+              end="", file=sys.stderr)
+
+    report = screen_file(args.input, args.output, args.workers, args.chunk_size, progress=show)
+    print(file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
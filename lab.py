@@ -1,34 +1,89 @@
-import plotly.express as px
 import pandas as pd
 import datetime
 
-def generate_lab_trend_chart(lab_data):
+import downsample
+import lab_ranges
+import lab_store
+
+MAX_POINTS = 2000  # per analyte; ~flat payload however long the history
+
+def _downsampled_long(df, max_points, method):
+    """
+    Long (date, analyte, value) frame with each analyte reduced to at
+    most ~max_points points.
+    """
+    parts = []
+    for col in [c for c in df.columns if c != 'date']:
+        series = df[['date', col]].dropna()
+        keep = downsample.downsample_indices(series['date'].to_numpy(), series[col].to_numpy(), max_points, method)
+        parts.append(pd.DataFrame({'date': series['date'].to_numpy()[keep], 'analyte': col,
+                                   'value': series[col].to_numpy()[keep]}))
+    return pd.concat(parts, ignore_index=True)
+
+def generate_lab_trend_chart(lab_data, max_points=MAX_POINTS, method="lttb", window=None):
     """
     lab_data: list of dicts with lab results over time
     Example: [{"date": "2025-12-01", "Hb": 13.5, "WBC": 7000}, ...]
+    or a pre-parsed wide DataFrame with a datetime index (see lab_store)
+    max_points: per-analyte point budget (None = plot everything)
+    method: "lttb" or "minmax" downsampling above the budget
+    window: optional (start, end) zoom; the budget is spent on that range only
     """
-    if not lab_data: return None
-    df = pd.DataFrame(lab_data)
-    df['date'] = pd.to_datetime(df['date'])
-    fig = px.line(df, x='date', y=df.columns[1:], markers=True, title="Lab Trend Over Time")
+    if lab_data is None or len(lab_data) == 0: return None
+    import plotly.express as px  # imported on first chart, not on module import
+    if isinstance(lab_data, pd.DataFrame) and isinstance(lab_data.index, pd.DatetimeIndex):
+        # Already parsed: no DataFrame rebuild or date re-parsing
+        df = lab_data.rename_axis('date').reset_index()
+    else:
+        df = pd.DataFrame(lab_data)
+        df['date'] = pd.to_datetime(df['date'])
+    if window is not None:
+        start, end = window
+        if start is not None: df = df[df['date'] >= pd.Timestamp(start)]
+        if end is not None: df = df[df['date'] <= pd.Timestamp(end)]
+
+    if max_points and len(df) > max_points:
+        long = _downsampled_long(df.sort_values('date'), max_points, method)
+        fig = px.line(long, x='date', y='value', color='analyte', title="Lab Trend Over Time",
+                      render_mode='webgl')
+    else:
+        fig = px.line(df, x='date', y=[c for c in df.columns if c != 'date'], markers=True, title="Lab Trend Over Time")
     fig.update_layout(template="plotly_white")
     return fig
 
-def interpret_lab_values(labs):
+def generate_patient_lab_chart(patient_id, start=None, end=None, analytes=None, store=None,
+                               max_points=MAX_POINTS, method="lttb"):
+    """
+    Trend chart from the patient's lab store; only results added since
+    the last call are read and parsed. Re-query with a narrower
+    start / end to see a zoomed window at finer resolution.
+    """
+    store = store or lab_store.get_lab_store()
+    return generate_lab_trend_chart(store.wide(patient_id, start, end, analytes), max_points, method)
+
+def interpret_lab_values(labs, sex=None, age=None, units=None):
     """
     Returns a simple interpretation of lab values
     labs: dict { "Hb": 13.5, "WBC": 7000, ...}
+    sex / age pick sex- and age-specific ranges; units: {"Hb": "g/L", ...}
+    Without a unit only Hb (g/dL), WBC (per uL) and unit-agnostic analytes
+    are interpreted (see lab_ranges.ASSUMED_UNITS), never as critical
+    Ranges and messages come from lab_ranges.REFERENCE_RANGES
     """
+    if not labs: return ""
+    df = pd.DataFrame({"analyte": list(labs), "value": pd.Series(list(labs.values()), dtype=object),
+                       "unit": [(units or {}).get(k, "") for k in labs], "sex": sex, "age": age})
+    results = lab_ranges.interpret_frame(df)
     interpretations = []
-    for k, v in labs.items():
-        if k.lower() == "hb":
-            if v < 12: interpretations.append(f"{k}: Low - Possible anemia")
-            elif v > 17: interpretations.append(f"{k}: High - Polycythemia")
-            else: interpretations.append(f"{k}: Normal")
-        elif k.lower() == "wbc":
-            if v < 4000: interpretations.append(f"{k}: Low - Leukopenia")
-            elif v > 11000: interpretations.append(f"{k}: High - Possible infection")
-            else: interpretations.append(f"{k}: Normal")
-        else:
-            interpretations.append(f"{k}: {v} (No automated interpretation)")
+    for (k, v), flag, message in zip(labs.items(), results["flag"], results["message"]):
+        if flag == "unknown": interpretations.append(f"{k}: {v} (No automated interpretation)")
+        elif flag.startswith("critical"): interpretations.append(f"{k}: CRITICAL {message}")
+        else: interpretations.append(f"{k}: {message}")
     return "\n".join(interpretations)
+
+def interpret_lab_frame(df, **columns):
+    """
+    Vectorized interpretation of a long results DataFrame
+    (analyte, value[, unit, sex, age]); see lab_ranges.interpret_frame
+    """
+    return lab_ranges.interpret_frame(df, **columns)
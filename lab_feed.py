@@ -0,0 +1,405 @@
+"""
+lab_feed.py
+-----------
+Streaming lab-result ingestion for GEN.AI Medical Assistant.
+
+Pipeline (every stage is a generator, so nothing is held beyond one batch):
+    lines -> records -> batches -> interpret -> LabStore + rolling stats
+
+Features:
+- Line-delimited feeds from a file, any iterable of lines, or a socket
+- CSV:   patient_id,time,analyte,value[,unit]
+- HL7:   ORU^R01-like text (PID-3 patient, OBR-7 / OBX-14 time,
+         OBX-3 analyte, OBX-5 value, OBX-6 unit)
+- Batches by size or age (the age deadline also fires while the source
+  is idle), interpreted with lab_ranges in one pass
+- Rolling aggregates per patient + analyte (latest, delta, slope over a
+  time window) updated in O(1) per result
+- Storage writes grouped every flush_interval seconds (one segment per
+  patient per flush, not per batch)
+- Critical results reported through a callback, once per result
+- Throughput and end-to-end latency stats (latency percentiles over the
+  most recent LATENCY_SAMPLES results)
+
+Usage:
+    python lab_feed.py feed.csv --batch-size 1000
+    python lab_feed.py feed.hl7 --format hl7
+"""
+
+import argparse
+import csv
+import json
+import queue
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+import lab_ranges
+import lab_store
+
+
+Record = Dict
+
+LATENCY_SAMPLES = 100_000
+
+
+# ---------------------------------------------------------------------
+# SOURCES
+# ---------------------------------------------------------------------
+def iter_file(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as fh:
+        yield from fh
+
+
+def iter_socket(host: str, port: int, timeout: Optional[float] = None) -> Iterator[str]:
+    """
+    Yields lines from a TCP feed until the peer closes the connection.
+    """
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        yield from sock.makefile("r", encoding="utf-8")
+
+
+# ---------------------------------------------------------------------
+# PARSERS
+# ---------------------------------------------------------------------
+CSV_FIELDS = ["patient_id", "time", "analyte", "value", "unit"]
+
+
+def parse_csv(lines: Iterable[str],
+              on_reject: Optional[Callable[[str], None]] = None) -> Iterator[Record]:
+    """
+    Records from CSV lines; a header line is optional. Rows with fewer
+    than the four required fields are passed to on_reject, not yielded.
+    """
+    for row in csv.reader(line for line in lines if line.strip()):
+        if row[0] == "patient_id":
+            continue
+        if len(row) < 4:
+            if on_reject:
+                on_reject(",".join(row))
+            continue
+        record = dict(zip(CSV_FIELDS, (cell.strip() for cell in row)))
+        record.setdefault("unit", "")
+        record["received"] = time.perf_counter()
+        yield record
+
+
+def _hl7_time(value: str) -> str:
+    # YYYYMMDDHHMM[SS] -> ISO
+    value = value.split("+")[0].split("-")[0]
+    return f"{value[0:4]}-{value[4:6]}-{value[6:8]}T{value[8:10] or '00'}:{value[10:12] or '00'}:{value[12:14] or '00'}"
+
+
+def parse_hl7(lines: Iterable[str],
+              on_reject: Optional[Callable[[str], None]] = None) -> Iterator[Record]:
+    """
+    Records from ORU-like HL7 v2 segments, one segment per line.
+
+    Patient and observation time reset at each MSH, so they never carry
+    over into the next message. OBX segments with no patient or time
+    are passed to on_reject.
+    """
+    patient, observed = None, None
+    for line in lines:
+        fields = line.strip().split("|")
+        segment = fields[0]
+        if segment == "MSH":
+            patient, observed = None, None
+        elif segment == "PID" and len(fields) > 3:
+            patient = fields[3].split("^")[0]
+        elif segment == "OBR" and len(fields) > 7:
+            observed = fields[7]
+        elif segment == "OBX":
+            stamp = fields[14] if len(fields) > 14 and fields[14] else observed
+            if len(fields) <= 5 or not patient or not stamp:
+                if on_reject:
+                    on_reject(line.strip())
+                continue
+            code = fields[3].split("^")
+            yield {
+                "patient_id": patient,
+                "time": _hl7_time(stamp),
+                "analyte": code[1] if len(code) > 1 and code[1] else code[0],
+                "value": fields[5],
+                "unit": fields[6] if len(fields) > 6 else "",
+                "received": time.perf_counter(),
+            }
+
+
+PARSERS = {"csv": parse_csv, "hl7": parse_hl7}
+
+
+_END = object()
+
+
+class _SourceError:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _pump(records: Iterable[Record], out: "queue.Queue", stop: threading.Event) -> None:
+    # Reader thread: a blocked source never delays the consumer's deadline
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for record in records:
+            if not put(record):
+                return
+    except BaseException as e:  # re-raised in the consumer
+        put(_SourceError(e))
+    put(_END)
+
+
+def iter_batches(records: Iterable[Record], batch_size: int = 1000,
+                 max_wait: float = 1.0) -> Iterator[List[Record]]:
+    """
+    Groups records into batches of batch_size, or fewer once the
+    oldest pending record has waited max_wait seconds.
+
+    The source is read on a background thread, so the max_wait deadline
+    holds even while it is idle (e.g. a quiet socket).
+    """
+    pending: "queue.Queue" = queue.Queue(maxsize=max(batch_size, 1))
+    stop = threading.Event()
+    threading.Thread(target=_pump, args=(records, pending, stop),
+                     name="lab-feed-reader", daemon=True).start()
+
+    batch: List[Record] = []
+    deadline = None
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            try:
+                item = pending.get(timeout=timeout)
+            except queue.Empty:
+                yield batch  # deadline passed with the source idle
+                batch, deadline = [], None
+                continue
+
+            if item is _END:
+                break
+            if isinstance(item, _SourceError):
+                raise item.error
+            batch.append(item)
+            if deadline is None:
+                deadline = item["received"] + max_wait
+            if len(batch) >= batch_size or time.perf_counter() >= deadline:
+                yield batch
+                batch, deadline = [], None
+        if batch:
+            yield batch
+    finally:
+        stop.set()
+
+
+# ---------------------------------------------------------------------
+# ROLLING AGGREGATES
+# ---------------------------------------------------------------------
+class RollingStats:
+    """
+    Latest value, delta and least-squares slope (per day) over a time
+    window, with running sums so each update is O(1) amortized.
+    """
+
+    __slots__ = ("window", "points", "latest", "latest_time", "delta", "_origin", "_sums")
+
+    def __init__(self, window_days: float):
+        self.window = window_days
+        self.points: deque = deque()
+        self.latest: Optional[float] = None
+        self.latest_time: Optional[pd.Timestamp] = None
+        self.delta: Optional[float] = None
+        self._origin: Optional[int] = None
+        self._sums = [0.0, 0.0, 0.0, 0.0]  # t, v, t*t, t*v
+
+    def add(self, when: pd.Timestamp, value: float) -> None:
+        if self.latest_time is not None and when < self.latest_time:
+            return  # late result: kept in the store, not in the rolling view
+        self.delta = None if self.latest is None else value - self.latest
+        self.latest, self.latest_time = value, when
+
+        # Days since the first result keeps the sums well conditioned
+        if self._origin is None:
+            self._origin = when.value
+        t = (when.value - self._origin) / 86_400e9
+        self._push(t, value, 1)
+        self.points.append((t, value))
+        while self.points and self.points[0][0] < t - self.window:
+            self._push(*self.points.popleft(), -1)
+
+    def _push(self, t: float, v: float, sign: int) -> None:
+        s = self._sums
+        s[0] += sign * t
+        s[1] += sign * v
+        s[2] += sign * t * t
+        s[3] += sign * t * v
+
+    @property
+    def slope(self) -> Optional[float]:
+        n = len(self.points)
+        if n < 2:
+            return None
+        st, sv, stt, stv = self._sums
+        denom = n * stt - st * st
+        return (n * stv - st * sv) / denom if denom > 1e-12 else None
+
+    def as_dict(self) -> Dict:
+        return {"latest": self.latest, "time": self.latest_time, "delta": self.delta,
+                "slope_per_day": self.slope, "points": len(self.points)}
+
+
+# ---------------------------------------------------------------------
+# INGESTOR
+# ---------------------------------------------------------------------
+class LabFeedIngestor:
+    """
+    Interprets batches, appends them to the lab store and keeps rolling
+    aggregates per (patient, analyte).
+
+    Latency is measured from a record being read until it is
+    interpreted and reflected in the rolling aggregates / critical
+    callback; storage is written behind, every flush_interval seconds.
+
+    on_critical is called once per critical result with a dict of that
+    row (patient_id, time, analyte, value, flag, message, ...).
+    """
+
+    def __init__(self, store: Optional[lab_store.LabStore] = None, window_days: float = 7.0,
+                 on_critical: Optional[Callable[[Dict], None]] = None,
+                 flush_interval: float = 5.0):
+        self.store = store or lab_store.get_lab_store()
+        self.window_days = window_days
+        self.on_critical = on_critical
+        self.flush_interval = flush_interval
+        self._pending: List[pd.DataFrame] = []
+        self._last_flush = time.perf_counter()
+        self.rolling: Dict[Tuple[str, str], RollingStats] = {}
+        self.latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+        self.stats = {"records": 0, "batches": 0, "rejected": 0, "uninterpreted": 0, "critical": 0}
+        self._stats_lock = threading.Lock()  # parser rejects are counted on the reader thread
+
+    def _reject(self, line: str) -> None:
+        with self._stats_lock:
+            self.stats["rejected"] += 1
+
+    def process_batch(self, batch: List[Record]) -> pd.DataFrame:
+        frame = pd.DataFrame(batch)
+        frame["time"] = pd.to_datetime(frame["time"], errors="coerce", format="mixed")
+        frame = lab_ranges.interpret_frame(frame)
+
+        # Rows without a usable time are dropped; unknown analytes / units
+        # are stored as received but not interpreted or aggregated
+        known = frame["value_std"].notna()
+        ok = frame["time"].notna() & known
+        with self._stats_lock:
+            self.stats["rejected"] += int(frame["time"].isna().sum())
+        self.stats["uninterpreted"] += int((frame["time"].notna() & ~known).sum())
+        stored = frame.assign(
+            analyte=frame["analyte_key"].where(known, frame["analyte"]),
+            value=frame["value_std"].where(known, pd.to_numeric(frame["value"], errors="coerce")),
+            unit=frame["unit_std"].where(known, frame["unit"]),
+        )[frame["time"].notna()]
+
+        self._pending.append(stored[["patient_id"] + lab_store.COLUMNS])
+
+        good = frame[ok].sort_values("time", kind="stable")
+        for patient_id, analyte, when, value in zip(good["patient_id"], good["analyte_key"],
+                                                    good["time"], good["value_std"]):
+            key = (patient_id, analyte)
+            stats = self.rolling.get(key)
+            if stats is None:
+                stats = self.rolling[key] = RollingStats(self.window_days)
+            stats.add(when, value)
+
+        critical = frame[frame["critical"]]
+        if len(critical):
+            self.stats["critical"] += len(critical)
+            if self.on_critical:
+                for row in critical.to_dict("records"):
+                    self.on_critical(row)
+
+        done = time.perf_counter()
+        self.latencies.extend(done - r for r in frame["received"])
+        self.stats["records"] += len(frame)
+        self.stats["batches"] += 1
+
+        if done - self._last_flush >= self.flush_interval:
+            self.flush()
+        return frame
+
+    def flush(self) -> None:
+        """
+        Writes buffered results to the lab store.
+        """
+        if self._pending:
+            self.store.append_batch(pd.concat(self._pending, ignore_index=True))
+            self._pending = []
+        self._last_flush = time.perf_counter()
+
+    def run(self, lines: Iterable[str], fmt: str = "csv", batch_size: int = 1000,
+            max_wait: float = 1.0) -> Dict:
+        """
+        Consumes a feed to the end and returns throughput / latency stats.
+        """
+        started = time.perf_counter()
+        try:
+            records = PARSERS[fmt](lines, on_reject=self._reject)
+            for batch in iter_batches(records, batch_size, max_wait):
+                self.process_batch(batch)
+        finally:
+            self.flush()
+        return self.report(time.perf_counter() - started)
+
+    def summary(self, patient_id: str) -> Dict[str, Dict]:
+        return {analyte: stats.as_dict() for (pid, analyte), stats in self.rolling.items()
+                if pid == patient_id}
+
+    def report(self, elapsed: float) -> Dict:
+        ordered = sorted(self.latencies)
+        pick = lambda pct: ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] if ordered else 0.0
+        return {
+            **self.stats,
+            "elapsed_s": round(elapsed, 3),
+            "records_per_s": round(self.stats["records"] / elapsed, 1) if elapsed else 0.0,
+            "latency_p50_ms": round(pick(50) * 1000, 2),
+            "latency_p99_ms": round(pick(99) * 1000, 2),
+        }
+
+
+# ---------------------------------------------------------------------
+# COMMAND LINE
+# ---------------------------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ingest a lab result feed")
+    parser.add_argument("source", help="Feed file, or host:port with --socket")
+    parser.add_argument("--format", choices=list(PARSERS), default="csv")
+    parser.add_argument("--socket", action="store_true", help="Read from a TCP host:port")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--window-days", type=float, default=7.0)
+    args = parser.parse_args(argv)
+
+    if args.socket:
+        host, port = args.source.rsplit(":", 1)
+        lines = iter_socket(host, int(port))
+    else:
+        lines = iter_file(args.source)
+
+    ingestor = LabFeedIngestor(window_days=args.window_days)
+    print(json.dumps(ingestor.run(lines, args.format, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
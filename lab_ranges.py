@@ -0,0 +1,287 @@
+"""
+lab_ranges.py
+-------------
+Table-driven lab interpretation for GEN.AI Medical Assistant.
+
+Features:
+- Reference-range table (analyte, unit, sex / age band, low / high,
+  critical limits, messages) compiled once into NumPy lookup arrays
+- Analyte name aliases ("haemoglobin" -> hb) and unit normalization
+  (g/L -> g/dL, mmol/L -> mg/dL, ...)
+- interpret_frame() classifies a whole DataFrame with searchsorted and
+  masks; one result and a million-row extract share the same code path
+- Critical values flagged separately from plain low / high
+- Results without a unit are only interpreted when the unit cannot be
+  confused (or a unit is assumed by ASSUMED_UNITS), and a guessed unit
+  never raises a critical flag
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------------------------------------------------
+# REFERENCE TABLE
+# ---------------------------------------------------------------------
+# sex: "any" | "F" | "M"; age band is [age_min, age_max) in years.
+# Rows for one analyte + sex must not overlap in age.
+# Limits are in the analyte's canonical unit (ANALYTES).
+REFERENCE_RANGES: List[Dict] = [
+    {"analyte": "hb", "sex": "any", "age_min": 0, "age_max": 200, "low": 12, "high": 17,
+     "critical_low": 7, "critical_high": 20,
+     "low_msg": "Low - Possible anemia", "high_msg": "High - Polycythemia"},
+    {"analyte": "hb", "sex": "F", "age_min": 18, "age_max": 200, "low": 12, "high": 16,
+     "critical_low": 7, "critical_high": 20,
+     "low_msg": "Low - Possible anemia", "high_msg": "High - Polycythemia"},
+    {"analyte": "hb", "sex": "M", "age_min": 18, "age_max": 200, "low": 13, "high": 17,
+     "critical_low": 7, "critical_high": 20,
+     "low_msg": "Low - Possible anemia", "high_msg": "High - Polycythemia"},
+    {"analyte": "wbc", "sex": "any", "age_min": 0, "age_max": 200, "low": 4000, "high": 11000,
+     "critical_low": 1000, "critical_high": 50000,
+     "low_msg": "Low - Leukopenia", "high_msg": "High - Possible infection"},
+    {"analyte": "platelets", "sex": "any", "age_min": 0, "age_max": 200, "low": 150000, "high": 450000,
+     "critical_low": 20000, "critical_high": 1000000,
+     "low_msg": "Low - Thrombocytopenia", "high_msg": "High - Thrombocytosis"},
+    {"analyte": "sodium", "sex": "any", "age_min": 0, "age_max": 200, "low": 135, "high": 145,
+     "critical_low": 120, "critical_high": 160,
+     "low_msg": "Low - Hyponatraemia", "high_msg": "High - Hypernatraemia"},
+    {"analyte": "potassium", "sex": "any", "age_min": 0, "age_max": 200, "low": 3.5, "high": 5.0,
+     "critical_low": 2.5, "critical_high": 6.5,
+     "low_msg": "Low - Hypokalaemia", "high_msg": "High - Hyperkalaemia"},
+    {"analyte": "creatinine", "sex": "F", "age_min": 0, "age_max": 200, "low": 0.5, "high": 1.1,
+     "critical_low": None, "critical_high": 10,
+     "low_msg": "Low", "high_msg": "High - Possible renal impairment"},
+    {"analyte": "creatinine", "sex": "any", "age_min": 0, "age_max": 200, "low": 0.6, "high": 1.3,
+     "critical_low": None, "critical_high": 10,
+     "low_msg": "Low", "high_msg": "High - Possible renal impairment"},
+    {"analyte": "glucose", "sex": "any", "age_min": 0, "age_max": 200, "low": 70, "high": 140,
+     "critical_low": 40, "critical_high": 500,
+     "low_msg": "Low - Hypoglycaemia", "high_msg": "High - Hyperglycaemia"},
+    {"analyte": "hba1c", "sex": "any", "age_min": 0, "age_max": 200, "low": None, "high": 6.4,
+     "critical_low": None, "critical_high": None,
+     "low_msg": "", "high_msg": "High - Diabetes range"},
+    {"analyte": "calcium", "sex": "any", "age_min": 0, "age_max": 200, "low": 8.5, "high": 10.5,
+     "critical_low": 6.5, "critical_high": 13,
+     "low_msg": "Low - Hypocalcaemia", "high_msg": "High - Hypercalcaemia"},
+    {"analyte": "alt", "sex": "any", "age_min": 0, "age_max": 200, "low": None, "high": 55,
+     "critical_low": None, "critical_high": 1000,
+     "low_msg": "", "high_msg": "High - Possible liver injury"},
+]
+
+# canonical key: (canonical unit, [name aliases], {other unit: factor to canonical})
+ANALYTES: Dict[str, Tuple[str, List[str], Dict[str, float]]] = {
+    "hb": ("g/dL", ["haemoglobin", "hemoglobin", "hgb"], {"g/l": 0.1, "mmol/l": 1.611}),
+    "wbc": ("/uL", ["white cell count", "white blood cells", "leukocytes"],
+            {"10^9/l": 1000, "x10^9/l": 1000, "10^3/ul": 1000, "k/ul": 1000}),
+    "platelets": ("/uL", ["plt", "platelet count"], {"10^9/l": 1000, "x10^9/l": 1000, "10^3/ul": 1000}),
+    "sodium": ("mmol/L", ["na"], {"meq/l": 1}),
+    "potassium": ("mmol/L", ["k"], {"meq/l": 1}),
+    "creatinine": ("mg/dL", ["scr", "creat"], {"umol/l": 1 / 88.42}),
+    "glucose": ("mg/dL", ["glu", "blood glucose"], {"mmol/l": 18.016}),
+    "hba1c": ("%", ["a1c"], {"mmol/mol": None}),  # IFCC: affine, see interpret_frame()
+    "calcium": ("mg/dL", ["ca"], {"mmol/l": 4.008}),
+    "alt": ("U/L", ["alanine aminotransferase", "sgpt"], {"iu/l": 1}),
+}
+
+# Unit assumed when a result has none, for analytes whose units differ in
+# scale (legacy interpret_lab_values input: Hb in g/dL, WBC per uL).
+# Other such analytes (glucose 5.5 mmol/L vs 99 mg/dL, ...) are "unknown"
+# without a unit; analytes whose units all have factor 1 need none.
+ASSUMED_UNITS: Dict[str, str] = {
+    "hb": "g/dL",
+    "wbc": "/uL",
+}
+
+FLAGS = np.array(["normal", "low", "high", "critical_low", "critical_high", "unknown"], dtype=object)
+_SEX_CODES = {"any": 0, "F": 1, "M": 2}
+_AGE_SPAN = 1000.0
+_DEFAULT_AGE = 40.0  # adult bands when age is unknown
+
+
+# ---------------------------------------------------------------------
+# COMPILED TABLE
+# ---------------------------------------------------------------------
+class RangeTable:
+    """
+    REFERENCE_RANGES compiled into sorted lookup arrays.
+
+    Every row gets a start / end on one number line:
+    (analyte code * 3 + sex code) * 1000 + age, so a result's row is
+    found with a single searchsorted.
+    """
+
+    def __init__(self, ranges: List[Dict], analytes: Dict,
+                 assumed_units: Optional[Dict[str, str]] = None):
+        assumed_units = {} if assumed_units is None else assumed_units
+        self.keys = list(analytes)
+        self.codes = {key: i for i, key in enumerate(self.keys)}
+        self.units = {key: spec[0] for key, spec in analytes.items()}
+
+        self.names: Dict[str, int] = {}
+        self.factors: Dict[Tuple[int, str], Optional[float]] = {}
+        # Codes whose unitless results are read in an assumed unit
+        self.guessed = np.zeros(len(self.keys) + 1, dtype=bool)
+        for key, (unit, aliases, conversions) in analytes.items():
+            code = self.codes[key]
+            for name in [key] + aliases:
+                self.names[name.lower()] = code
+            self.factors[(code, unit.lower())] = 1.0
+            for other, factor in conversions.items():
+                self.factors[(code, other.lower())] = factor
+
+            if all(factor == 1 for factor in conversions.values()):
+                self.factors[(code, "")] = 1.0
+            elif key in assumed_units:
+                self.factors[(code, "")] = self.factors.get((code, assumed_units[key].lower()))
+                self.guessed[code] = True
+
+        rows = sorted(ranges, key=lambda r: self._start(r))
+        self.starts = np.array([self._start(r) for r in rows])
+        self.ends = np.array([self._start(r) - r["age_min"] + r["age_max"] for r in rows])
+        limit = lambda name, fill: np.array([fill if r[name] is None else r[name] for r in rows], float)
+        self.low = limit("low", -np.inf)
+        self.high = limit("high", np.inf)
+        self.critical_low = limit("critical_low", -np.inf)
+        self.critical_high = limit("critical_high", np.inf)
+        self.low_msg = np.array([r["low_msg"] for r in rows] + [""], dtype=object)
+        self.high_msg = np.array([r["high_msg"] for r in rows] + [""], dtype=object)
+
+    def _start(self, row: Dict) -> float:
+        lane = self.codes[row["analyte"]] * 3 + _SEX_CODES[row["sex"]]
+        return lane * _AGE_SPAN + row["age_min"]
+
+    def _find(self, lane: np.ndarray, age: np.ndarray) -> np.ndarray:
+        """
+        Row index per result, -1 where no band matches.
+        """
+        point = lane * _AGE_SPAN + age
+        row = np.searchsorted(self.starts, point, side="right") - 1
+        safe = np.clip(row, 0, None)
+        ok = (row >= 0) & (point < self.ends[safe]) & (lane >= 0)
+        return np.where(ok, row, -1)
+
+    def analyte_codes(self, names: pd.Series) -> np.ndarray:
+        labels, uniques = _factorize(names)
+        codes = np.array([self.names.get(u, -1) for u in uniques] + [-1], dtype=np.int64)
+        return codes[labels]
+
+    def unit_factors(self, codes: np.ndarray, labels: np.ndarray, uniques: List[str]) -> np.ndarray:
+        """
+        Factor to the canonical unit per row (NaN = unknown unit), from
+        _factorize() output of the unit column.
+        """
+        grid = np.full((len(self.keys) + 1, len(uniques) + 1), np.nan)
+        for column, unit in enumerate(uniques):
+            for code in range(len(self.keys)):
+                factor = self.factors.get((code, unit))
+                if factor is not None:
+                    grid[code, column] = factor
+        return grid[codes, labels]
+
+
+def _factorize(values: pd.Series) -> Tuple[np.ndarray, List[str]]:
+    """
+    Row labels into the distinct normalized strings (-1 / missing maps to
+    the extra last slot). String clean-up runs once per distinct value.
+    """
+    labels, uniques = pd.factorize(values, use_na_sentinel=True)
+    clean = [str(u).strip().lower().replace("μ", "u").replace("µ", "u") for u in uniques]
+    # Missing values behave like an empty string
+    clean.append("")
+    return np.where(labels < 0, len(clean) - 1, labels), clean
+
+
+_TABLE: Optional[RangeTable] = None
+
+
+def get_range_table() -> RangeTable:
+    global _TABLE
+    if _TABLE is None:
+        _TABLE = RangeTable(REFERENCE_RANGES, ANALYTES, ASSUMED_UNITS)
+    return _TABLE
+
+
+def rebuild_range_table() -> RangeTable:
+    """
+    Recompiles after REFERENCE_RANGES / ANALYTES / ASSUMED_UNITS were edited.
+    """
+    global _TABLE
+    _TABLE = None
+    return get_range_table()
+
+
+# ---------------------------------------------------------------------
+# VECTORIZED INTERPRETATION
+# ---------------------------------------------------------------------
+def _sex_codes(sex: pd.Series) -> np.ndarray:
+    labels, uniques = _factorize(sex)
+    codes = np.array([1 if u in ("f", "female") else 2 if u in ("m", "male") else 0
+                      for u in uniques])
+    return codes[labels]
+
+
+def interpret_frame(df: pd.DataFrame, analyte_col: str = "analyte", value_col: str = "value",
+                    unit_col: str = "unit", sex_col: str = "sex", age_col: str = "age") -> pd.DataFrame:
+    """
+    Interprets every row of a long results frame.
+
+    Unit, sex and age columns are optional. Adds: analyte_key,
+    value_std (canonical unit), unit_std, low, high, flag
+    (normal / low / high / critical_low / critical_high / unknown),
+    critical and message.
+
+    A missing unit is only accepted where it cannot be confused (see
+    ASSUMED_UNITS); otherwise the row is "unknown". Rows read in an
+    assumed unit are flagged low / high at most, never critical.
+    """
+    table = get_range_table()
+    n = len(df)
+    codes = table.analyte_codes(df[analyte_col])
+    values = pd.to_numeric(df[value_col], errors="coerce").to_numpy(dtype=float)
+
+    units = df[unit_col] if unit_col in df.columns else pd.Series([""] * n, index=df.index)
+    unit_labels, unit_names = _factorize(units)
+    std = values * table.unit_factors(codes, unit_labels, unit_names)
+
+    # HbA1c in mmol/mol (IFCC) -> % (NGSP)
+    ifcc = (codes == table.codes.get("hba1c", -2)) & \
+        (unit_labels == (unit_names.index("mmol/mol") if "mmol/mol" in unit_names else -2))
+    std = np.where(ifcc, values * 0.09148 + 2.152, std)
+
+    sex = _sex_codes(df[sex_col]) if sex_col in df.columns else np.zeros(n, dtype=int)
+    age = (pd.to_numeric(df[age_col], errors="coerce").fillna(_DEFAULT_AGE).to_numpy(float)
+           if age_col in df.columns else np.full(n, _DEFAULT_AGE))
+
+    # Sex-specific band first, then the "any" band
+    lane = np.where(codes >= 0, codes * 3, -1)
+    row = table._find(np.where(codes >= 0, lane + sex, -1), age)
+    row = np.where(row >= 0, row, table._find(lane, age))
+
+    found = (row >= 0) & np.isfinite(std)
+    r = np.where(found, row, 0)
+    low, high = np.where(found, table.low[r], np.nan), np.where(found, table.high[r], np.nan)
+    crit_low, crit_high = table.critical_low[r], table.critical_high[r]
+
+    # No critical flag on a guessed unit
+    unitless = np.array([u == "" for u in unit_names] + [False])[unit_labels]
+    guessed = unitless & table.guessed[codes]
+    crit_low = np.where(guessed, -np.inf, crit_low)
+    crit_high = np.where(guessed, np.inf, crit_high)
+
+    flag = np.select(
+        [~found, std < crit_low, std > crit_high, std < low, std > high],
+        [5, 3, 4, 1, 2], 0)
+    msg_row = np.where(found, row, len(table.low_msg) - 1)
+    message = np.where(np.isin(flag, [1, 3]), table.low_msg[msg_row],
+                       np.where(np.isin(flag, [2, 4]), table.high_msg[msg_row], ""))
+    message = np.where(flag == 0, "Normal", message)
+
+    keys = np.array(table.keys + [None], dtype=object)
+    unit_std = np.array([table.units[k] for k in table.keys] + [None], dtype=object)
+    return df.assign(
+        analyte_key=keys[codes], value_std=np.where(found, std, np.nan),
+        unit_std=unit_std[codes], low=low, high=high,
+        flag=FLAGS[flag], critical=np.isin(flag, [3, 4]), message=message,
+    )
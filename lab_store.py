@@ -0,0 +1,323 @@
+"""
+lab_store.py
+------------
+Per-patient columnar lab results store for GEN.AI Medical Assistant.
+
+Layout:
+    <USER_DATA_DIR>/labs/<digest>/patient_id
+    <USER_DATA_DIR>/labs/<digest>/part-000000-<uid>.parquet, part-000001-<uid>.parquet, ...
+
+    <digest> is a hash of the patient id, so distinct ids never share a
+    folder and no id can point outside labs/; the raw id is kept in the
+    patient_id file next to the segments.
+
+Features:
+- Append-only: every ingestion writes a new immutable segment
+  (Parquet with pyarrow, pickle otherwise); a random suffix keeps
+  concurrent writers from picking the same name
+- Long format (time, analyte, value, unit), so new analytes need no
+  schema change
+- In-memory cache of parsed, time-sorted frames; refresh() reads only
+  segments written since the last load
+- Range queries by binary search on the time index
+- Wide (time x analyte) view for charts, extended incrementally
+- Segment compaction once a patient has many small appends
+"""
+
+import hashlib
+import os
+import re
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+
+try:
+    import pyarrow  # noqa: F401
+    SEGMENT_EXT = ".parquet"
+except ImportError:
+    SEGMENT_EXT = ".pkl"
+
+
+COLUMNS = ["time", "analyte", "value", "unit"]
+COMPACT_AFTER = 64
+
+_SEGMENT = re.compile(r"^part-(\d+)(?:-[0-9a-f]+)?\.(parquet|pkl)$")
+ID_FILE = "patient_id"
+
+
+# ---------------------------------------------------------------------
+# FRAME HELPERS
+# ---------------------------------------------------------------------
+def to_long(records) -> pd.DataFrame:
+    """
+    Converts lab results to the store's long format.
+
+    Accepts a long DataFrame (time/analyte/value[/unit]) or wide rows,
+    e.g. [{"date": "2025-12-01", "Hb": 13.5, "WBC": 7000}, ...].
+    """
+    frame = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+    if frame.empty:
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in
+                             zip(COLUMNS, ["datetime64[ns]", object, float, object])})
+
+    if "analyte" not in frame.columns:
+        time_col = "date" if "date" in frame.columns else "time"
+        frame = frame.melt(id_vars=[time_col], var_name="analyte", value_name="value")
+        frame = frame.rename(columns={time_col: "time"})
+
+    frame = frame.assign(
+        time=pd.to_datetime(frame["time"]),
+        value=pd.to_numeric(frame["value"], errors="coerce"),
+        unit=frame["unit"] if "unit" in frame.columns else "",
+    )
+    return frame.dropna(subset=["time", "value"])[COLUMNS]
+
+
+def _sort(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame.sort_values("time", kind="stable", ignore_index=True)
+
+
+def _pivot(frame: pd.DataFrame) -> pd.DataFrame:
+    # Last value wins when an analyte is reported twice at one time
+    return frame.pivot_table(index="time", columns="analyte", values="value",
+                             aggfunc="last").rename_axis(columns=None)
+
+
+# ---------------------------------------------------------------------
+# CACHED PATIENT FRAME
+# ---------------------------------------------------------------------
+class PatientLabs:
+    """
+    Parsed, time-sorted results of one patient plus the segments read.
+    """
+
+    def __init__(self):
+        self.frame = to_long([])
+        self.segments: set = set()
+        self._wide: Optional[pd.DataFrame] = None
+
+    def extend(self, rows: pd.DataFrame) -> None:
+        if rows.empty:
+            return
+        rows = _sort(rows)
+        in_order = self.frame.empty or rows["time"].iloc[0] >= self.frame["time"].iloc[-1]
+        merged = pd.concat([self.frame, rows], ignore_index=True)
+        self.frame = merged if in_order else _sort(merged)
+
+        if self._wide is not None:
+            if in_order:
+                # Only the new rows are pivoted
+                new = _pivot(rows)
+                wide = pd.concat([self._wide, new])
+                if wide.index.has_duplicates:
+                    wide = wide.groupby(level=0).last()
+                self._wide = wide
+            else:
+                self._wide = None
+
+    def wide(self) -> pd.DataFrame:
+        if self._wide is None:
+            self._wide = _pivot(self.frame)
+        return self._wide
+
+
+# ---------------------------------------------------------------------
+# STORE
+# ---------------------------------------------------------------------
+class LabStore:
+    """
+    Append-only lab results per patient with cached, pre-parsed frames.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.path.join(config.USER_DATA_DIR, "labs")
+        self._cache: Dict[str, PatientLabs] = {}
+        self._lock = threading.Lock()
+
+    # ----------------------------- paths -----------------------------
+    @staticmethod
+    def _key(patient_id: str) -> str:
+        # Cache key: the raw id, checked on every entry point
+        key = str(patient_id)
+        if key in ("", ".", ".."):
+            raise ValueError(f"Invalid patient id: {patient_id!r}")
+        return key
+
+    def _dir(self, patient_id: str) -> str:
+        digest = hashlib.sha256(self._key(patient_id).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.root, digest)
+
+    def _create_dir(self, patient_id: str) -> str:
+        folder = self._dir(patient_id)
+        id_path = os.path.join(folder, ID_FILE)
+        if not os.path.exists(id_path):
+            os.makedirs(folder, exist_ok=True)
+            tmp = f"{id_path}.{uuid.uuid4().hex[:12]}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(self._key(patient_id))
+            os.replace(tmp, id_path)
+        return folder
+
+    def _segments(self, patient_id: str) -> List[str]:
+        folder = self._dir(patient_id)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(name for name in os.listdir(folder) if _SEGMENT.match(name))
+
+    def _next_segment(self, patient_id: str) -> str:
+        names = self._segments(patient_id)
+        number = max(int(_SEGMENT.match(n).group(1)) for n in names) + 1 if names else 0
+        # Another process may pick the same number: the suffix keeps both
+        return f"part-{number:06d}-{uuid.uuid4().hex[:12]}{SEGMENT_EXT}"
+
+    # ----------------------------- I/O -------------------------------
+    @staticmethod
+    def _write(frame: pd.DataFrame, path: str) -> None:
+        tmp = path + ".tmp"
+        if path.endswith(".parquet"):
+            frame.to_parquet(tmp, index=False)
+        else:
+            frame.to_pickle(tmp)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _read(path: str) -> pd.DataFrame:
+        if path.endswith(".parquet"):
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    # ----------------------------- API -------------------------------
+    def append(self, patient_id: str, records) -> int:
+        """
+        Appends results (long frame or wide rows) as a new segment.
+        Returns the number of values stored.
+        """
+        rows = to_long(records)
+        if rows.empty:
+            return 0
+        return self._append_rows(patient_id, rows)
+
+    def append_batch(self, frame: pd.DataFrame, patient_col: str = "patient_id") -> int:
+        """
+        Appends a long frame covering many patients (one segment each);
+        the frame is cleaned once rather than once per patient.
+        """
+        rows = to_long(frame)
+        patients = frame.loc[rows.index, patient_col].to_numpy()
+        for patient_id, positions in pd.Series(patients).groupby(patients, sort=False).indices.items():
+            self._append_rows(patient_id, rows.iloc[positions])
+        return len(rows)
+
+    def _append_rows(self, patient_id: str, rows: pd.DataFrame) -> int:
+        with self._lock:
+            folder = self._create_dir(patient_id)
+            name = self._next_segment(patient_id)
+            self._write(_sort(rows), os.path.join(folder, name))
+
+            cached = self._cache.get(self._key(patient_id))
+            if cached is not None and len(cached.segments) == len(self._segments(patient_id)) - 1:
+                cached.extend(rows)
+                cached.segments.add(name)
+
+        if len(self._segments(patient_id)) > COMPACT_AFTER:
+            self.compact(patient_id)
+        return len(rows)
+
+    def refresh(self, patient_id: str) -> PatientLabs:
+        """
+        Returns the cached frame after reading any segments not yet seen.
+        """
+        with self._lock:
+            key = self._key(patient_id)
+            cached = self._cache.setdefault(key, PatientLabs())
+            names = self._segments(patient_id)
+            if set(names) - cached.segments and cached.segments - set(names):
+                # Segments were compacted under us: reload
+                cached = self._cache[key] = PatientLabs()
+
+            new = [n for n in names if n not in cached.segments]
+            if new:
+                cached.extend(pd.concat(
+                    [self._read(os.path.join(self._dir(patient_id), n)) for n in new],
+                    ignore_index=True))
+                cached.segments.update(new)
+            return cached
+
+    def query(self, patient_id: str, start=None, end=None,
+              analytes: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Long-format results with start <= time <= end.
+        """
+        frame = self.refresh(patient_id).frame
+        times = frame["time"].to_numpy()
+        lo = 0 if start is None else np.searchsorted(times, np.datetime64(pd.Timestamp(start)), "left")
+        hi = len(times) if end is None else np.searchsorted(times, np.datetime64(pd.Timestamp(end)), "right")
+        frame = frame.iloc[lo:hi]
+        if analytes is not None:
+            frame = frame[frame["analyte"].isin(list(analytes))]
+        return frame
+
+    def wide(self, patient_id: str, start=None, end=None,
+             analytes: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        time x analyte frame (time index), sliced to [start, end].
+        """
+        wide = self.refresh(patient_id).wide()
+        wide = wide.loc[pd.Timestamp(start) if start is not None else None:
+                        pd.Timestamp(end) if end is not None else None]
+        if analytes is not None:
+            wide = wide[[a for a in analytes if a in wide.columns]]
+        return wide
+
+    def compact(self, patient_id: str) -> None:
+        """
+        Merges all segments of a patient into one.
+        """
+        with self._lock:
+            names = self._segments(patient_id)
+            if len(names) <= 1:
+                return
+            folder = self._dir(patient_id)
+            merged = _sort(pd.concat([self._read(os.path.join(folder, n)) for n in names],
+                                     ignore_index=True))
+            target = self._next_segment(patient_id)
+            self._write(merged, os.path.join(folder, target))
+            for name in names:
+                os.remove(os.path.join(folder, name))
+
+            cached = self._cache.get(self._key(patient_id))
+            if cached is not None and cached.segments == set(names):
+                cached.segments = {target}
+
+    def patients(self) -> List[str]:
+        """
+        Raw ids of all patients with stored results.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        ids = []
+        for name in os.listdir(self.root):
+            try:
+                with open(os.path.join(self.root, name, ID_FILE), "r", encoding="utf-8") as fh:
+                    ids.append(fh.read())
+            except OSError:
+                continue
+        return sorted(ids)
+
+
+_STORE: Optional[LabStore] = None
+
+
+def get_lab_store() -> LabStore:
+    """
+    Returns the shared store under config.USER_DATA_DIR.
+    """
+    global _STORE
+    if _STORE is None:
+        _STORE = LabStore()
+    return _STORE
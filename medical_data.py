@@ -9,13 +9,24 @@ This module contains:
 - Partial keyword-based search
 - Type-safe return values
 - Easily expandable architecture
+- Ranked prefix / substring search index for autocomplete
+- Pluggable formulary backend (SQLite / mmap JSONL, see formulary_store)
+- Brand / alias resolution through the shared drug_aliases index
 
 You can later replace/extend this with:
 - External JSON database
 - RxNorm / OpenFDA / MHRA API integration
 """
 
-from typing import Dict, List, Optional
+import heapq
+import os
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import formulary_store
+from drug_aliases import resolve_drug
 
 
 # ---------------------------------------------------------------------
@@ -52,15 +63,47 @@ BNF_DATA: Dict[str, Dict[str, str | List[str]]] = {
 }
 
 
+# ---------------------------------------------------------------------
+# FORMULARY BACKEND
+# ---------------------------------------------------------------------
+# Set FORMULARY_PATH to a .db / .jsonl built with formulary_store.py to
+# serve drugs from disk instead of BNF_DATA
+_BACKEND = None
+
+
+def get_formulary_backend():
+    """
+    Returns the active backend, opening FORMULARY_PATH on first use.
+    """
+    global _BACKEND
+    if _BACKEND is None:
+        path = os.getenv("FORMULARY_PATH")
+        _BACKEND = (formulary_store.open_backend(path) if path
+                    else formulary_store.DictBackend(BNF_DATA))
+    return _BACKEND
+
+
+def use_formulary(path: Optional[str] = None, cache_size: int = 512):
+    """
+    Switches to an on-disk formulary (None = back to BNF_DATA).
+    """
+    global _BACKEND, _SEARCH_INDEX
+    _BACKEND = (formulary_store.open_backend(path, cache_size) if path
+                else formulary_store.DictBackend(BNF_DATA))
+    _SEARCH_INDEX = None
+    return _BACKEND
+
+
 # ---------------------------------------------------------------------
 # EXACT MATCH LOOKUP
 # ---------------------------------------------------------------------
 def get_drug_data(name: str) -> Optional[Dict]:
     """
     Returns structured drug information for an exact name match.
+    Brand names and aliases resolve to their canonical drug.
 
     Parameters:
-        name (str): Drug name (case-insensitive)
+        name (str): Drug name, brand or alias (case-insensitive)
 
     Returns:
         dict | None: Drug details if found, else None
@@ -68,21 +111,131 @@ def get_drug_data(name: str) -> Optional[Dict]:
     if not name:
         return None
 
-    return BNF_DATA.get(name.lower().strip())
+    return get_formulary_backend().get(resolve_drug(name))
+
+
+# ---------------------------------------------------------------------
+# SEARCH INDEX (AUTOCOMPLETE)
+# ---------------------------------------------------------------------
+class DrugSearchIndex:
+    """
+    Prefix + substring search over drug names.
+
+    - prefixes: sorted name array + bisect
+    - substrings: 1- to 3-gram postings, intersected smallest-first,
+      then verified
+    - recent queries cached per index (LRU)
+
+    Ranking: exact match, then prefix matches (alphabetical), then
+    substring matches by match position, length and name. Postings are
+    stored in that rank order for their own gram, so keys of up to 3
+    characters stop after `limit` hits instead of sorting every match.
+    """
+
+    MAX_GRAM = 3
+
+    def __init__(self, names: Iterable[str], cache_size: int = 1024,
+                 version=None):
+        self.names: List[str] = sorted({n.lower().strip() for n in names if n})
+        self.version = version
+        ranked: Dict[str, List[Tuple[int, int, int]]] = {}
+        for i, name in enumerate(self.names):
+            for gram, position in self._ngrams(name).items():
+                ranked.setdefault(gram, []).append((position, len(name), i))
+        # Names are sorted, so the id breaks ties like the name would
+        self._grams: Dict[str, List[int]] = {
+            gram: [i for _, _, i in sorted(posting)] for gram, posting in ranked.items()
+        }
+        self.search = lru_cache(maxsize=cache_size)(self._search)
+
+    @classmethod
+    def _ngrams(cls, text: str) -> Dict[str, int]:
+        # gram -> position of its first occurrence
+        grams: Dict[str, int] = {}
+        for n in range(1, cls.MAX_GRAM + 1):
+            for i in range(len(text) - n + 1):
+                grams.setdefault(text[i:i + n], i)
+        return grams
+
+    def prefix(self, key: str, limit: Optional[int] = None) -> List[str]:
+        found = []
+        i = bisect_left(self.names, key)
+        while i < len(self.names) and self.names[i].startswith(key):
+            found.append(self.names[i])
+            if limit is not None and len(found) >= limit:
+                break
+            i += 1
+        return found
+
+    def _substring_candidates(self, key: str) -> Iterable[int]:
+        n = min(len(key), self.MAX_GRAM)
+        postings = sorted(
+            (self._grams.get(key[i:i + n], []) for i in range(len(key) - n + 1)),
+            key=len,
+        )
+        if not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def _rank(self, i: int, key: str) -> Tuple[int, int, int]:
+        return self.names[i].find(key), len(self.names[i]), i
+
+    def _search(self, key: str, limit: Optional[int] = None) -> Tuple[str, ...]:
+        if not key:
+            return ()
+
+        prefixed = self.prefix(key, limit)
+        if limit is not None and len(prefixed) >= limit:
+            return tuple(prefixed)
+
+        seen = set(prefixed)
+        wanted = None if limit is None else limit - len(prefixed)
+        if len(key) <= self.MAX_GRAM:
+            # The key is a gram: its posting is already in rank order
+            ranked = (i for i in self._grams.get(key, []) if self.names[i] not in seen)
+            infix = list(islice(ranked, wanted))
+        else:
+            matches = (self._rank(i, key) for i in self._substring_candidates(key)
+                       if self.names[i] not in seen and key in self.names[i])
+            ranks = sorted(matches) if wanted is None else heapq.nsmallest(wanted, matches)
+            infix = [i for _, _, i in ranks]
+        return tuple(prefixed + [self.names[i] for i in infix])
+
+
+_SEARCH_INDEX: Optional[DrugSearchIndex] = None
+
+
+def get_search_index() -> DrugSearchIndex:
+    """
+    Returns the search index over the formulary, rebuilding it when the
+    backend's version changes (drugs added, removed or replaced).
+    """
+    global _SEARCH_INDEX
+    backend = get_formulary_backend()
+    version = (id(backend), backend.version, len(backend))
+    if _SEARCH_INDEX is None or _SEARCH_INDEX.version != version:
+        _SEARCH_INDEX = DrugSearchIndex(backend.names(), version=version)
+    return _SEARCH_INDEX
 
 
 # ---------------------------------------------------------------------
 # PARTIAL SEARCH (USER-FRIENDLY)
 # ---------------------------------------------------------------------
-def search_drug(keyword: str) -> List[str]:
+def search_drug(keyword: str, limit: Optional[int] = None) -> List[str]:
     """
-    Returns drugs that match keyword partially.
+    Returns drugs that match keyword partially, best matches first.
     Example:
         input: "amo"
         output: ["amoxicillin"]
 
     Parameters:
         keyword (str): Search text
+        limit (int | None): Maximum number of results
 
     Returns:
         list[str]: List of matching drug names
@@ -91,7 +244,38 @@ def search_drug(keyword: str) -> List[str]:
         return []
 
     key = keyword.lower().strip()
-    return [drug for drug in BNF_DATA if key in drug]
+    found = list(get_search_index().search(key, limit))
+
+    # An exact brand / alias puts its canonical drug first
+    canonical = resolve_drug(key)
+    if canonical != key and canonical in get_formulary_backend():
+        found = [canonical] + [name for name in found if name != canonical]
+        found = found if limit is None else found[:limit]
+    return found
+
+
+# ---------------------------------------------------------------------
+# UTILITY FUNCTIONS TO ADD / REMOVE DRUGS
+# ---------------------------------------------------------------------
+def add_drug(name: str, info: Dict) -> None:
+    """
+    Adds or replaces a drug in the in-memory formulary (BNF_DATA).
+    Rename a drug with remove_drug() + add_drug().
+    """
+    backend = get_formulary_backend()
+    if not isinstance(backend, formulary_store.DictBackend):
+        raise TypeError("The active formulary is read-only; rebuild it with formulary_store.py")
+    backend.put(name.lower().strip(), info)
+
+
+def remove_drug(name: str) -> None:
+    """
+    Removes a drug from the in-memory formulary (BNF_DATA).
+    """
+    backend = get_formulary_backend()
+    if not isinstance(backend, formulary_store.DictBackend):
+        raise TypeError("The active formulary is read-only; rebuild it with formulary_store.py")
+    backend.remove(name.lower().strip())
 
 
 # ---------------------------------------------------------------------
@@ -101,4 +285,4 @@ def list_all_drugs() -> List[str]:
     """
     Returns a list of all drugs available in the local database.
     """
-    return list(BNF_DATA.keys())
+    return get_formulary_backend().names()
@@ -0,0 +1,197 @@
+"""
+monograph_batch.py
+------------------
+Bulk dual-view monograph generation for GEN.AI Medical Assistant.
+
+Features:
+- Runs a drug list through a thread pool of get_hybrid_response() calls
+- Pulls BNF_DATA context for every drug
+- Appends parsed clinical / patient sections to a JSONL results store
+- Resumes after interruption by skipping drugs already done
+- Reports throughput and latency percentiles
+
+Usage:
+    python monograph_batch.py amoxicillin metformin --workers 4
+    python monograph_batch.py --file formulary.txt --out data/monographs.jsonl
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import ai_engine
+import config
+import medical_data
+
+
+DEFAULT_RESULTS_PATH = os.path.join(config.BASE_DIR, "monographs.jsonl")
+
+
+# ---------------------------------------------------------------------
+# RESULTS STORE
+# ---------------------------------------------------------------------
+def load_completed(results_path: str) -> Set[str]:
+    """
+    Returns the drugs that already have a successful monograph.
+    Truncated last lines (from an interrupted run) are ignored.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(results_path):
+        return done
+
+    with open(results_path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not record.get("error"):
+                done.add(record["drug"])
+    return done
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile (pct in 0-100). Returns 0.0 for no values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# ---------------------------------------------------------------------
+# SINGLE DRUG
+# ---------------------------------------------------------------------
+def generate_monograph(drug: str) -> Dict:
+    """
+    Generates one monograph and returns its results-store record.
+    """
+    started = time.perf_counter()
+    text = ai_engine.get_hybrid_response(
+        f"Generate dual-view monograph for {drug}",
+        context_data=medical_data.get_drug_data(drug)
+    )
+    latency = time.perf_counter() - started
+
+    _, clinical, patient = ai_engine.split_sections(text)
+    record = {
+        "drug": drug,
+        "clinical": clinical.strip(),
+        "patient": patient.strip(),
+        "latency": round(latency, 3),
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    if text.startswith("⚠️"):
+        record["error"] = text
+    elif not clinical and not patient:
+        record["error"] = "Response had no Clinical / Patient sections"
+        record["raw"] = text
+    return record
+
+
+# ---------------------------------------------------------------------
+# BATCH PIPELINE
+# ---------------------------------------------------------------------
+def generate_monographs(drugs: Iterable[str], workers: int = 4,
+                        results_path: str = DEFAULT_RESULTS_PATH,
+                        progress: Optional[Callable[[int, int, Dict], None]] = None) -> Dict:
+    """
+    Generates monographs for a list of drugs.
+
+    Parameters:
+        drugs (iterable[str]): Drug names
+        workers (int): Concurrent requests
+        results_path (str): JSONL results store (appended, used for resume)
+        progress (callable | None): Called as progress(done, total, record)
+
+    Returns:
+        dict: Run report with counts, throughput and latency percentiles
+    """
+    completed = load_completed(results_path)
+    # Ordered de-duplication of canonical names (brands / aliases merge)
+    requested = list(dict.fromkeys(
+        name for name in (medical_data.resolve_drug(d) for d in drugs) if name
+    ))
+    pending = [name for name in requested if name not in completed]
+
+    if os.path.dirname(results_path):
+        os.makedirs(os.path.dirname(results_path), exist_ok=True)
+
+    latencies: List[float] = []
+    failed: List[str] = []
+    started = time.perf_counter()
+
+    with open(results_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+
+        futures = {pool.submit(generate_monograph, drug): drug for drug in pending}
+
+        for done_count, future in enumerate(as_completed(futures), start=1):
+            drug = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                record = {"drug": drug, "error": str(e)}
+
+            # Results are written from this thread only, one flushed line each
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+            if record.get("error"):
+                failed.append(drug)
+            else:
+                latencies.append(record["latency"])
+
+            if progress:
+                progress(done_count, len(pending), record)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "requested": len(requested),
+        "skipped": len(requested) - len(pending),
+        "generated": len(latencies),
+        "failed": failed,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_s": round(len(pending) / elapsed, 3) if elapsed else 0.0,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p90_s": percentile(latencies, 90),
+        "latency_p99_s": percentile(latencies, 99),
+        "results_path": results_path,
+    }
+
+
+# ---------------------------------------------------------------------
+# COMMAND LINE
+# ---------------------------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk monograph generation")
+    parser.add_argument("drugs", nargs="*", help="Drug names (default: all local drugs)")
+    parser.add_argument("--file", help="Text file with one drug per line")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--out", default=DEFAULT_RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    drugs = list(args.drugs)
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as fh:
+            drugs.extend(line.strip() for line in fh if line.strip())
+    if not drugs:
+        drugs = medical_data.list_all_drugs()
+
+    def show(done, total, record):
+        status = "FAILED" if record.get("error") else f"{record['latency']:.2f}s"
+        print(f"[{done}/{total}] {record['drug']}: {status}")
+
+    report = generate_monographs(drugs, args.workers, args.out, progress=show)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
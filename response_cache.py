@@ -0,0 +1,296 @@
+"""
+response_cache.py
+-----------------
+Two-tier response cache for GEN.AI Medical Assistant.
+
+Features:
+- In-memory LRU bounded by a total byte budget
+- Optional on-disk store (one JSON file per key) under config.TEMP_DIR
+- TTL eviction and per-entry size limits on both tiers
+- Periodic disk sweep bounded by TTL and a total byte limit
+- Hit / miss counters for monitoring
+- Stable keys built from query, context, image, model and system prompt
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+# ---------------------------------------------------------------------
+# CACHE KEY HELPERS
+# ---------------------------------------------------------------------
+def normalize_query(query: str) -> str:
+    """
+    Lower-cases and collapses whitespace so trivially different
+    phrasings ("Paracetamol  monograph ") share one entry.
+    """
+    return " ".join((query or "").lower().split())
+
+
+def image_fingerprint(image) -> str:
+    """
+    Returns a content hash of a PIL image (mode, size and pixel data).
+
+    An exact content hash is used rather than a perceptual one so that
+    two visually similar scans never share a diagnosis.
+    """
+    if image is None:
+        return ""
+
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}:{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def make_key(query: str, context_data: Any = None, image=None,
+             model_name: str = "", system_prompt: str = "") -> str:
+    """
+    Builds a SHA-256 cache key from every input that changes the answer.
+    """
+    parts = [
+        normalize_query(query),
+        json.dumps(context_data, sort_keys=True, default=str),
+        image_fingerprint(image),
+        model_name or "",
+        hashlib.sha256((system_prompt or "").encode()).hexdigest(),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+# ---------------------------------------------------------------------
+# RESPONSE CACHE
+# ---------------------------------------------------------------------
+class ResponseCache:
+    """
+    Memory LRU in front of an optional disk store.
+
+    Parameters:
+        max_bytes (int): Total UTF-8 bytes kept in memory
+        max_entry_bytes (int): Larger responses are not cached
+        ttl (float): Seconds an entry stays valid (0 = forever)
+        disk_dir (str | None): Directory for the disk tier (None = memory only)
+        max_disk_bytes (int): Total bytes kept on disk (0 = unlimited)
+        sweep_every (int): Disk writes between sweeps; the first write
+            always sweeps so entries left by earlier runs are bounded too
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024,
+                 max_entry_bytes: int = 256 * 1024,
+                 ttl: float = 24 * 3600,
+                 disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = 64 * 1024 * 1024,
+                 sweep_every: int = 100):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.sweep_every = max(1, sweep_every)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "rejected": 0,
+            "disk_evictions": 0,
+        }
+        self._disk_ready = False  # disk_dir is created on the first write
+        self._disk_writes = 0
+
+    # -------------------------------------------------------------
+    # internal helpers
+    # -------------------------------------------------------------
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl) and (time.time() - created) > self.ttl
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _drop(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _remember(self, key: str, text: str, created: float, size: int) -> None:
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (text, created, size)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self._stats["evictions"] += 1
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                record = json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+        if self._expired(record.get("created", 0)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return record["text"], record["created"]
+
+    def _write_disk(self, key: str, text: str, created: float) -> None:
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            if not self._disk_ready:
+                os.makedirs(self.disk_dir, exist_ok=True)
+                self._disk_ready = True
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({"created": created, "text": text}, fh)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def _remove_file(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    # -------------------------------------------------------------
+    # public API
+    # -------------------------------------------------------------
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached response text, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                text, created, _ = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return text
+                self._drop(key)
+
+        if self.disk_dir:
+            record = self._read_disk(key)
+            if record is not None:
+                text, created = record
+                with self._lock:
+                    self._remember(key, text, created, len(text.encode("utf-8")))
+                    self._stats["disk_hits"] += 1
+                return text
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, text: str) -> bool:
+        """
+        Stores a response. Returns False if it exceeds max_entry_bytes.
+        """
+        size = len(text.encode("utf-8"))
+        created = time.time()
+
+        with self._lock:
+            if size > self.max_entry_bytes or size > self.max_bytes:
+                self._stats["rejected"] += 1
+                return False
+            self._remember(key, text, created, size)
+            self._stats["stores"] += 1
+
+        if self.disk_dir:
+            self._write_disk(key, text, created)
+            with self._lock:
+                sweep = self._disk_writes % self.sweep_every == 0
+                self._disk_writes += 1
+            if sweep:
+                self.sweep_disk()
+        return True
+
+    def sweep_disk(self) -> int:
+        """
+        Removes expired disk entries, then the oldest ones until the
+        disk tier fits in max_disk_bytes.
+
+        File modification times stand in for the stored creation time
+        (each entry is written once, atomically), so no file is opened.
+
+        Returns:
+            int: Number of files removed
+        """
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return 0
+
+        now = time.time()
+        removed = 0
+        live = []
+        try:
+            with os.scandir(self.disk_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        info = entry.stat()
+                    except OSError:
+                        continue
+                    if self.ttl and now - info.st_mtime > self.ttl:
+                        removed += self._remove_file(entry.path)
+                    else:
+                        live.append((info.st_mtime, info.st_size, entry.path))
+        except OSError:
+            return removed
+
+        total = sum(size for _, size, _ in live)
+        if self.max_disk_bytes and total > self.max_disk_bytes:
+            live.sort()
+            for _, size, path in live:
+                if total <= self.max_disk_bytes:
+                    break
+                if self._remove_file(path):
+                    removed += 1
+                total -= size
+
+        with self._lock:
+            self._stats["disk_evictions"] += removed
+        return removed
+
+    def clear(self) -> None:
+        """
+        Empties both tiers.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.disk_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns hit / miss counters plus current memory usage.
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
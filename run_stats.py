@@ -0,0 +1,49 @@
+"""
+run_stats.py
+------------
+Progress statistics shared by the batch pipelines
+(interaction_screening.py, cohort_pipeline.py).
+
+Features:
+- Peak resident memory of the process and its finished workers
+- Progress report with elapsed time and throughput
+"""
+
+import sys
+import time
+from typing import Dict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_memory_mb() -> float:
+    """
+    Peak resident memory of this process plus finished children (MB).
+    """
+    if resource is None:
+        return 0.0
+    usage = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+             + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def report(stats: Dict, started: float, count_key: str) -> Dict:
+    """
+    Returns `stats` plus elapsed_s, rows_per_s and peak_memory_mb.
+
+    Parameters:
+        stats (dict): Counters of the run so far
+        started (float): time.perf_counter() at the start of the run
+        count_key (str): Counter in `stats` that rows_per_s is based on
+    """
+    elapsed = time.perf_counter() - started
+    return {
+        **stats,
+        "elapsed_s": round(elapsed, 2),
+        "rows_per_s": round(stats[count_key] / elapsed, 1) if elapsed else 0.0,
+        "peak_memory_mb": round(peak_memory_mb(), 1),
+    }
@@ -0,0 +1,226 @@
+"""
+symptom_normalizer.py
+---------------------
+Symptom normalization layer for the GEN.AI diagnosis engine.
+
+Features:
+- Synonym table (lay terms, spelling variants, qualifiers -> canonical term)
+- Light suffix stemming ("headaches" -> "headache", "chills" -> "chill")
+- LRU cache of normalized terms
+- Trigram index for typo-tolerant lookup; a query only touches the
+  postings of its own trigrams, so cost is sub-linear in vocabulary size
+- Fuzzy matches must be word-for-word typos (bounded edit distance per
+  word), so "upper" never resolves to "lower"
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+
+# ---------------------------------------------------------------------
+# SYNONYM TABLE
+# ---------------------------------------------------------------------
+# canonical term: [variants that mean the same for scoring]
+SYNONYMS: Dict[str, List[str]] = {
+    "fever": ["high fever", "mild fever", "low grade fever", "pyrexia", "febrile",
+              "high temperature", "temperature"],
+    "shortness of breath": ["difficulty breathing", "breathing difficulty", "breathlessness",
+                            "trouble breathing", "dyspnea", "dyspnoea", "sob"],
+    "dry cough": ["nonproductive cough", "non-productive cough"],
+    "runny nose": ["running nose", "rhinorrhea", "rhinorrhoea"],
+    "sore throat": ["throat pain", "pharyngitis"],
+    "body ache": ["body pain", "muscle ache", "muscle pain", "myalgia"],
+    "fatigue": ["tiredness", "tired", "exhaustion", "lethargy"],
+    "headache": ["head ache", "cephalgia"],
+    "loss of smell": ["anosmia"],
+    "loss of taste": ["ageusia"],
+    "dysuria": ["painful urination", "burning urination", "burning when urinating"],
+    "frequency": ["frequent urination", "urinary frequency"],
+    "urgency": ["urinary urgency"],
+    "hematuria": ["haematuria", "blood in urine"],
+    "polyuria": ["excessive urination"],
+    "polydipsia": ["excessive thirst", "increased thirst"],
+    "polyphagia": ["excessive hunger", "increased appetite"],
+    "blurred vision": ["blurry vision"],
+    "dizziness": ["lightheadedness", "light headedness"],
+    "nosebleed": ["nose bleed", "epistaxis"],
+    "chest pain": ["chest tightness"],
+    "chills": ["rigors", "shivering"],
+    "lower abdominal pain": ["suprapubic pain"],
+}
+
+
+# ---------------------------------------------------------------------
+# TEXT HELPERS
+# ---------------------------------------------------------------------
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+
+
+def _stem(token: str) -> str:
+    if len(token) <= 3:
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("sses"):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    if token.endswith("ing") and len(token) > 5:
+        return token[:-3]
+    if token.endswith("ed") and not token.endswith("eed") and len(token) > 4:
+        return token[:-2]
+    return token
+
+
+def stem_key(term: str) -> str:
+    """
+    Lower-cases, strips punctuation and stems each word.
+    """
+    words = _NON_WORD.sub(" ", term.lower().replace("-", " ")).split()
+    return " ".join(_stem(w) for w in words)
+
+
+def trigrams(key: str) -> List[str]:
+    padded = f"  {key} "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def _max_edits(word: str) -> int:
+    # Short words are distinct terms, not typos ("sob", "ear")
+    if len(word) <= 3:
+        return 0
+    return 1 if len(word) <= 5 else 2
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance with adjacent transpositions counted as one
+    edit; returns limit + 1 as soon as the distance exceeds limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        row = [i]
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            value = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, before[j - 2] + 1)
+            row.append(value)
+        if min(row) > limit:
+            return limit + 1
+        before, prev = prev, row
+    return prev[-1]
+
+
+def is_typo_of(key: str, term: str) -> bool:
+    """
+    True when `key` spells `term` with a few typos: the same number of
+    words, each within a small edit distance of its counterpart.
+    """
+    words, targets = key.split(), term.split()
+    if len(words) != len(targets):
+        return False
+    for word, target in zip(words, targets):
+        limit = _max_edits(target)
+        if _edit_distance(word, target, limit) > limit:
+            return False
+    return True
+
+
+# ---------------------------------------------------------------------
+# TRIGRAM INDEX
+# ---------------------------------------------------------------------
+class TrigramIndex:
+    """
+    Typo-tolerant lookup over a growing vocabulary of keys.
+    """
+
+    def __init__(self, terms: Iterable[str] = ()):
+        self.terms: List[str] = []
+        self._sizes: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+        for term in terms:
+            self.add(term)
+
+    def add(self, term: str) -> None:
+        tid = len(self.terms)
+        grams = trigrams(term)
+        self.terms.append(term)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(tid)
+
+    def best_match(self, key: str, min_similarity: float = 0.5) -> Optional[str]:
+        """
+        Returns the vocabulary term with the highest trigram Dice
+        similarity to `key` that is also a typo of it (see is_typo_of),
+        or None if no such term scores above `min_similarity`.
+        """
+        grams = trigrams(key)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for tid in self._postings.get(gram, ()):
+                shared[tid] = shared.get(tid, 0) + 1
+
+        scored = []
+        for tid, hits in shared.items():
+            score = 2 * hits / (len(grams) + self._sizes[tid])
+            if score > min_similarity:
+                scored.append((-score, tid))
+
+        # Trigrams only shortlist; the edit-distance check decides
+        for _, tid in sorted(scored):
+            if is_typo_of(key, self.terms[tid]):
+                return self.terms[tid]
+        return None
+
+
+# ---------------------------------------------------------------------
+# NORMALIZER
+# ---------------------------------------------------------------------
+class SymptomNormalizer:
+    """
+    Maps free-text symptoms to canonical keys.
+
+    canonical() is exact (synonyms + stemming) and is used both when a
+    knowledge base is compiled and when a query is scored. Fuzzy
+    matching against a vocabulary is done separately with TrigramIndex.
+    """
+
+    def __init__(self, synonyms: Optional[Dict[str, List[str]]] = None,
+                 cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._table: Dict[str, str] = {}
+        for canonical, variants in (SYNONYMS if synonyms is None else synonyms).items():
+            target = stem_key(canonical)
+            self._table[target] = target
+            for variant in variants:
+                self._table[stem_key(variant)] = target
+
+        self.canonical = lru_cache(maxsize=cache_size)(self._canonical)
+
+    def __getstate__(self):
+        # The lru_cache wrapper cannot be pickled (process pools)
+        return {"cache_size": self.cache_size, "_table": self._table}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.canonical = lru_cache(maxsize=self.cache_size)(self._canonical)
+
+    def _canonical(self, term: str) -> str:
+        key = stem_key(term)
+        return self._table.get(key, key)
+
+    def normalize_all(self, terms: Iterable[str]) -> List[str]:
+        """
+        Returns the unique canonical keys of a symptom list.
+        """
+        keys = (self.canonical(t) for t in terms if t)
+        return list(dict.fromkeys(k for k in keys if k))
+
+
+DEFAULT_NORMALIZER = SymptomNormalizer()
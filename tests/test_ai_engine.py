@@ -0,0 +1,78 @@
+import threading
+import time
+
+import ai_engine
+import config
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _SlowStreamingModel:
+    """Fake Gemini model that records how many streams are open at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def generate_content(self, contents, stream=False):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            for word in ["### 👨‍⚕️ Clinical View\n", "ok ", "### 🏡 Patient View\n", "ok"]:
+                time.sleep(0.02)
+                yield _Chunk(word)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def test_concurrent_streams_share_the_client_concurrency_cap(monkeypatch):
+    model = _SlowStreamingModel()
+    client = ai_engine.AsyncGeminiClient(model_provider=lambda: ("fake", model),
+                                         max_concurrency=2)
+    monkeypatch.setattr(ai_engine, "ASYNC_CLIENT", client)
+    monkeypatch.setattr(ai_engine.MODEL_REGISTRY, "get_model", lambda prompt=None: ("fake", model))
+    monkeypatch.setattr(config.settings, "GEMINI_API_KEY", "test-key")
+
+    results = []
+
+    def consume(i):
+        pieces = list(ai_engine.stream_hybrid_response(f"q{i}", use_cache=False))
+        results.append("".join(text for section, text in pieces if section == "clinical"))
+
+    threads = [threading.Thread(target=consume, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    assert len(results) == 6
+    assert all(r.strip() == "ok" for r in results)
+    assert model.peak == 2
+    assert client.stats["upstream_calls"] == 6
+
+
+def test_abandoned_stream_releases_its_slot(monkeypatch):
+    model = _SlowStreamingModel()
+    client = ai_engine.AsyncGeminiClient(model_provider=lambda: ("fake", model),
+                                         max_concurrency=1)
+    monkeypatch.setattr(ai_engine, "ASYNC_CLIENT", client)
+    monkeypatch.setattr(ai_engine.MODEL_REGISTRY, "get_model", lambda prompt=None: ("fake", model))
+    monkeypatch.setattr(config.settings, "GEMINI_API_KEY", "test-key")
+
+    stream = ai_engine.stream_hybrid_response("first", use_cache=False)
+    next(stream)
+    stream.close()
+
+    # Would block forever if the first stream still held the only slot
+    done = []
+    worker = threading.Thread(target=lambda: done.append(
+        list(ai_engine.stream_hybrid_response("second", use_cache=False))))
+    worker.start()
+    worker.join(timeout=5)
+    assert done
@@ -0,0 +1,52 @@
+import random
+
+import numpy as np
+
+import calculators
+import calculators_vec as cv
+
+
+def _decimals(rng, low, high, n):
+    return [round(rng.uniform(low, high), rng.choice([1, 2])) for _ in range(n)]
+
+
+def test_vectorized_calculators_match_scalar_results_exactly():
+    rng = random.Random(11)
+    n = 5000
+    weight = _decimals(rng, 3, 150, n)
+    height = _decimals(rng, 50, 200, n)
+    age = _decimals(rng, 1, 90, n)
+    scr = _decimals(rng, 0.3, 4, n)
+    dose = _decimals(rng, 0.1, 50, n)
+    sex = [rng.choice(["Female", "Male", "F", "female", ""]) for _ in range(n)]
+
+    for scalar, vector, columns in [
+        (calculators.calc_egfr, cv.calc_egfr, (scr, age, sex)),
+        (calculators.calc_crcl, cv.calc_crcl, (weight, age, scr, sex)),
+        (calculators.calc_bsa, cv.calc_bsa, (weight, height)),
+        (calculators.calc_weight_dose, cv.calc_weight_dose, (weight, dose)),
+        (calculators.calc_adjusted_weight, cv.calc_adjusted_weight, (weight, height)),
+        (calculators.calc_corrected_calcium, cv.calc_corrected_calcium, (scr, dose)),
+        (calculators.calc_clarks_rule, cv.calc_clarks_rule, (weight, dose)),
+        (calculators.calc_youngs_rule, cv.calc_youngs_rule, (age, dose)),
+        (calculators.calc_frieds_rule, cv.calc_frieds_rule, (age, dose)),
+        (calculators.calc_isf, cv.calc_isf, (dose,)),
+    ]:
+        values, valid = vector(*[np.array(c) for c in columns])
+        assert valid.all()
+        assert values.tolist() == [scalar(*row) for row in zip(*columns)], scalar.__name__
+
+    bmi, category, valid = cv.calc_bmi(np.array(weight), np.array(height))
+    expected = [calculators.calc_bmi(w, h) for w, h in zip(weight, height)]
+    assert list(zip(bmi.tolist(), category.tolist())) == expected
+
+
+def test_only_the_exact_female_label_is_female():
+    assert cv.calc_egfr(1.0, 50, "F")[0] == calculators.calc_egfr(1.0, 50, "F")
+    assert cv.calc_egfr(1.0, 50, "Female")[0] == calculators.calc_egfr(1.0, 50, "Female")
+    assert cv.female_mask(["Female", "female", "F", "Male"]).tolist() == [True, False, False, False]
+
+
+def test_rounding_follows_python_on_ties():
+    values = [2.675, 1.005, 0.125, 0.375, 2.5]
+    assert cv.round_like_python(np.array(values), 2).tolist() == [round(v, 2) for v in values]
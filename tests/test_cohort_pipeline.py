@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+import cohort_pipeline
+
+
+def _write_cohort(path):
+    rows = [
+        # chunk 1: clean integers
+        {"weight": 70, "height": 175, "age": 50, "sex": "Male", "scr": 1.0, "note": None},
+        {"weight": 60, "height": 160, "age": 40, "sex": "Female", "scr": 0.8, "note": None},
+        # chunk 2: a bad weight cell; the pass-through note is filled in
+        {"weight": "abc", "height": 170, "age": 45, "sex": "F", "scr": 0.9, "note": "recheck"},
+        {"weight": 80, "height": 180, "age": 60, "sex": "M", "scr": 1.2, "note": None},
+    ]
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_bad_cell_in_later_chunk_is_flagged_not_fatal(tmp_path, suffix):
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    source = tmp_path / "cohort.csv"
+    output = tmp_path / f"enriched{suffix}"
+    _write_cohort(source)
+
+    report = cohort_pipeline.run_pipeline(str(source), str(output), ["bmi", "crcl", "egfr"],
+                                          chunk_size=2)
+
+    assert report["rows"] == 4
+    assert report["invalid"] == {"bmi": 1, "crcl": 1, "egfr": 0}
+
+    result = pd.read_csv(output) if suffix == ".csv" else pd.read_parquet(output)
+    assert result["bmi_valid"].tolist() == [True, True, False, True]
+    assert result["weight_num"].isna().tolist() == [False, False, True, False]
+    assert result["age_num"].dtype == float
+    # The raw input is kept, so the bad value can be traced
+    assert result["weight"].astype(str).tolist()[2] == "abc"
+    assert result["note"].fillna("").tolist() == ["", "", "recheck", ""]
@@ -0,0 +1,66 @@
+import random
+
+import disease_engine
+from disease_kb import DiseaseIndex, DiseaseRecord
+
+
+def _reference_top(index, symptoms, top_n):
+    # Scalar scoring: every matched disease scored, full sort
+    matches = index.match_counts(index.lookup(symptoms))
+    scored = [(did, round(hits / index.count(did) * 100, 1)) for did, hits in matches.items()]
+    scored.sort(key=lambda x: (-x[1], x[0]))
+    return [(index.names[did], prob) for did, prob in scored[:top_n]]
+
+
+def test_vectorized_top_matches_scalar_scoring():
+    rng = random.Random(3)
+    vocab = [f"symptom {i}" for i in range(300)]
+    weights = [1 / (i + 1) for i in range(300)]
+    index = DiseaseIndex.from_records(
+        DiseaseRecord(f"disease {d}", rng.choices(vocab, weights, k=rng.randint(2, 12)))
+        for d in range(2000)
+    )
+    index.add("disease 7", ["symptom 0", "symptom 1"])
+    index.add("late disease", ["symptom 2"])
+
+    for _ in range(200):
+        query = rng.choices(vocab, weights, k=rng.randint(1, 6))
+        expected = _reference_top(index, query, 5)
+        assert index.top(query, 5) == expected
+
+
+def test_calculate_probability_agrees_with_diagnose_for_fuzzy_symptoms():
+    symptoms = ["Fevers", "coughing", "tired", "sore throte"]
+    for disease, prob in disease_engine.diagnose(symptoms, top_n=10):
+        assert disease_engine.calculate_probability(
+            symptoms, disease_engine.DISEASE_DB[disease]) == prob
+
+
+def test_queries_between_adds_read_the_delta_without_compacting():
+    rng = random.Random(5)
+    vocab = [f"symptom {i}" for i in range(200)]
+    index = DiseaseIndex.from_records(
+        DiseaseRecord(f"disease {d}", rng.sample(vocab, rng.randint(2, 10)))
+        for d in range(1000)
+    )
+    base_indices = index._indices
+
+    for step in range(30):
+        if step % 3 == 0:
+            index.add(f"disease {step}", rng.sample(vocab, 3))
+        else:
+            index.add(f"new disease {step}", rng.sample(vocab, 2) + [f"rare sign {step}"])
+        query = rng.sample(vocab, 3) + [f"rare sign {step}"]
+        assert index.top(query, 5) == _reference_top(index, query, 5)
+
+    assert index._indices is base_indices
+
+
+def test_fuzzy_lookup_only_corrects_typos():
+    index = disease_engine.get_index()
+    assert index.lookup(["upper abdominal pain"]) == []
+    assert index.lookup(["coughing blood"]) == []
+    assert disease_engine.diagnose(["upper abdominal pain"]) == []
+
+    assert index.lookup(["sore throte"]) == index.lookup(["sore throat"])
+    assert index.lookup(["headach"]) == index.lookup(["headache"])
@@ -0,0 +1,89 @@
+import pytest
+
+import dose_rules
+import medical_data
+
+
+@pytest.fixture
+def formulary(monkeypatch):
+    """A private copy of the formulary and rule tables."""
+    monkeypatch.setattr(medical_data, "BNF_DATA", dict(medical_data.BNF_DATA))
+    monkeypatch.setattr(dose_rules, "DOSE_RULES", {k: list(v) for k, v in dose_rules.DOSE_RULES.items()})
+    medical_data.use_formulary(None)
+    dose_rules.clear_compiled_rules()
+    yield
+    monkeypatch.undo()
+    medical_data.use_formulary(None)
+    dose_rules.clear_compiled_rules()
+
+
+def _status(patient, drug):
+    return dose_rules.dose_check(patient, [drug])["results"][0]
+
+
+def test_numeric_strings_parse_and_garbage_is_missing(formulary):
+    base = {"scr": 1.0, "sex": "Male", "weight": 80}
+    assert dose_rules.patient_measures({**base, "age": "70"}) == \
+        dose_rules.patient_measures({**base, "age": 70})
+
+    measures = dose_rules.patient_measures({**base, "age": "seventy"})
+    assert measures["egfr"] is None and measures["crcl"] is None
+    assert _status({**base, "age": "seventy"}, "metformin")["status"] == "unresolved"
+
+
+def test_string_weight_leaves_crcl_rule_unresolved(formulary):
+    dose_rules.add_dose_rule("metformin", "crcl", "<", 30, "stop", "Stop if CrCl < 30.")
+    patient = {"scr": 1.0, "age": 70, "sex": "Male"}
+
+    result = _status({**patient, "weight": "heavy"}, "metformin")
+    assert result["status"] == "unresolved"
+    assert "crcl" in result["reason"]
+    assert _status({**patient, "weight": "80"}, "metformin")["status"] == "ok"
+
+
+def test_unstructured_sentence_next_to_a_parsed_rule_is_unresolved(formulary):
+    medical_data.add_drug("testamine", {"class": "Test",
+                                        "warnings": "Reduce dose if eGFR < 30. Avoid in hepatic failure."})
+    result = _status({"egfr": 20, "hepatic": "severe"}, "testamine")
+    assert result["status"] == "unresolved"
+    assert "hepatic failure" in result["reason"]
+    assert [r["action"] for r in result["triggered"]] == ["reduce"]
+
+
+def test_fired_rule_with_missing_more_severe_measure_is_unresolved(formulary):
+    dose_rules.add_dose_rule("metformin", "hepatic", ">=", 3, "stop", "Stop in severe hepatic impairment.")
+    result = _status({"egfr": 40}, "metformin")
+    assert result["status"] == "unresolved"
+    assert [r["action"] for r in result["triggered"]] == ["reduce"]
+
+    # A missing measure that can only lead to a milder action does not block
+    dose_rules.DOSE_RULES["metformin"][-1]["action"] = "monitor"
+    dose_rules.clear_compiled_rules()
+    assert _status({"egfr": 40}, "metformin")["status"] == "reduce"
+
+
+@pytest.mark.parametrize("warning, patient", [
+    ("Reduce dose if eGFR 30-59; stop if eGFR < 30.", {"egfr": 45}),
+    ("Avoid if eGFR < 30 or CrCl < 25.", {"egfr": 40, "crcl": 20}),
+    ("Reduce dose in moderate to severe hepatic impairment.", {"hepatic": "moderate"}),
+    ("Do not stop if eGFR < 30.", {"egfr": 20}),
+    ("Reduce dose if eGFR < 30, stop if eGFR < 15.", {"egfr": 20}),
+])
+def test_sentences_that_are_not_one_clause_stay_unresolved(formulary, warning, patient):
+    medical_data.add_drug("testamine", {"class": "Test", "warnings": warning})
+    assert dose_rules.parse_warnings(warning) == []
+    result = _status(patient, "testamine")
+    assert result["status"] == "unresolved"
+    assert warning in result["reason"]
+
+
+@pytest.mark.parametrize("warning, patient, status", [
+    ("Stop if eGFR < 30.", {"egfr": 20}, "stop"),
+    ("Reduce dose if CrCl <= 50 mL/min.", {"crcl": 50}, "reduce"),
+    ("Avoid in severe hepatic impairment.", {"hepatic": "moderate"}, "ok"),
+    ("Contraindicated in moderate hepatic impairment.", {"hepatic": "severe"}, "avoid"),
+])
+def test_single_clause_sentences_become_rules(formulary, warning, patient, status):
+    medical_data.add_drug("testamine", {"class": "Test", "warnings": warning})
+    assert len(dose_rules.parse_warnings(warning)) == 1
+    assert _status(patient, "testamine")["status"] == status
@@ -0,0 +1,31 @@
+import pytest
+
+import drug_interactions
+import formulary_store
+import medical_data
+
+
+def test_disk_backend_base_is_abstract():
+    with pytest.raises(TypeError):
+        formulary_store._DiskBackend()
+
+
+@pytest.mark.parametrize("suffix", [".db", ".jsonl"])
+def test_interaction_classes_come_from_the_active_backend(tmp_path, suffix):
+    records = dict(medical_data.BNF_DATA)
+    records["ketoprofen"] = {"class": "NSAID", "dose": "50 mg TDS"}
+    path = str(tmp_path / f"formulary{suffix}")
+    if suffix == ".db":
+        formulary_store.write_sqlite(records.items(), path)
+    else:
+        formulary_store.write_jsonl(records.items(), path)
+
+    medical_data.use_formulary(path)
+    try:
+        pairs = {(i["drug1"], i["drug2"]) for i in
+                 drug_interactions.check_interactions(["warfarin", "ketoprofen"])}
+        assert pairs == {("warfarin", "ketoprofen")}
+    finally:
+        medical_data.use_formulary(None)
+
+    assert drug_interactions.check_interactions(["warfarin", "ketoprofen"]) == []
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+import drug_interactions
+import interaction_screening
+
+
+@pytest.fixture
+def drug_classes(monkeypatch):
+    """A private copy of the class table, with the index rebuilt around it."""
+    monkeypatch.setattr(drug_interactions, "DRUG_CLASSES",
+                        {k: list(v) for k, v in drug_interactions.DRUG_CLASSES.items()})
+    drug_interactions.rebuild_interaction_index()
+    yield
+    monkeypatch.undo()
+    drug_interactions.rebuild_interaction_index()
+
+
+def _screen(tmp_path, workers):
+    source = tmp_path / "prescriptions.csv"
+    source.write_text("patient_id,drugs\np1,warfarin;ketorolac\np2,paracetamol\n")
+    output = tmp_path / f"findings-{workers}.jsonl"
+    report = interaction_screening.screen_file(str(source), str(output),
+                                               workers=workers, chunk_size=1)
+    findings = [json.loads(line) for line in output.read_text().splitlines()]
+    return report, findings
+
+
+def test_in_process_run_after_a_pool_run_sees_new_classes(tmp_path, drug_classes):
+    report, _ = _screen(tmp_path, workers=2)
+    assert report["findings"] == 0
+
+    drug_interactions.add_drug_class("ketorolac", "nsaid")
+    assert drug_interactions.check_interactions(["warfarin", "ketorolac"])
+
+    report, findings = _screen(tmp_path, workers=1)
+    assert report["findings"] == 1
+    assert findings[0]["patient_id"] == "p1"
+    assert interaction_screening._WORKER_INDEX is None
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import lab_feed
+import lab_store
+
+
+def test_critical_result_is_raised_during_an_idle_gap(tmp_path):
+    resume = threading.Event()
+
+    def feed():
+        yield "P1,2025-01-01T08:00:00,K,7.2,mmol/L\n"
+        resume.wait(5)  # the source goes quiet
+        yield "P1,2025-01-01T09:00:00,K,4.1,mmol/L\n"
+
+    alerts = []
+    started = time.perf_counter()
+
+    def on_critical(row):
+        alerts.append((time.perf_counter() - started, row))
+        resume.set()
+
+    ingestor = lab_feed.LabFeedIngestor(lab_store.LabStore(str(tmp_path)), on_critical=on_critical)
+    report = ingestor.run(feed(), batch_size=100, max_wait=0.2)
+
+    assert len(alerts) == 1
+    waited, row = alerts[0]
+    assert waited < 2
+    assert row["patient_id"] == "P1" and row["flag"] == "critical_high"
+    assert report["records"] == 2 and report["batches"] == 2
+
+
+def test_source_errors_reach_the_consumer():
+    def broken():
+        yield {"received": time.perf_counter()}
+        raise ValueError("bad feed")
+
+    batches = lab_feed.iter_batches(broken(), batch_size=10, max_wait=5)
+    try:
+        list(batches)
+    except ValueError as e:
+        assert str(e) == "bad feed"
+    else:
+        raise AssertionError("error was swallowed")
+
+
+def test_latency_samples_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(lab_feed, "LATENCY_SAMPLES", 50)
+    ingestor = lab_feed.LabFeedIngestor(lab_store.LabStore(str(tmp_path)))
+    lines = (f"P{i % 3},2025-01-01T{i % 24:02d}:00:00,Na,140,mmol/L\n" for i in range(500))
+    report = ingestor.run(lines, batch_size=40)
+    assert report["records"] == 500
+    assert len(ingestor.latencies) == 50
+
+
+def test_short_csv_rows_are_rejected_by_the_parser(tmp_path):
+    ingestor = lab_feed.LabFeedIngestor(lab_store.LabStore(str(tmp_path)))
+    lines = ["junk\n", "P1,2025-01-01T08:00:00\n", "P1,2025-01-01T08:00:00,Na\n"]
+    report = ingestor.run(lines, batch_size=10)
+    assert report["rejected"] == 3
+    assert report["records"] == 0
+
+    lines.append("P1,2025-01-01T09:00:00,Na,140,mmol/L\n")
+    report = lab_feed.LabFeedIngestor(lab_store.LabStore(str(tmp_path))).run(lines, batch_size=10)
+    assert report["rejected"] == 3 and report["records"] == 1
+
+
+def test_hl7_patient_and_time_do_not_carry_into_the_next_message():
+    lines = [
+        "MSH|^~\\&|LAB",
+        "PID|1||P1",
+        "OBR|1||||||202501010800",
+        "OBX|1|NM|K^Potassium||4.1|mmol/L",
+        "MSH|^~\\&|LAB",
+        "OBX|1|NM|K^Potassium||7.0|mmol/L",
+        "PID|1||P2",
+        "OBX|1|NM|K^Potassium||5.0|mmol/L",
+    ]
+    rejected = []
+    records = list(lab_feed.parse_hl7(lines, on_reject=rejected.append))
+    assert [(r["patient_id"], r["value"]) for r in records] == [("P1", "4.1")]
+    assert len(rejected) == 2
@@ -0,0 +1,25 @@
+import pandas as pd
+
+import lab
+import lab_ranges
+
+
+def test_si_values_without_unit_are_not_read_as_mg_per_dl():
+    text = lab.interpret_lab_values({"Glucose": 5.5, "Creatinine": 80})
+    assert "CRITICAL" not in text
+    assert text.splitlines() == ["Glucose: 5.5 (No automated interpretation)",
+                                 "Creatinine: 80 (No automated interpretation)"]
+
+
+def test_same_values_with_units_are_interpreted():
+    text = lab.interpret_lab_values({"Glucose": 5.5, "Creatinine": 80},
+                                    units={"Glucose": "mmol/L", "Creatinine": "umol/L"})
+    assert text.splitlines() == ["Glucose: Normal", "Creatinine: Normal"]
+
+
+def test_assumed_unit_never_raises_a_critical_flag():
+    frame = pd.DataFrame({"analyte": ["Hb", "Hb", "Hb"], "value": [5.0, 5.0, 5.0],
+                          "unit": [None, "", "g/dL"]})
+    result = lab_ranges.interpret_frame(frame)
+    assert result["flag"].tolist() == ["low", "low", "critical_low"]
+    assert result["critical"].tolist() == [False, False, True]
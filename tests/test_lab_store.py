@@ -0,0 +1,44 @@
+import pytest
+
+import lab_store
+
+
+def _rows(day, value):
+    return [{"date": f"2025-01-{day:02d}", "Hb": value}]
+
+
+def test_concurrent_writers_never_overwrite_a_segment(tmp_path, monkeypatch):
+    first = lab_store.LabStore(str(tmp_path))
+    second = lab_store.LabStore(str(tmp_path))
+    first.append("p1", _rows(1, 13.0))
+
+    # The second writer lists the folder before the first one's write lands
+    stale = second._segments("p1")
+    first.append("p1", _rows(2, 12.5))
+    monkeypatch.setattr(second, "_segments", lambda patient_id: stale)
+    second.append("p1", _rows(3, 12.0))
+    monkeypatch.undo()
+
+    reader = lab_store.LabStore(str(tmp_path))
+    assert reader.query("p1")["value"].tolist() == [13.0, 12.5, 12.0]
+
+
+def test_distinct_ids_never_share_a_folder(tmp_path):
+    store = lab_store.LabStore(str(tmp_path))
+    store.append("a/b", _rows(1, 13.0))
+    store.query("a/b")
+    store.append("a_b", _rows(2, 12.0))
+    store.append("a b", _rows(3, 11.0))
+
+    assert store.query("a/b")["value"].tolist() == [13.0]
+    assert store.query("a_b")["value"].tolist() == [12.0]
+    assert lab_store.LabStore(str(tmp_path)).patients() == ["a b", "a/b", "a_b"]
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+@pytest.mark.parametrize("patient_id", ["", ".", ".."])
+def test_ids_that_name_no_folder_are_rejected(tmp_path, patient_id):
+    store = lab_store.LabStore(str(tmp_path / "labs"))
+    with pytest.raises(ValueError):
+        store.append(patient_id, _rows(1, 13.0))
+    assert not (tmp_path / "labs").exists()
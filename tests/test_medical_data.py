@@ -0,0 +1,61 @@
+import random
+
+import drug_interactions
+import medical_data
+from medical_data import DrugSearchIndex
+
+
+def _reference(names, key, limit):
+    names = sorted({n.lower() for n in names})
+    prefixed = [n for n in names if n.startswith(key)]
+    infix = sorted((n.find(key), len(n), n) for n in names if key in n and n not in prefixed)
+    ranked = prefixed + [n for _, _, n in infix]
+    return tuple(ranked if limit is None else ranked[:limit])
+
+
+def test_search_ranking_matches_full_sort():
+    rng = random.Random(0)
+    syllables = ["am", "ox", "ic", "lin", "pra", "zol", "met", "ol", "ine", "e", "in"]
+    names = {rng.choice("bdfgkrstvw") + "".join(rng.choices(syllables, k=rng.randint(2, 5)))
+             for _ in range(3000)}
+    index = DrugSearchIndex(names)
+
+    for key in ["e", "in", "ol", "ine", "olin", "zolam", "bam", "q"]:
+        for limit in (None, 1, 10):
+            assert index.search(key, limit) == _reference(names, key, limit)
+
+
+def test_search_index_follows_renamed_drug(monkeypatch):
+    monkeypatch.setattr(medical_data, "BNF_DATA", dict(medical_data.BNF_DATA))
+    medical_data.use_formulary(None)
+    try:
+        assert medical_data.search_drug("amoxi") == ["amoxicillin"]
+        info = medical_data.get_drug_data("amoxicillin")
+        medical_data.remove_drug("amoxicillin")
+        medical_data.add_drug("amoxicillin trihydrate", info)
+        assert medical_data.search_drug("amoxi") == ["amoxicillin trihydrate"]
+    finally:
+        monkeypatch.undo()
+        medical_data.use_formulary(None)
+
+
+def test_direct_dict_edits_of_the_same_size_rebuild_derived_indexes(monkeypatch):
+    monkeypatch.setattr(medical_data, "BNF_DATA", dict(medical_data.BNF_DATA))
+    medical_data.use_formulary(None)
+    try:
+        assert medical_data.search_drug("amox") == ["amoxicillin"]
+        assert drug_interactions.check_interactions(["warfarin", "ketoprofen"]) == []
+
+        data = medical_data.BNF_DATA
+        data["amoxil-x"] = data.pop("amoxicillin")
+        assert medical_data.search_drug("amox") == ["amoxil-x"]
+
+        del data["amoxil-x"]
+        data["ketoprofen"] = {"class": "NSAID", "dose": "50 mg TDS"}
+        assert medical_data.search_drug("amox") == []
+        pairs = {(i["drug1"], i["drug2"]) for i in
+                 drug_interactions.check_interactions(["warfarin", "ketoprofen"])}
+        assert pairs == {("warfarin", "ketoprofen")}
+    finally:
+        monkeypatch.undo()
+        medical_data.use_formulary(None)
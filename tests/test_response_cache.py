@@ -0,0 +1,37 @@
+import os
+import time
+
+from response_cache import ResponseCache
+
+
+def _disk_files(path):
+    return sorted(name for name in os.listdir(path) if name.endswith(".json"))
+
+
+def test_first_write_sweeps_expired_entries_left_on_disk(tmp_path):
+    old = ResponseCache(ttl=60, disk_dir=str(tmp_path))
+    old.set("stale", "x" * 100)
+    past = time.time() - 3600
+    os.utime(tmp_path / "stale.json", (past, past))
+
+    cache = ResponseCache(ttl=60, disk_dir=str(tmp_path))
+    cache.set("fresh", "y")
+
+    assert _disk_files(tmp_path) == ["fresh.json"]
+    assert cache.stats()["disk_evictions"] == 1
+
+
+def test_sweep_keeps_the_disk_tier_under_its_byte_limit(tmp_path):
+    cache = ResponseCache(ttl=0, disk_dir=str(tmp_path),
+                          max_disk_bytes=2000, sweep_every=5)
+    for i in range(40):
+        cache.set(f"k{i:02d}", "z" * 200)
+        path = tmp_path / f"k{i:02d}.json"
+        os.utime(path, (1_000_000 + i, 1_000_000 + i))
+
+    cache.sweep_disk()
+    sizes = [os.path.getsize(tmp_path / name) for name in _disk_files(tmp_path)]
+    assert sum(sizes) <= 2000
+    # The newest entries survive
+    assert "k39.json" in _disk_files(tmp_path)
+    assert "k00.json" not in _disk_files(tmp_path)